@@ -0,0 +1,220 @@
+"""Controle de admissão e descarte de carga.
+
+Dois middlewares:
+
+- LimiteTaxaMiddleware (externo): balde de tokens por cliente (IP). Quem
+  passa da taxa recebe 429 com Retry-After. Desligado por padrão
+  (ESCOLA_LIMITE_TAXA=0).
+- AdmissaoMiddleware (o mais interno): vagas de execução por classe de rota
+  (leituras e escritas), que por padrão repartem as conexões do pool. Sem
+  vaga, a requisição espera na fila até ESCOLA_ADMISSAO_ESPERA_MS; passado o
+  limite recebe 503 com Retry-After em vez de ficar presa no threadpool
+  esperando o checkout de uma conexão. Depois de uma espera expirada, quem
+  chega sem vaga livre é recusado na hora durante o mesmo intervalo (a fila
+  já está atrasada). Acertos do cache, leituras coalescidas e repetições de
+  Idempotency-Key não chegam a ocupar vaga.
+
+/health e /metrics ficam de fora de ambos; o stream SSE fica de fora das
+vagas (a conexão dura indefinidamente e não segura conexão do banco).
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from . import config
+from . import database
+from . import schemas
+
+# Rotas que nunca são limitadas (monitoramento)
+ROTAS_ISENTAS = {"/health", "/metrics"}
+
+# Rotas que não ocupam vaga de execução
+ROTAS_SEM_VAGA = {"/turmas/stream"}
+
+# Métodos que ocupam vagas de leitura; os demais ocupam vagas de escrita
+METODOS_LEITURA = {"GET", "HEAD", "OPTIONS"}
+
+# Clientes guardados no limite de taxa (os menos recentes saem primeiro)
+MAX_CLIENTES = 10000
+
+
+async def responder_erro(send, status_code: int, erro: str, mensagem: str, retry_after: float):
+    corpo = schemas.json_bytes({"error": erro, "message": mensagem})
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(corpo)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": corpo})
+
+
+class LimiteConcorrencia:
+    """Vagas de execução de uma classe de rotas, com fila FIFO de espera limitada no tempo"""
+
+    def __init__(self, capacidade: int, espera_maxima: float):
+        self.capacidade = capacidade
+        self.espera_maxima = espera_maxima
+        self.em_uso = 0
+        self.fila = deque()
+        self.saturado_ate = 0.0
+        self.admitidas = 0
+        self.rejeitadas = 0
+
+    async def entrar(self) -> bool:
+        """Ocupar uma vaga (True) ou desistir depois da espera máxima (False)"""
+        if self.em_uso < self.capacidade and not self.fila:
+            self.em_uso += 1
+            self.admitidas += 1
+            return True
+        if time.monotonic() < self.saturado_ate:
+            # Uma espera acabou de expirar: a fila está atrasada, recusar sem esperar
+            self.rejeitadas += 1
+            return False
+
+        futuro = asyncio.get_running_loop().create_future()
+        self.fila.append(futuro)
+        try:
+            await asyncio.wait({futuro}, timeout=self.espera_maxima)
+        except BaseException:
+            # Requisição cancelada na fila: devolver a vaga se ela já tinha sido passada
+            if futuro.done():
+                self.sair()
+            else:
+                futuro.cancel()
+                self.fila.remove(futuro)
+            raise
+        if not futuro.done():
+            futuro.cancel()
+            self.fila.remove(futuro)
+            self.saturado_ate = time.monotonic() + self.espera_maxima
+            self.rejeitadas += 1
+            return False
+        self.admitidas += 1
+        return True
+
+    def sair(self):
+        """Liberar a vaga, passando-a direto para o primeiro da fila"""
+        while self.fila:
+            futuro = self.fila.popleft()
+            if not futuro.done():
+                futuro.set_result(True)
+                return
+        self.em_uso -= 1
+
+    def estatisticas(self) -> dict:
+        return {
+            "capacidade": self.capacidade,
+            "em_uso": self.em_uso,
+            "na_fila": len(self.fila),
+            "saturado": self.em_uso >= self.capacidade,
+            "admitidas": self.admitidas,
+            "rejeitadas": self.rejeitadas,
+        }
+
+
+class LimiteTaxa:
+    """Balde de tokens por cliente: `taxa` requisições por segundo com rajada de até `rajada`"""
+
+    def __init__(self, taxa: float, rajada: float):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.baldes = OrderedDict()
+        self.rejeitadas = 0
+
+    def consumir(self, cliente: str) -> float:
+        """Gastar um token do cliente: 0 se permitido, senão segundos até o próximo token"""
+        agora = time.monotonic()
+        tokens, ultimo = self.baldes.pop(cliente, (self.rajada, agora))
+        tokens = min(self.rajada, tokens + (agora - ultimo) * self.taxa)
+        espera = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            espera = (1 - tokens) / self.taxa
+            self.rejeitadas += 1
+        self.baldes[cliente] = (tokens, agora)
+        if len(self.baldes) > MAX_CLIENTES:
+            self.baldes.popitem(last=False)
+        return espera
+
+    def estatisticas(self) -> dict:
+        return {
+            "requisicoes_por_segundo": self.taxa,
+            "rajada": self.rajada,
+            "clientes": len(self.baldes),
+            "rejeitadas": self.rejeitadas,
+        }
+
+
+# Compartilhados entre os middlewares e o GET /health (um por processo)
+limites = {
+    "leituras": LimiteConcorrencia(config.ADMISSAO_LEITURAS, config.ADMISSAO_ESPERA_MS / 1000),
+    "escritas": LimiteConcorrencia(config.ADMISSAO_ESCRITAS, config.ADMISSAO_ESPERA_MS / 1000),
+}
+limite_taxa = LimiteTaxa(config.LIMITE_TAXA, config.LIMITE_TAXA_RAJADA) if config.LIMITE_TAXA > 0 else None
+
+
+def saturacao() -> dict:
+    """Ocupação das vagas, do limite de taxa e do pool de conexões"""
+    engines = [database.engine] + ([database.async_engine.sync_engine] if database.async_engine is not None else [])
+    return {
+        "leituras": limites["leituras"].estatisticas(),
+        "escritas": limites["escritas"].estatisticas(),
+        "limite_taxa": limite_taxa.estatisticas() if limite_taxa else None,
+        "pool": {
+            "capacidade": config.CONEXOES_POOL,
+            "em_uso": sum(engine.pool.checkedout() for engine in engines),
+        },
+    }
+
+
+class AdmissaoMiddleware:
+    """Middleware ASGI que limita as execuções simultâneas de leituras e de escritas"""
+
+    def __init__(self, app, limites: dict = limites):
+        self.app = app
+        self.limites = limites
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in ROTAS_ISENTAS or scope["path"] in ROTAS_SEM_VAGA:
+            await self.app(scope, receive, send)
+            return
+
+        limite = self.limites["leituras" if scope["method"] in METODOS_LEITURA else "escritas"]
+        if not await limite.entrar():
+            await responder_erro(
+                send, 503, "Service Unavailable",
+                "Servidor sobrecarregado. Tente novamente em instantes.", limite.espera_maxima
+            )
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limite.sair()
+
+
+class LimiteTaxaMiddleware:
+    """Middleware ASGI que aplica o balde de tokens por cliente"""
+
+    def __init__(self, app, limite: LimiteTaxa = limite_taxa):
+        self.app = app
+        self.limite = limite
+
+    async def __call__(self, scope, receive, send):
+        if self.limite is None or scope["type"] != "http" or scope["path"] in ROTAS_ISENTAS:
+            await self.app(scope, receive, send)
+            return
+
+        cliente = scope["client"][0] if scope.get("client") else "desconhecido"
+        espera = self.limite.consumir(cliente)
+        if espera:
+            await responder_erro(
+                send, 429, "Too Many Requests",
+                "Limite de requisições excedido. Tente novamente em instantes.", espera
+            )
+            return
+        await self.app(scope, receive, send)
@@ -1,14 +1,36 @@
-from fastapi import FastAPI, Depends, Query, HTTPException, status
+from fastapi import FastAPI, Depends, Query, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from . import models
 from . import database
+from . import crud
+from . import config
+from . import ocupacao
+from . import busca
+from . import migracoes
+from . import importacao
+from . import exportacao
+from . import rotas_async
+from . import cache
+from . import schemas
+from . import metricas
+from . import perfilador
+from . import transmissao
+from . import compressao
+from . import estatisticas
+from . import coalescencia
+from . import idempotencia
+from . import admissao
 from .database import SessionLocal
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, validator, ValidationError
 from datetime import date, datetime
+import base64
+import json
 import re
 import logging
 
@@ -20,7 +42,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Sistema Escola API",
     description="API para gerenciamento de alunos e turmas",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=schemas.ClasseResposta
 )
 
 # Handler para erros internos do servidor
@@ -76,13 +99,62 @@ async def validation_exception_handler(request, exc: RequestValidationError):
         content={
             "error": "Unprocessable Entity",
             "message": "Os dados fornecidos são inválidos",
-            "details": exc.errors()
+            "details": jsonable_encoder(exc.errors())
         }
     )
 
+# Limitar as execuções simultâneas de leituras e escritas (só o que de fato vai ao banco)
+if config.ADMISSAO_ATIVA:
+    app.add_middleware(admissao.AdmissaoMiddleware)
+
+# Compartilhar uma única execução entre leituras idênticas simultâneas (por dentro do cache)
+if config.COALESCENCIA_ATIVA:
+    app.add_middleware(coalescencia.CoalescenciaMiddleware)
+
+# Servir as listagens de alunos e turmas do cache em memória (com ETag/304)
+if config.CACHE_ATIVO:
+    app.add_middleware(cache.CacheMiddleware)
+
+# Repetir a resposta gravada de POSTs reenviados com a mesma Idempotency-Key
+# (por dentro da compressão: grava o corpo sem compressão, que é negociada a cada repetição)
+if config.IDEMPOTENCIA_ATIVA:
+    app.add_middleware(idempotencia.IdempotenciaMiddleware)
+
+# Comprimir as respostas grandes (fora do cache, que guarda o corpo sem compressão)
+if config.COMPRESSAO_ATIVA:
+    app.add_middleware(compressao.CompressaoMiddleware)
+
+# Contar consultas e tempo de banco por requisição e registrar consultas lentas
+perfilador.instrumentar_engine(database.engine)
+if database.async_engine is not None:
+    perfilador.instrumentar_engine(database.async_engine.sync_engine)
+app.add_middleware(perfilador.PerfiladorMiddleware)
+
+# Limite de requisições por cliente (desligado com ESCOLA_LIMITE_TAXA=0)
+app.add_middleware(admissao.LimiteTaxaMiddleware)
+
+# Medir latência por rota (middleware mais externo, inclui acertos do cache) e uso do pool
+if config.METRICAS_ATIVAS:
+    metricas.instrumentar_engine(database.engine, "sync")
+    if database.async_engine is not None:
+        metricas.instrumentar_engine(database.async_engine.sync_engine, "async")
+    app.add_middleware(metricas.MetricasMiddleware)
+
 # Criar tabelas do banco de dados automaticamente
 models.Base.metadata.create_all(bind=database.engine)
 
+# Atualizar bancos existentes (colunas e índices novos) com as migrações pendentes
+migracoes.executar_migracoes(database.engine)
+
+# Instalar ou remover os triggers do contador de matrículas conforme a configuração
+ocupacao.configurar_contador(database.engine, config.USAR_CONTADOR_MATRICULAS)
+
+# Instalar o índice FTS5 de nomes (com fallback para ILIKE se indisponível)
+busca.configurar_busca(database.engine, config.USAR_BUSCA_FTS)
+
+# Instalar ou remover os triggers do rollup de GET /estatisticas conforme a configuração
+estatisticas.configurar_estatisticas(database.engine, config.USAR_ESTATISTICAS)
+
 # Dependência para obter sessão do banco de dados
 def get_db():
     db = SessionLocal()
@@ -128,60 +200,114 @@ def health():
     """Verificar saúde da API"""
     return {
         "status": "ok",
-        "message": "API funcionando corretamente"
+        "message": "API funcionando corretamente",
+        "cache": cache.cache_respostas.estatisticas() if config.CACHE_ATIVO else None,
+        "coalescencia": coalescencia.coalescedor.estatisticas() if config.COALESCENCIA_ATIVA else None,
+        "admissao": admissao.saturacao()
     }
 
+# Endpoint GET /metrics
+@app.get('/metrics', response_class=PlainTextResponse)
+def exportar_metricas():
+    """Métricas de latência, erros e pool no formato texto do Prometheus"""
+    return PlainTextResponse(
+        metricas.exportar_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+# Limites da paginação da listagem de alunos
+LIMITE_PADRAO_ALUNOS = 100
+LIMITE_MAXIMO_ALUNOS = 1000
+
+def codificar_cursor(ultimo_id: int) -> str:
+    """Gerar cursor opaco a partir do último ID retornado"""
+    payload = json.dumps({"id": ultimo_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str) -> int:
+    """Recuperar o último ID a partir de um cursor opaco"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ultimo_id = json.loads(payload)["id"]
+        if not isinstance(ultimo_id, int) or isinstance(ultimo_id, bool):
+            raise ValueError(ultimo_id)
+        return ultimo_id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Bad Request",
+                "message": "Cursor de paginação inválido"
+            }
+        )
+
+def campos_pedidos(fields: Optional[str], permitidos: tuple) -> Optional[tuple]:
+    """Validar ?fields= (lista separada por vírgulas) e devolver os campos na ordem pedida"""
+    if not fields:
+        return None
+    campos = tuple(dict.fromkeys(campo.strip() for campo in fields.split(",") if campo.strip()))
+    invalidos = [campo for campo in campos if campo not in permitidos]
+    if not campos or invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Bad Request",
+                "message": f"Campos inválidos: {', '.join(invalidos) or fields}. Disponíveis: {', '.join(permitidos)}"
+            }
+        )
+    return campos
+
 # Endpoint GET /alunos
-@app.get('/alunos', status_code=status.HTTP_200_OK)
+@app.get('/alunos', status_code=status.HTTP_200_OK, response_model=schemas.ListaAlunos)
+@rotas_async.assincrona_se_ativo
 def get_alunos(
     search: Optional[str] = Query(None, description="Buscar por nome do aluno"),
     turma_id: Optional[int] = Query(None, description="Filtrar por ID da turma"),
     status: Optional[str] = Query(None, description="Filtrar por status (ativo/inativo)"),
+    limit: int = Query(LIMITE_PADRAO_ALUNOS, ge=1, le=LIMITE_MAXIMO_ALUNOS, description="Quantidade máxima de alunos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em proximo_cursor"),
+    incluir_total: bool = Query(True, description="Calcular o total de alunos que atendem aos filtros"),
+    fields: Optional[str] = Query(None, description="Campos de cada aluno, separados por vírgula (ex.: id,nome,turma_nome)"),
     db: Session = Depends(get_db)
 ):
-    """Listar todos os alunos com filtros opcionais"""
+    """Listar alunos com filtros opcionais e paginação por cursor (keyset em Aluno.id)"""
     try:
-    # Começar com query base
-    query = db.query(models.Aluno)
-    
-    # Aplicar filtro de busca por nome (case-insensitive)
-    if search:
-        query = query.filter(models.Aluno.nome.ilike(f"%{search}%"))
-    
-    # Aplicar filtro por turma_id
-    if turma_id is not None:
-        query = query.filter(models.Aluno.turma_id == turma_id)
-    
-    # Aplicar filtro por status
-    if status:
-        query = query.filter(models.Aluno.status == status)
-    
-    # Executar query e buscar resultados
-    alunos = query.all()
-    
-    # Converter para formato JSON
-    alunos_json = []
-    for aluno in alunos:
-        aluno_dict = {
-            "id": aluno.id,
-            "nome": aluno.nome,
-            "data_nascimento": aluno.data_nascimento.isoformat() if aluno.data_nascimento else None,
-            "email": aluno.email,
-            "status": aluno.status,
-            "turma_id": aluno.turma_id,
-            "turma_nome": aluno.turma.nome if aluno.turma else None
-        }
-        alunos_json.append(aluno_dict)
-    
-        return {
-            "total": len(alunos_json),
+        campos = campos_pedidos(fields, crud.CAMPOS_ALUNO)
+
+        # Contar o total apenas quando solicitado (custa uma varredura dos filtros)
+        total = crud.contar_alunos(db, search, turma_id, status) if incluir_total else None
+
+        # Projeção só dos campos pedidos; o JOIN com turmas só entra para turma_nome
+        query = crud.filtrar_alunos(crud.consulta_alunos(db, campos), search, turma_id, status)
+
+        # Paginar por keyset: continuar a partir do último ID da página anterior
+        if cursor:
+            query = query.filter(models.Aluno.id > decodificar_cursor(cursor))
+
+        # Buscar um registro a mais para saber se existe próxima página
+        alunos = query.order_by(models.Aluno.id).limit(limit + 1).all()
+        tem_proxima = len(alunos) > limit
+        alunos = alunos[:limit]
+
+        # Converter para formato JSON
+        if campos:
+            alunos_json = [schemas.aluno_campos_para_dict(aluno, campos) for aluno in alunos]
+        else:
+            alunos_json = [schemas.aluno_para_dict(aluno) for aluno in alunos]
+
+        return schemas.resposta_json({
+            "total": total,
+            "limite": limit,
+            "proximo_cursor": codificar_cursor(alunos[-1].id) if tem_proxima else None,
             "filtros_aplicados": {
                 "search": search,
                 "turma_id": turma_id,
                 "status": status
             },
             "alunos": alunos_json
-        }
+        })
+    except HTTPException:
+        raise  # Re-raise HTTPExceptions (400)
     except SQLAlchemyError as e:
         logger.error(f"Erro ao buscar alunos: {str(e)}")
         raise HTTPException(
@@ -201,8 +327,35 @@ def get_alunos(
             }
         )
 
+# Endpoint GET /alunos/export
+@app.get('/alunos/export', status_code=status.HTTP_200_OK)
+def exportar_alunos(
+    format: str = Query("csv", description="Formato do arquivo: csv ou ndjson"),
+    search: Optional[str] = Query(None, description="Buscar por nome do aluno"),
+    turma_id: Optional[int] = Query(None, description="Filtrar por ID da turma"),
+    status_aluno: Optional[str] = Query(None, alias="status", description="Filtrar por status (ativo/inativo)"),
+):
+    """Exportar os alunos (mesmos filtros da listagem) em CSV ou NDJSON, em fluxo"""
+    formato = format.lower()
+    if formato not in exportacao.TIPOS_CONTEUDO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Bad Request",
+                "message": 'Formato deve ser "csv" ou "ndjson"'
+            }
+        )
+
+    # O gerador roda no threadpool e envia cada pedaço assim que ele é lido do banco
+    return StreamingResponse(
+        exportacao.gerar_exportacao(formato, search, turma_id, status_aluno),
+        media_type=exportacao.TIPOS_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="alunos.{formato}"'}
+    )
+
 # Endpoint POST /alunos
-@app.post('/alunos', status_code=status.HTTP_201_CREATED)
+@app.post('/alunos', status_code=status.HTTP_201_CREATED, response_model=schemas.AlunoSalvo)
+@rotas_async.assincrona_se_ativo
 def criar_aluno(aluno: AlunoCreate, db: Session = Depends(get_db)):
     """Criar um novo aluno"""
     try:
@@ -219,7 +372,7 @@ def criar_aluno(aluno: AlunoCreate, db: Session = Depends(get_db)):
                 )
         
         # Validar se turma_id existe (se informado)
-        if aluno.turma_id:
+        if aluno.turma_id is not None:
             turma_existe = db.query(models.Turma).filter(models.Turma.id == aluno.turma_id).first()
             if not turma_existe:
                 raise HTTPException(
@@ -229,44 +382,44 @@ def criar_aluno(aluno: AlunoCreate, db: Session = Depends(get_db)):
                         "message": "Turma não encontrada"
                     }
                 )
-    
-    # Criar novo aluno
-    novo_aluno = models.Aluno(
-        nome=aluno.nome,
-        data_nascimento=aluno.data_nascimento,
-        email=aluno.email,
-        status=aluno.status,
-        turma_id=aluno.turma_id
-    )
-    
-    # Salvar no banco
-    db.add(novo_aluno)
-    db.commit()
-    db.refresh(novo_aluno)  # Para obter o ID gerado
-    
-    # Buscar dados da turma se existir
-    turma_nome = None
-    if novo_aluno.turma:
-        turma_nome = novo_aluno.turma.nome
-    
-        # Retornar aluno criado
+
+        # Criar novo aluno
+        novo_aluno = models.Aluno(
+            nome=aluno.nome,
+            data_nascimento=aluno.data_nascimento,
+            email=aluno.email,
+            status=aluno.status,
+            turma_id=aluno.turma_id
+        )
+
+        # Salvar no banco
+        db.add(novo_aluno)
+        db.flush()  # Para obter o ID gerado
+        novo_aluno_id = novo_aluno.id
+        db.commit()
+        cache.invalidar(*(["alunos", "ocupacao"] if aluno.turma_id else ["alunos"]))
+        if aluno.turma_id:
+            transmissao.notificar([aluno.turma_id])
+
+        # Retornar aluno criado (com o nome da turma em uma única consulta)
         return {
             "message": "Aluno criado com sucesso",
-            "aluno": {
-                "id": novo_aluno.id,
-                "nome": novo_aluno.nome,
-                "data_nascimento": novo_aluno.data_nascimento.isoformat(),
-                "email": novo_aluno.email,
-                "status": novo_aluno.status,
-                "turma_id": novo_aluno.turma_id,
-                "turma_nome": turma_nome
-            }
+            "aluno": crud.buscar_aluno(db, novo_aluno_id)
         }
     except HTTPException:
         raise  # Re-raise HTTPExceptions (400, 404)
     except SQLAlchemyError as e:
-        logger.error(f"Erro ao criar aluno: {str(e)}")
         db.rollback()
+        # Turma removida entre a validação e o INSERT: barrada pela chave estrangeira
+        if isinstance(e, IntegrityError) and database.violacao_chave_estrangeira(e):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "error": "Bad Request",
+                    "message": "Turma não encontrada"
+                }
+            )
+        logger.error(f"Erro ao criar aluno: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={
@@ -283,7 +436,87 @@ def criar_aluno(aluno: AlunoCreate, db: Session = Depends(get_db)):
                 "error": "Internal Server Error",
                 "message": "Erro inesperado ao processar solicitação"
             }
-        )# Schema Pydantic para atualização de aluno (mesmas validações do POST)
+        )
+
+def mensagem_validacao(erro: ValidationError) -> str:
+    """Resumir o primeiro erro de validação do Pydantic em uma mensagem"""
+    detalhe = erro.errors()[0]
+    campo = ".".join(str(parte) for parte in detalhe.get("loc", []))
+    mensagem = str(detalhe.get("msg", "")).replace("Value error, ", "")
+    return f"{campo}: {mensagem}" if campo else mensagem
+
+def gravar_lote_alunos(lote: list) -> tuple:
+    """Gravar um lote da importação em uma sessão própria (executado no threadpool)"""
+    db = SessionLocal()
+    try:
+        return importacao.importar_lote(db, lote)
+    except SQLAlchemyError as e:
+        logger.error(f"Erro ao importar lote de alunos: {str(e)}")
+        db.rollback()
+        return 0, [{"linha": numero, "message": "Erro ao salvar aluno no banco de dados"} for numero, _ in lote]
+    finally:
+        db.close()
+
+# Endpoint POST /alunos/bulk
+@app.post('/alunos/bulk', status_code=status.HTTP_200_OK)
+async def importar_alunos(
+    request: Request,
+    formato: Optional[str] = Query(None, description="csv ou ndjson (padrão: deduzido do Content-Type)"),
+    tamanho_lote: int = Query(importacao.TAMANHO_LOTE_PADRAO, ge=1, le=importacao.TAMANHO_LOTE_MAXIMO, description="Linhas gravadas por transação"),
+):
+    """Importar alunos em massa a partir de um upload CSV ou NDJSON lido em fluxo"""
+    formato_arquivo = importacao.detectar_formato(request.headers.get("content-type"), formato)
+    if not formato_arquivo:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail={
+                "error": "Unsupported Media Type",
+                "message": "Envie o arquivo como CSV (text/csv) ou NDJSON (application/x-ndjson)"
+            }
+        )
+
+    total_linhas = 0
+    inseridos = 0
+    erros = []
+    lote = []
+
+    # Validar cada linha com as mesmas regras do POST /alunos e gravar por lotes
+    async for numero, dados in importacao.ler_registros(request.stream(), formato_arquivo):
+        total_linhas += 1
+        if isinstance(dados, str):
+            erros.append({"linha": numero, "message": dados})
+            continue
+        try:
+            lote.append((numero, AlunoCreate(**dados)))
+        except ValidationError as e:
+            erros.append({"linha": numero, "message": mensagem_validacao(e)})
+            continue
+
+        if len(lote) >= tamanho_lote:
+            gravados, erros_lote = await run_in_threadpool(gravar_lote_alunos, lote)
+            inseridos += gravados
+            erros.extend(erros_lote)
+            lote = []
+
+    if lote:
+        gravados, erros_lote = await run_in_threadpool(gravar_lote_alunos, lote)
+        inseridos += gravados
+        erros.extend(erros_lote)
+
+    if inseridos:
+        cache.invalidar("alunos", "ocupacao")
+        transmissao.notificar()
+
+    return {
+        "message": "Importação concluída",
+        "formato": formato_arquivo,
+        "total_linhas": total_linhas,
+        "inseridos": inseridos,
+        "com_erro": len(erros),
+        "erros": sorted(erros, key=lambda erro: erro["linha"])
+    }
+
+# Schema Pydantic para atualização de aluno (mesmas validações do POST)
 class AlunoUpdate(BaseModel):
     nome: str = Field(..., min_length=3, max_length=80, description="Nome do aluno (3-80 caracteres)")
     data_nascimento: date = Field(..., description="Data de nascimento do aluno")
@@ -315,7 +548,8 @@ class AlunoUpdate(BaseModel):
         return v
 
 # Endpoint PUT /alunos/{id}
-@app.put('/alunos/{id}')
+@app.put('/alunos/{id}', response_model=schemas.AlunoSalvo)
+@rotas_async.assincrona_se_ativo
 def atualizar_aluno(id: int, aluno_dados: AlunoUpdate, db: Session = Depends(get_db)):
     # Buscar o aluno pelo ID
     aluno_existente = db.query(models.Aluno).filter(models.Aluno.id == id).first()
@@ -334,12 +568,13 @@ def atualizar_aluno(id: int, aluno_dados: AlunoUpdate, db: Session = Depends(get
             raise HTTPException(status_code=400, detail="Email inválido ou já existente")
     
     # Validar se turma_id existe (se informado)
-    if aluno_dados.turma_id:
+    if aluno_dados.turma_id is not None:
         turma_existe = db.query(models.Turma).filter(models.Turma.id == aluno_dados.turma_id).first()
         if not turma_existe:
             raise HTTPException(status_code=400, detail="Turma não encontrada")
     
     # Atualizar dados do aluno
+    turma_anterior = aluno_existente.turma_id
     aluno_existente.nome = aluno_dados.nome
     aluno_existente.data_nascimento = aluno_dados.data_nascimento
     aluno_existente.email = aluno_dados.email
@@ -347,30 +582,214 @@ def atualizar_aluno(id: int, aluno_dados: AlunoUpdate, db: Session = Depends(get
     aluno_existente.turma_id = aluno_dados.turma_id
     
     # Salvar no banco
-    db.commit()
-    db.refresh(aluno_existente)  # Para atualizar os relacionamentos
-    
-    # Buscar dados da turma se existir
-    turma_nome = None
-    if aluno_existente.turma:
-        turma_nome = aluno_existente.turma.nome
-    
-    # Retornar aluno atualizado
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if database.violacao_chave_estrangeira(e):
+            raise HTTPException(status_code=400, detail="Turma não encontrada")
+        raise
+    if turma_anterior != aluno_dados.turma_id:
+        cache.invalidar("alunos", "ocupacao")
+        transmissao.notificar([turma_anterior, aluno_dados.turma_id])
+    else:
+        cache.invalidar("alunos")
+
+    # Retornar aluno atualizado (com o nome da turma em uma única consulta)
     return {
         "message": "Aluno atualizado com sucesso",
-        "aluno": {
-            "id": aluno_existente.id,
-            "nome": aluno_existente.nome,
-            "data_nascimento": aluno_existente.data_nascimento.isoformat(),
-            "email": aluno_existente.email,
-            "status": aluno_existente.status,
-            "turma_id": aluno_existente.turma_id,
-            "turma_nome": turma_nome
-        }
+        "aluno": crud.buscar_aluno(db, id)
+    }
+
+# Schema Pydantic para atualização parcial de aluno (só os campos enviados)
+class AlunoPatch(BaseModel):
+    nome: Optional[str] = Field(None, min_length=3, max_length=80, description="Nome do aluno (3-80 caracteres)")
+    data_nascimento: Optional[date] = Field(None, description="Data de nascimento do aluno")
+    email: Optional[str] = Field(None, description="Email do aluno (null remove)")
+    status: Optional[str] = Field(None, description="Status do aluno: ativo ou inativo")
+    turma_id: Optional[int] = Field(None, description="ID da turma (null desmatricula)")
+
+    # Mesmas validações do PUT; nome, data de nascimento e status podem ser omitidos, mas não nulos
+    @validator('nome')
+    def validar_nome(cls, v):
+        if v is None:
+            raise ValueError('Nome não pode ser nulo')
+        return v
+
+    @validator('data_nascimento')
+    def validar_data_nascimento(cls, v):
+        if v is None:
+            raise ValueError('Data de nascimento não pode ser nula')
+        hoje = date.today()
+        idade_minima = hoje.replace(year=hoje.year - 5)
+        if v > idade_minima:
+            raise ValueError('Aluno deve ter pelo menos 5 anos')
+        return v
+
+    @validator('email')
+    def validar_email(cls, v):
+        if v is not None:
+            # Regex para validar email
+            email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+            if not re.match(email_regex, v):
+                raise ValueError('Email inválido ou já existente')
+        return v
+
+    @validator('status')
+    def validar_status(cls, v):
+        if v not in ['ativo', 'inativo']:
+            raise ValueError('Status deve ser "ativo" ou "inativo"')
+        return v
+
+# Endpoint PATCH /alunos/{id}
+@app.patch('/alunos/{id}', response_model=schemas.AlunoSalvo)
+@rotas_async.assincrona_se_ativo
+def atualizar_aluno_parcial(id: int, aluno_dados: AlunoPatch, db: Session = Depends(get_db)):
+    """Atualizar só os campos enviados, em um único UPDATE ... RETURNING"""
+    campos = aluno_dados.model_dump(exclude_unset=True)
+    if not campos:
+        raise HTTPException(status_code=400, detail="Informe ao menos um campo para atualizar")
+
+    # Email único e turma existente são garantidos pelas restrições do banco, sem SELECTs prévios
+    try:
+        aluno = crud.atualizar_aluno_parcial(db, id, campos)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        erro = str(e.orig)
+        if "alunos.email" in erro:
+            raise HTTPException(status_code=400, detail="Email inválido ou já existente")
+        if database.violacao_chave_estrangeira(e):
+            raise HTTPException(status_code=400, detail="Turma não encontrada")
+        raise
+
+    if aluno is None:
+        raise HTTPException(status_code=404, detail="Aluno não encontrado")
+
+    if "turma_id" in campos:
+        # A turma anterior não volta no RETURNING: o stream recarrega a ocupação de todas
+        cache.invalidar("alunos", "ocupacao")
+        transmissao.notificar()
+    else:
+        cache.invalidar("alunos")
+
+    return {
+        "message": "Aluno atualizado com sucesso",
+        "aluno": schemas.aluno_para_dict(aluno)
     }
 
+# Schema Pydantic para a troca de status em massa
+class AlunoStatusLote(BaseModel):
+    status: str = Field(..., description="Novo status dos alunos: ativo ou inativo")
+
+    @validator('status')
+    def validar_status(cls, v):
+        if v not in ['ativo', 'inativo']:
+            raise ValueError('Status deve ser "ativo" ou "inativo"')
+        return v
+
+# Endpoint POST /alunos/status
+@app.post('/alunos/status', status_code=status.HTTP_200_OK)
+@rotas_async.assincrona_se_ativo
+def alterar_status_alunos(
+    dados: AlunoStatusLote,
+    search: Optional[str] = Query(None, description="Buscar por nome do aluno"),
+    turma_id: Optional[int] = Query(None, description="Filtrar por ID da turma"),
+    status_aluno: Optional[str] = Query(None, alias="status", description="Filtrar por status (ativo/inativo)"),
+    dry_run: bool = Query(False, description="Só contar os alunos afetados, sem alterar nada"),
+    db: Session = Depends(get_db)
+):
+    """Trocar o status dos alunos filtrados (mesmos filtros da listagem) com um único UPDATE"""
+    try:
+        if dry_run:
+            alterados = crud.contar_mudancas_status(db, search, turma_id, status_aluno, dados.status)
+        else:
+            alterados = crud.alterar_status_alunos(db, search, turma_id, status_aluno, dados.status)
+            db.commit()
+            # O status não entra na ocupação das turmas: só as listagens mudam
+            if alterados:
+                cache.invalidar("alunos")
+
+        return {
+            "message": "Simulação concluída, nada foi alterado" if dry_run else "Status dos alunos atualizado com sucesso",
+            "dry_run": dry_run,
+            "filtros_aplicados": {
+                "search": search,
+                "turma_id": turma_id,
+                "status": status_aluno
+            },
+            "novo_status": dados.status,
+            "alterados": alterados
+        }
+    except SQLAlchemyError as e:
+        logger.error(f"Erro ao alterar o status dos alunos: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "Internal Server Error",
+                "message": "Erro ao alterar o status dos alunos no banco de dados"
+            }
+        )
+
+# Endpoint DELETE /alunos
+@app.delete('/alunos', status_code=status.HTTP_200_OK)
+@rotas_async.assincrona_se_ativo
+def deletar_alunos(
+    search: Optional[str] = Query(None, description="Buscar por nome do aluno"),
+    turma_id: Optional[int] = Query(None, description="Filtrar por ID da turma"),
+    status_aluno: Optional[str] = Query(None, alias="status", description="Filtrar por status (ativo/inativo)"),
+    dry_run: bool = Query(False, description="Só contar os alunos afetados, sem excluir nada"),
+    db: Session = Depends(get_db)
+):
+    """Excluir os alunos filtrados (mesmos filtros da listagem) com um único DELETE"""
+    # Sem filtro a exclusão apagaria todos os alunos: exigir ao menos um
+    if not search and turma_id is None and not status_aluno:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Bad Request",
+                "message": "Informe ao menos um filtro (search, turma_id ou status)"
+            }
+        )
+
+    try:
+        if dry_run:
+            excluidos = crud.contar_alunos(db, search, turma_id, status_aluno)
+        else:
+            turmas_excluidos = crud.excluir_alunos(db, search, turma_id, status_aluno)
+            db.commit()
+            excluidos = len(turmas_excluidos)
+            turmas_afetadas = sorted({turma for turma in turmas_excluidos if turma is not None})
+            if excluidos:
+                cache.invalidar(*(["alunos", "ocupacao"] if turmas_afetadas else ["alunos"]))
+            if turmas_afetadas:
+                transmissao.notificar(turmas_afetadas)
+
+        return {
+            "message": "Simulação concluída, nada foi excluído" if dry_run else "Alunos deletados com sucesso",
+            "dry_run": dry_run,
+            "filtros_aplicados": {
+                "search": search,
+                "turma_id": turma_id,
+                "status": status_aluno
+            },
+            "excluidos": excluidos
+        }
+    except SQLAlchemyError as e:
+        logger.error(f"Erro ao deletar alunos em massa: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "Internal Server Error",
+                "message": "Erro ao deletar alunos do banco de dados"
+            }
+        )
+
 # Endpoint DELETE /alunos/{id}
 @app.delete('/alunos/{id}', status_code=status.HTTP_200_OK)
+@rotas_async.assincrona_se_ativo
 def deletar_aluno(id: int, db: Session = Depends(get_db)):
     """Deletar um aluno por ID"""
     try:
@@ -388,8 +807,12 @@ def deletar_aluno(id: int, db: Session = Depends(get_db)):
             )
         
         # Excluir do banco
+        turma_anterior = aluno_existente.turma_id
         db.delete(aluno_existente)
         db.commit()
+        cache.invalidar(*(["alunos", "ocupacao"] if turma_anterior else ["alunos"]))
+        if turma_anterior:
+            transmissao.notificar([turma_anterior])
         
         # Retornar mensagem de sucesso
         return {
@@ -420,32 +843,31 @@ def deletar_aluno(id: int, db: Session = Depends(get_db)):
         )
 
 # Endpoint GET /turmas
-@app.get('/turmas', status_code=status.HTTP_200_OK)
-def get_turmas(db: Session = Depends(get_db)):
+@app.get('/turmas', status_code=status.HTTP_200_OK, response_model=schemas.ListaTurmas)
+@rotas_async.assincrona_se_ativo
+def get_turmas(
+    fields: Optional[str] = Query(None, description="Campos de cada turma, separados por vírgula (ex.: id,nome)"),
+    db: Session = Depends(get_db)
+):
     """Listar todas as turmas com informações de ocupação"""
     try:
-    # Buscar todas as turmas no banco de dados
-    turmas = db.query(models.Turma).all()
-    
-    # Converter para formato JSON com contagem de alunos
-    turmas_json = []
-    for turma in turmas:
-        # Contar quantos alunos estão matriculados na turma
-        quantidade_alunos = db.query(models.Aluno).filter(models.Aluno.turma_id == turma.id).count()
-        
-        turma_dict = {
-            "id": turma.id,
-            "nome": turma.nome,
-            "capacidade": turma.capacidade,
-            "alunos_matriculados": quantidade_alunos,
-            "vagas_disponíveis": turma.capacidade - quantidade_alunos
-        }
-        turmas_json.append(turma_dict)
-    
-        return {
+        campos = campos_pedidos(fields, crud.CAMPOS_TURMA)
+
+        # Buscar turmas e ocupação (se pedida) em uma única consulta
+        turmas = crud.consulta_turmas(db, campos).order_by(models.Turma.id).all()
+
+        # Converter para formato JSON
+        if campos:
+            turmas_json = [schemas.turma_campos_para_dict(turma, campos) for turma in turmas]
+        else:
+            turmas_json = [schemas.turma_para_dict(turma) for turma in turmas]
+
+        return schemas.resposta_json({
             "total": len(turmas_json),
             "turmas": turmas_json
-        }
+        })
+    except HTTPException:
+        raise  # Re-raise HTTPExceptions (400)
     except SQLAlchemyError as e:
         logger.error(f"Erro ao buscar turmas: {str(e)}")
         raise HTTPException(
@@ -465,6 +887,34 @@ def get_turmas(db: Session = Depends(get_db)):
             }
         )
 
+# Endpoint GET /turmas/stream
+@app.get('/turmas/stream', response_class=StreamingResponse)
+async def transmitir_turmas():
+    """Ocupação das turmas em tempo real (Server-Sent Events): snapshot e depois as mudanças"""
+    return StreamingResponse(
+        transmissao.transmissor.eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Endpoint GET /estatisticas
+@app.get('/estatisticas', status_code=status.HTTP_200_OK, response_model=schemas.Estatisticas)
+@rotas_async.assincrona_se_ativo
+def get_estatisticas(db: Session = Depends(get_db)):
+    """Ativos/inativos, distribuição de idades e taxa de ocupação, geral e por turma"""
+    try:
+        # Lidas do rollup mantido por triggers: custo proporcional ao número de turmas
+        return schemas.resposta_json(estatisticas.calcular_estatisticas(db))
+    except SQLAlchemyError as e:
+        logger.error(f"Erro ao calcular estatísticas: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "Internal Server Error",
+                "message": "Erro ao calcular estatísticas no banco de dados"
+            }
+        )
+
 # Schema Pydantic para criação de turma
 class TurmaCreate(BaseModel):
     nome: str = Field(..., min_length=1, max_length=100, description="Nome da turma (não pode estar vazio)")
@@ -483,7 +933,8 @@ class TurmaCreate(BaseModel):
         return v
 
 # Endpoint POST /turmas
-@app.post('/turmas', status_code=status.HTTP_201_CREATED)
+@app.post('/turmas', status_code=status.HTTP_201_CREATED, response_model=schemas.TurmaSalva)
+@rotas_async.assincrona_se_ativo
 def criar_turma(turma: TurmaCreate, db: Session = Depends(get_db)):
     """Criar uma nova turma"""
     try:
@@ -497,31 +948,37 @@ def criar_turma(turma: TurmaCreate, db: Session = Depends(get_db)):
                     "message": "Já existe uma turma com este nome"
                 }
             )
-    
-    # Criar nova turma
-    nova_turma = models.Turma(
-        nome=turma.nome,
-        capacidade=turma.capacidade
-    )
-    
-    # Salvar no banco
-    db.add(nova_turma)
-    db.commit()
-    db.refresh(nova_turma)  # Para obter o ID gerado
-    
+
+        # Criar nova turma
+        nova_turma = models.Turma(
+            nome=turma.nome,
+            capacidade=turma.capacidade
+        )
+
+        # Salvar no banco
+        db.add(nova_turma)
+        db.commit()
+        cache.invalidar("turmas")
+        db.refresh(nova_turma)  # Para obter o ID gerado
+        transmissao.notificar([nova_turma.id])
+
         # Retornar turma criada
         return {
             "message": "Turma criada com sucesso",
-            "turma": {
-                "id": nova_turma.id,
-                "nome": nova_turma.nome,
-                "capacidade": nova_turma.capacidade,
-                "alunos_matriculados": 0,
-                "vagas_disponíveis": nova_turma.capacidade
-            }
+            "turma": schemas.turma_para_dict(nova_turma)
         }
     except HTTPException:
         raise  # Re-raise HTTPExceptions (400)
+    except IntegrityError:
+        # Outra requisição criou o mesmo nome entre a verificação e o commit (índice único)
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Bad Request",
+                "message": "Já existe uma turma com este nome"
+            }
+        )
     except SQLAlchemyError as e:
         logger.error(f"Erro ao criar turma: {str(e)}")
         db.rollback()
@@ -541,7 +998,13 @@ def criar_turma(turma: TurmaCreate, db: Session = Depends(get_db)):
                 "error": "Internal Server Error",
                 "message": "Erro inesperado ao processar solicitação"
             }
-        )# Schema Pydantic para matrícula
+        )
+
+# Limites da matrícula em lote
+LIMITE_MATRICULAS_LOTE = 1000
+TENTATIVAS_LOTE_OCUPACAO = 3
+
+# Schema Pydantic para matrícula
 class MatriculaCreate(BaseModel):
     aluno_id: int = Field(..., gt=0, description="ID do aluno a ser matriculado")
     turma_id: int = Field(..., gt=0, description="ID da turma para matrícula")
@@ -560,58 +1023,149 @@ class MatriculaCreate(BaseModel):
 
 # Endpoint POST /matriculas
 @app.post('/matriculas')
+@rotas_async.assincrona_se_ativo
 def matricular_aluno(matricula: MatriculaCreate, db: Session = Depends(get_db)):
-    # Validar se aluno existe
-    aluno = db.query(models.Aluno).filter(models.Aluno.id == matricula.aluno_id).first()
-    if not aluno:
-        raise HTTPException(status_code=404, detail="Aluno não encontrado")
-    
-    # Validar se turma existe
-    turma = db.query(models.Turma).filter(models.Turma.id == matricula.turma_id).first()
-    if not turma:
-        raise HTTPException(status_code=404, detail="Turma não encontrada")
-    
-    # Verificar capacidade da turma
-    alunos_matriculados = db.query(models.Aluno).filter(models.Aluno.turma_id == turma.id).count()
-    if alunos_matriculados >= turma.capacidade:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Turma '{turma.nome}' já atingiu sua capacidade máxima ({turma.capacidade} alunos)"
-        )
-    
-    # Verificar se aluno já está matriculado nesta turma
-    if aluno.turma_id == turma.id:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Aluno '{aluno.nome}' já está matriculado na turma '{turma.nome}'"
-        )
-    
-    # Matricular o aluno
-    aluno.turma_id = matricula.turma_id
-    aluno.status = "ativo"  # Alterar status para ativo
-    
-    # Salvar no banco
-    db.commit()
-    db.refresh(aluno)
-    
+    def verificar_matricula(aluno, turma):
+        # Validar se aluno existe
+        if not aluno:
+            raise HTTPException(status_code=404, detail="Aluno não encontrado")
+
+        # Validar se turma existe
+        if not turma:
+            raise HTTPException(status_code=404, detail="Turma não encontrada")
+
+        # Verificar capacidade da turma
+        if turma.alunos_matriculados >= turma.capacidade:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Turma '{turma.nome}' já atingiu sua capacidade máxima ({turma.capacidade} alunos)"
+            )
+
+        # Verificar se aluno já está matriculado nesta turma
+        if aluno.turma_id == turma.id:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Aluno '{aluno.nome}' já está matriculado na turma '{turma.nome}'"
+            )
+
+    def executar_matricula():
+        # Validações rápidas com os dados atuais (turma já com a ocupação)
+        aluno = db.query(models.Aluno.nome, models.Aluno.turma_id).filter(models.Aluno.id == matricula.aluno_id).first()
+        turma = crud.buscar_turma(db, matricula.turma_id)
+        verificar_matricula(aluno, turma)
+
+        # Matricular com UPDATE condicional: capacidade verificada e gravada atomicamente
+        if not crud.matricular(db, matricula.aluno_id, matricula.turma_id):
+            # Outra requisição mudou o cenário entre a leitura e a escrita: reavaliar o motivo
+            db.rollback()
+            aluno = db.query(models.Aluno.nome, models.Aluno.turma_id).filter(models.Aluno.id == matricula.aluno_id).first()
+            turma = crud.buscar_turma(db, matricula.turma_id)
+            verificar_matricula(aluno, turma)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Turma '{turma.nome}' já atingiu sua capacidade máxima ({turma.capacidade} alunos)"
+            )
+
+        # Ocupação após a matrícula, ainda na mesma transação
+        turma_atualizada = crud.buscar_turma(db, matricula.turma_id)
+
+        # Salvar no banco
+        db.commit()
+        return aluno, turma_atualizada
+
+    # Refazer a unidade de trabalho se o SQLite estiver ocupado por outra escrita
+    aluno, turma = database.executar_com_retentativa(db, executar_matricula)
+    cache.invalidar("alunos", "ocupacao")
+    transmissao.notificar([aluno.turma_id, turma.id])  # Turma de origem e de destino
+
     # Retornar sucesso com informações detalhadas
     return {
         "message": "Aluno matriculado com sucesso",
         "detalhes": {
             "aluno": {
-                "id": aluno.id,
+                "id": matricula.aluno_id,
                 "nome": aluno.nome,
-                "status": aluno.status
+                "status": "ativo"
             },
             "turma": {
                 "id": turma.id,
                 "nome": turma.nome,
-                "alunos_matriculados": alunos_matriculados + 1,
-                "vagas_restantes": turma.capacidade - (alunos_matriculados + 1)
+                "alunos_matriculados": turma.alunos_matriculados,
+                "vagas_restantes": turma.capacidade - turma.alunos_matriculados
             }
         }
     }
 
+# Schema Pydantic para matrícula em lote
+class MatriculaLote(BaseModel):
+    matriculas: List[MatriculaCreate] = Field(..., description="Pares aluno_id/turma_id a matricular")
+    modo: str = Field("atomico", description="atomico (tudo ou nada) ou parcial (aplica os itens válidos)")
+
+    @validator('matriculas')
+    def validar_matriculas(cls, v):
+        if not v:
+            raise ValueError('Informe ao menos uma matrícula')
+        if len(v) > LIMITE_MATRICULAS_LOTE:
+            raise ValueError(f'O lote aceita no máximo {LIMITE_MATRICULAS_LOTE} matrículas')
+        return v
+
+    @validator('modo')
+    def validar_modo(cls, v):
+        if v not in ['atomico', 'parcial']:
+            raise ValueError('Modo deve ser "atomico" ou "parcial"')
+        return v
+
+# Endpoint POST /matriculas/batch
+@app.post('/matriculas/batch')
+@rotas_async.assincrona_se_ativo
+def matricular_lote(lote: MatriculaLote, db: Session = Depends(get_db)):
+    """Matricular vários alunos em uma transação (modo atômico ou parcial)"""
+    pares = [(item.aluno_id, item.turma_id) for item in lote.matriculas]
+    atomico = lote.modo == "atomico"
+
+    def executar_lote():
+        # Replanejar se outra matrícula ocupar vagas entre a leitura e a escrita do lote
+        for _ in range(TENTATIVAS_LOTE_OCUPACAO):
+            try:
+                resultados, turmas = crud.matricular_lote(db, pares, atomico)
+                db.commit()
+                return resultados, turmas
+            except crud.OcupacaoAlterada:
+                db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "error": "Conflict",
+                "message": "A ocupação das turmas mudou durante o lote. Tente novamente."
+            }
+        )
+
+    resultados, turmas = database.executar_com_retentativa(db, executar_lote)
+    erros = [resultado for resultado in resultados if resultado["status"] == "erro"]
+    if len(erros) < len(resultados) and not (atomico and erros):
+        cache.invalidar("alunos", "ocupacao")
+        transmissao.notificar()  # Origens e destinos do lote: recarregar todas as turmas
+
+    # No modo atômico qualquer erro cancela o lote inteiro
+    if atomico and erros:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "error": "Bad Request",
+                "message": "Nenhuma matrícula foi aplicada: o lote contém erros",
+                "erros": erros
+            }
+        )
+
+    return {
+        "message": "Matrículas processadas com sucesso" if not erros else "Matrículas processadas parcialmente",
+        "modo": lote.modo,
+        "matriculados": len(resultados) - len(erros),
+        "com_erro": len(erros),
+        "resultados": resultados,
+        "turmas": [schemas.turma_para_dict(turma) for turma in turmas]
+    }
+
 # Configuração para rodar com uvicorn
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,104 @@
+import logging
+import re
+from typing import Optional
+from sqlalchemy import Integer, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Indica se o índice FTS5 de nomes está instalado e pode ser usado nas buscas
+FTS_DISPONIVEL = False
+
+# Tabela FTS5 com conteúdo externo (alunos) e tokenizador que ignora acentos e caixa
+CRIAR_TABELA_FTS = """
+    CREATE VIRTUAL TABLE alunos_fts USING fts5(
+        nome,
+        content='alunos',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+# Triggers que mantêm o índice sincronizado com alunos na mesma transação
+TRIGGERS_FTS = {
+    "trg_alunos_fts_insert": """
+        CREATE TRIGGER trg_alunos_fts_insert AFTER INSERT ON alunos
+        BEGIN
+            INSERT INTO alunos_fts(rowid, nome) VALUES (NEW.id, NEW.nome);
+        END
+    """,
+    "trg_alunos_fts_delete": """
+        CREATE TRIGGER trg_alunos_fts_delete AFTER DELETE ON alunos
+        BEGIN
+            INSERT INTO alunos_fts(alunos_fts, rowid, nome) VALUES ('delete', OLD.id, OLD.nome);
+        END
+    """,
+    "trg_alunos_fts_update": """
+        CREATE TRIGGER trg_alunos_fts_update AFTER UPDATE OF nome ON alunos
+        BEGIN
+            INSERT INTO alunos_fts(alunos_fts, rowid, nome) VALUES ('delete', OLD.id, OLD.nome);
+            INSERT INTO alunos_fts(rowid, nome) VALUES (NEW.id, NEW.nome);
+        END
+    """,
+}
+
+
+def remover_busca(conn):
+    """Remover o índice FTS e seus triggers"""
+    for nome in TRIGGERS_FTS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
+    conn.execute(text("DROP TABLE IF EXISTS alunos_fts"))
+
+
+def reconstruir_busca(conn):
+    """Reconstruir o índice FTS a partir da tabela alunos"""
+    conn.execute(text("INSERT INTO alunos_fts(alunos_fts) VALUES ('rebuild')"))
+
+
+def configurar_busca(engine: Engine, ativo: bool) -> bool:
+    """Instalar o índice FTS5 de nomes (ou removê-lo) e informar se ele pode ser usado"""
+    global FTS_DISPONIVEL
+
+    with engine.begin() as conn:
+        if not ativo:
+            remover_busca(conn)
+            FTS_DISPONIVEL = False
+            return FTS_DISPONIVEL
+
+        existentes = {
+            linha[0] for linha in conn.execute(text("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"))
+        }
+        faltantes = [nome for nome in ["alunos_fts", *TRIGGERS_FTS] if nome not in existentes]
+        if faltantes:
+            try:
+                # Recriar tudo e reindexar, pois o índice pode estar desatualizado
+                remover_busca(conn)
+                conn.execute(text(CRIAR_TABELA_FTS))
+                for sql in TRIGGERS_FTS.values():
+                    conn.execute(text(sql))
+                reconstruir_busca(conn)
+            except OperationalError as e:
+                # SQLite compilado sem FTS5: manter a busca por ILIKE
+                logger.warning(f"FTS5 indisponível, usando busca por ILIKE: {str(e)}")
+                conn.rollback()
+                FTS_DISPONIVEL = False
+                return FTS_DISPONIVEL
+
+    FTS_DISPONIVEL = True
+    return FTS_DISPONIVEL
+
+
+def termo_fts(search: str) -> Optional[str]:
+    """Converter o texto digitado em uma consulta FTS5 de prefixo (todas as palavras)"""
+    palavras = re.findall(r"\w+", search)
+    if not palavras:
+        return None
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def consulta_ids_fts(termo: str):
+    """Subconsulta com os IDs dos alunos cujo nome casa com o termo FTS"""
+    return text(
+        "SELECT rowid FROM alunos_fts WHERE alunos_fts MATCH :termo_fts"
+    ).bindparams(termo_fts=termo).columns(rowid=Integer)
@@ -0,0 +1,196 @@
+"""Cache de respostas das listagens com invalidação nas escritas e ETag/304.
+
+O middleware guarda em memória o corpo das respostas 200 de GET /alunos,
+GET /turmas e GET /estatisticas, por rota + filtros normalizados, com expulsão LRU e TTL. Cada
+rota depende de "recursos" (alunos, turmas, ocupacao) com um contador de
+geração; os endpoints de escrita chamam invalidar() com os recursos que
+alteraram e as entradas geradas antes disso deixam de ser servidas.
+
+As respostas levam ETag (hash do corpo). Um GET condicional (If-None-Match)
+que casa com uma entrada válida recebe 304 sem chegar ao banco.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode
+from . import config
+
+# Rotas cacheáveis e os recursos dos quais cada uma depende
+ROTAS_CACHEAVEIS = {
+    "/alunos": ("alunos",),
+    "/turmas": ("turmas", "ocupacao"),
+    "/estatisticas": ("alunos", "turmas"),
+}
+
+
+@dataclass
+class EntradaCache:
+    corpo: bytes
+    content_type: bytes
+    etag: str
+    geracao: tuple
+    expira_em: float
+
+
+class CacheRespostas:
+    """LRU limitado por quantidade de entradas, com TTL e gerações por recurso"""
+
+    def __init__(self, max_entradas: int, ttl: float):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._geracoes = {}
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.nao_modificados = 0
+        self.invalidacoes = 0
+        self.expulsoes = 0
+
+    def geracao(self, recursos: tuple) -> tuple:
+        """Geração atual dos recursos dos quais uma rota depende"""
+        with self._trava:
+            return tuple(self._geracoes.get(recurso, 0) for recurso in recursos)
+
+    def invalidar(self, *recursos: str):
+        """Marcar recursos como alterados (chamado após o commit das escritas)"""
+        with self._trava:
+            for recurso in recursos:
+                self._geracoes[recurso] = self._geracoes.get(recurso, 0) + 1
+            self.invalidacoes += 1
+
+    def obter(self, chave: str, geracao: tuple):
+        """Entrada válida para a chave, ou None (conta acerto/falha)"""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada.geracao != geracao or entrada.expira_em < time.monotonic():
+                if entrada is not None:
+                    del self._entradas[chave]
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada
+
+    def guardar(self, chave: str, entrada: EntradaCache):
+        with self._trava:
+            self._entradas[chave] = entrada
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.expulsoes += 1
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "nao_modificados": self.nao_modificados,
+                "invalidacoes": self.invalidacoes,
+                "expulsoes": self.expulsoes,
+            }
+
+
+# Cache compartilhado pelo middleware e pelos endpoints de escrita
+cache_respostas = CacheRespostas(config.CACHE_MAX_ENTRADAS, config.CACHE_TTL)
+
+
+def invalidar(*recursos: str):
+    """Invalidar as listagens que dependem dos recursos alterados"""
+    cache_respostas.invalidar(*recursos)
+
+
+def chave_requisicao(caminho: str, query_string: bytes) -> str:
+    """Rota + parâmetros ordenados, ignorando parâmetros vazios"""
+    parametros = sorted(
+        (nome, valor) for nome, valor in parse_qsl(query_string.decode("latin-1")) if valor != ""
+    )
+    return f"{caminho}?{urlencode(parametros)}"
+
+
+def etag_casa(cabecalho: bytes, etag: str) -> bool:
+    """Verificar se o If-None-Match contém a ETag (ou *)"""
+    candidatas = [valor.strip() for valor in cabecalho.decode("latin-1").split(",")]
+    return "*" in candidatas or etag in candidatas or f"W/{etag}" in candidatas
+
+
+class CacheMiddleware:
+    """Middleware ASGI que serve GET /alunos e GET /turmas do cache (com ETag/304)"""
+
+    def __init__(self, app, cache: CacheRespostas = cache_respostas):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in ROTAS_CACHEAVEIS:
+            await self.app(scope, receive, send)
+            return
+
+        chave = chave_requisicao(scope["path"], scope.get("query_string", b""))
+        geracao = self.cache.geracao(ROTAS_CACHEAVEIS[scope["path"]])
+        if_none_match = dict(scope["headers"]).get(b"if-none-match")
+
+        entrada = self.cache.obter(chave, geracao)
+        if entrada is not None:
+            await self.responder(send, entrada, if_none_match, b"HIT")
+            return
+
+        # Falha: executar o endpoint e capturar a resposta completa
+        inicio = None
+        partes = []
+
+        async def capturar(mensagem):
+            nonlocal inicio
+            if mensagem["type"] == "http.response.start":
+                inicio = mensagem
+            elif mensagem["type"] == "http.response.body":
+                partes.append(mensagem.get("body", b""))
+
+        await self.app(scope, receive, capturar)
+
+        corpo = b"".join(partes)
+        if inicio is None or inicio["status"] != 200:
+            # Erros e respostas inesperadas passam sem cache
+            if inicio is not None:
+                await send(inicio)
+            await send({"type": "http.response.body", "body": corpo})
+            return
+
+        cabecalhos = dict(inicio["headers"])
+        entrada = EntradaCache(
+            corpo=corpo,
+            content_type=cabecalhos.get(b"content-type", b"application/json"),
+            etag='"' + hashlib.sha1(corpo).hexdigest()[:20] + '"',
+            geracao=geracao,
+            expira_em=time.monotonic() + self.cache.ttl,
+        )
+        self.cache.guardar(chave, entrada)
+        await self.responder(send, entrada, if_none_match, b"MISS")
+
+    async def responder(self, send, entrada: EntradaCache, if_none_match, status_cache: bytes):
+        cabecalhos = [
+            (b"etag", entrada.etag.encode()),
+            (b"cache-control", b"no-cache"),
+            (b"x-cache", status_cache),
+        ]
+        if if_none_match and etag_casa(if_none_match, entrada.etag):
+            self.cache.nao_modificados += 1
+            await send({"type": "http.response.start", "status": 304, "headers": cabecalhos})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cabecalhos += [
+            (b"content-type", entrada.content_type),
+            (b"content-length", str(len(entrada.corpo)).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": cabecalhos})
+        await send({"type": "http.response.body", "body": entrada.corpo})
@@ -0,0 +1,118 @@
+"""Coalescência (single-flight) de leituras idênticas e simultâneas.
+
+Requisições GET iguais (rota + filtros normalizados, como no cache) que
+chegam enquanto uma delas ainda está no banco esperam essa execução e
+recebem a mesma resposta serializada, em vez de abrir cada uma sua sessão e
+repetir o mesmo SQL. O middleware fica por dentro do cache de respostas:
+quando uma entrada expira ou é invalidada, só uma requisição vai ao banco.
+
+A chave inclui a geração dos recursos da rota (cache.invalidar), então uma
+leitura que chega depois de uma escrita nunca recebe o resultado de uma
+execução iniciada antes dela. Quem espera mais que ESCOLA_COALESCENCIA_ESPERA_MS,
+ou vê a execução líder falhar, executa a própria consulta.
+"""
+import asyncio
+from dataclasses import dataclass
+from . import cache
+from . import config
+
+
+@dataclass
+class RespostaCapturada:
+    inicio: dict
+    corpo: bytes
+
+
+class Coalescedor:
+    """Execuções em andamento por chave e contadores de requisições coalescidas"""
+
+    def __init__(self, espera: float):
+        self.espera = espera
+        self.em_andamento = {}
+        self.lideres = 0
+        self.coalescidas = 0
+        self.esperas_expiradas = 0
+        self.lideres_com_falha = 0
+
+    def estatisticas(self) -> dict:
+        return {
+            "em_andamento": len(self.em_andamento),
+            "espera_maxima_ms": self.espera * 1000,
+            "lideres": self.lideres,
+            "coalescidas": self.coalescidas,
+            "esperas_expiradas": self.esperas_expiradas,
+            "lideres_com_falha": self.lideres_com_falha,
+        }
+
+
+# Compartilhado entre o middleware e o GET /health (um por processo)
+coalescedor = Coalescedor(config.COALESCENCIA_ESPERA_MS / 1000)
+
+
+class CoalescenciaMiddleware:
+    """Middleware ASGI que compartilha uma única execução entre leituras GET idênticas"""
+
+    def __init__(self, app, coalescedor: Coalescedor = coalescedor):
+        self.app = app
+        self.coalescedor = coalescedor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in cache.ROTAS_CACHEAVEIS:
+            await self.app(scope, receive, send)
+            return
+
+        chave = (
+            cache.chave_requisicao(scope["path"], scope.get("query_string", b"")),
+            cache.cache_respostas.geracao(cache.ROTAS_CACHEAVEIS[scope["path"]]),
+        )
+        futuro = self.coalescedor.em_andamento.get(chave)
+        if futuro is not None:
+            await self.seguir(futuro, scope, receive, send)
+            return
+
+        # Líder: executar o endpoint e publicar a resposta para quem chegar enquanto isso
+        futuro = asyncio.get_running_loop().create_future()
+        self.coalescedor.em_andamento[chave] = futuro
+        self.coalescedor.lideres += 1
+        inicio = None
+        partes = []
+
+        async def capturar(mensagem):
+            nonlocal inicio
+            if mensagem["type"] == "http.response.start":
+                inicio = mensagem
+            elif mensagem["type"] == "http.response.body":
+                partes.append(mensagem.get("body", b""))
+
+        try:
+            await self.app(scope, receive, capturar)
+        finally:
+            del self.coalescedor.em_andamento[chave]
+            resposta = RespostaCapturada(inicio, b"".join(partes)) if inicio is not None else None
+            if resposta is None:
+                self.coalescedor.lideres_com_falha += 1
+            # None avisa os seguidores para executarem por conta própria
+            futuro.set_result(resposta)
+
+        if resposta is not None:
+            await self.responder(send, resposta)
+
+    async def seguir(self, futuro: asyncio.Future, scope, receive, send):
+        """Esperar a execução líder (até o limite) ou, sem ela, executar a própria consulta"""
+        try:
+            resposta = await asyncio.wait_for(asyncio.shield(futuro), self.coalescedor.espera)
+        except asyncio.TimeoutError:
+            self.coalescedor.esperas_expiradas += 1
+            resposta = None
+
+        if resposta is None:
+            await self.app(scope, receive, send)
+            return
+        self.coalescedor.coalescidas += 1
+        await self.responder(send, resposta)
+
+    @staticmethod
+    async def responder(send, resposta: RespostaCapturada):
+        # Cópia dos cabeçalhos: os middlewares externos podem alterar a mensagem de cada cliente
+        await send({**resposta.inicio, "headers": list(resposta.inicio.get("headers", []))})
+        await send({"type": "http.response.body", "body": resposta.corpo})
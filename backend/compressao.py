@@ -0,0 +1,153 @@
+"""Compressão das respostas (brotli ou gzip) negociada pelo Accept-Encoding.
+
+Respostas menores que ESCOLA_COMPRESSAO_MINIMO_BYTES, já codificadas ou
+de tipos que não ganham com compressão (SSE, imagens) passam intactas.
+O corpo é comprimido em fluxo, então a exportação em streaming continua
+sem ser carregada inteira na memória. O brotli só é oferecido com o
+pacote instalado (pip install brotli).
+
+A ETag de uma resposta comprimida vira fraca (W/"..."): o conteúdo é o
+mesmo da representação sem compressão e o GET condicional do cache
+continua casando.
+"""
+import zlib
+from . import config
+
+try:
+    import brotli
+except ImportError:  # Dependência opcional: sem ela, só gzip
+    brotli = None
+
+# Tipos de conteúdo comprimidos (prefixos)
+TIPOS_COMPRIMIVEIS = ("application/json", "text/csv", "application/x-ndjson", "text/plain", "text/html")
+
+# Níveis pensados para conteúdo dinâmico: boa taxa sem custo alto de CPU
+NIVEL_GZIP = 5
+QUALIDADE_BROTLI = 4
+
+
+def escolher_codificacao(accept_encoding: str) -> str:
+    """Melhor codificação aceita pelo cliente (br, gzip) ou '' se nenhuma"""
+    aceitas = {}
+    for parte in accept_encoding.lower().split(","):
+        nome, _, parametros = parte.strip().partition(";")
+        peso = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                peso = float(parametros.strip()[2:])
+            except ValueError:
+                peso = 0.0
+        aceitas[nome.strip()] = peso
+    # O "*" só vale para o gzip, e uma codificação citada explicitamente (mesmo com q=0) prevalece sobre ele
+    if brotli is not None and aceitas.get("br", 0) > 0:
+        return "br"
+    if aceitas.get("gzip", aceitas.get("*", 0)) > 0:
+        return "gzip"
+    return ""
+
+
+class Compressor:
+    """Compressão incremental do corpo com gzip ou brotli"""
+
+    def __init__(self, codificacao: str):
+        if codificacao == "br":
+            self._br = brotli.Compressor(quality=QUALIDADE_BROTLI)
+            self._gzip = None
+        else:
+            self._br = None
+            self._gzip = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 31)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        if self._br is not None:
+            return self._br.process(dados)
+        return self._gzip.compress(dados)
+
+    def finalizar(self) -> bytes:
+        if self._br is not None:
+            return self._br.finish()
+        return self._gzip.flush()
+
+    def esvaziar(self) -> bytes:
+        """Emitir o que já foi comprimido (para pedaços de uma resposta em streaming)"""
+        if self._br is not None:
+            return self._br.flush()
+        return self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+
+class CompressaoMiddleware:
+    """Middleware ASGI que comprime respostas acima do tamanho mínimo"""
+
+    def __init__(self, app, minimo_bytes: int = config.COMPRESSAO_MINIMO_BYTES):
+        self.app = app
+        self.minimo_bytes = minimo_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        codificacao = escolher_codificacao(accept_encoding)
+        if not codificacao:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compressor = None
+        intacta = False
+
+        async def enviar(mensagem):
+            nonlocal inicio, compressor, intacta
+            if mensagem["type"] == "http.response.start":
+                cabecalhos = dict(mensagem.get("headers", []))
+                tipo = cabecalhos.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" in cabecalhos
+                    or not tipo.startswith(TIPOS_COMPRIMIVEIS)
+                    or mensagem["status"] in (204, 304)
+                ):
+                    intacta = True
+                    await send(mensagem)
+                else:
+                    inicio = mensagem  # Decidir ao ver o primeiro pedaço do corpo
+                return
+
+            if intacta:
+                await send(mensagem)
+                return
+
+            corpo = mensagem.get("body", b"")
+            mais = mensagem.get("more_body", False)
+
+            if compressor is None:
+                if not mais and len(corpo) < self.minimo_bytes:
+                    # Resposta pequena e completa: não vale a compressão
+                    intacta = True
+                    await send(inicio)
+                    await send(mensagem)
+                    return
+                compressor = Compressor(codificacao)
+                await send(self.cabecalhos_comprimidos(inicio, codificacao))
+
+            comprimido = compressor.comprimir(corpo)
+            if mais:
+                comprimido += compressor.esvaziar()
+            else:
+                comprimido += compressor.finalizar()
+            await send({"type": "http.response.body", "body": comprimido, "more_body": mais})
+
+        await self.app(scope, receive, enviar)
+
+    @staticmethod
+    def cabecalhos_comprimidos(inicio: dict, codificacao: str) -> dict:
+        """Cabeçalhos da resposta comprimida: sem Content-Length, com Vary e ETag fraca"""
+        cabecalhos = []
+        for nome, valor in inicio.get("headers", []):
+            if nome == b"content-length":
+                continue
+            if nome == b"etag" and not valor.startswith(b"W/"):
+                valor = b"W/" + valor
+            cabecalhos.append((nome, valor))
+        cabecalhos.append((b"content-encoding", codificacao.encode()))
+        cabecalhos.append((b"vary", b"Accept-Encoding"))
+        return {**inicio, "headers": cabecalhos}
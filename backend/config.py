@@ -0,0 +1,173 @@
+import os
+from dataclasses import dataclass, replace
+from typing import Optional
+
+
+def texto_bool(valor: str) -> bool:
+    """Interpretar um texto booleano (1/0, true/false, sim/nao)"""
+    return valor.strip().lower() in ("1", "true", "sim", "yes", "on")
+
+
+def env_bool(nome: str, padrao: bool) -> bool:
+    """Ler uma variável de ambiente booleana (1/0, true/false, sim/nao)"""
+    valor = os.getenv(nome)
+    if valor is None:
+        return padrao
+    return texto_bool(valor)
+
+
+# Manter turmas.alunos_matriculados por triggers e usá-lo como fonte da ocupação.
+# Desligado, a ocupação é calculada com um único GROUP BY sobre alunos.
+USAR_CONTADOR_MATRICULAS = env_bool("ESCOLA_CONTADOR_MATRICULAS", True)
+
+# Manter a tabela estatisticas_turmas por triggers e servir GET /estatisticas a partir dela.
+# Desligado, as estatísticas são calculadas com um GROUP BY sobre alunos a cada leitura.
+USAR_ESTATISTICAS = env_bool("ESCOLA_ESTATISTICAS", True)
+
+# Buscar nomes pelo índice FTS5 (prefixo, sem distinção de acentos).
+# Desligado, ou se o SQLite não tiver FTS5, a busca usa ILIKE '%termo%'.
+USAR_BUSCA_FTS = env_bool("ESCOLA_BUSCA_FTS", True)
+
+# Atender os endpoints de alunos/turmas/matrículas com engine assíncrono (aiosqlite)
+# em vez de sessões síncronas no threadpool. Lido apenas na inicialização.
+MODO_ASYNC = env_bool("ESCOLA_MODO_ASYNC", False)
+
+# Cache em memória das listagens GET /alunos e GET /turmas (LRU + TTL, com ETag/304).
+# O cache é por processo: com vários workers, o TTL limita o tempo de dados antigos.
+CACHE_ATIVO = env_bool("ESCOLA_CACHE", True)
+CACHE_MAX_ENTRADAS = int(os.getenv("ESCOLA_CACHE_MAX_ENTRADAS", "256"))
+CACHE_TTL = float(os.getenv("ESCOLA_CACHE_TTL", "30"))
+
+# Coalescer leituras GET idênticas e simultâneas em uma única execução (single-flight).
+# Quem espera mais que o limite (ms) pela execução em andamento consulta por conta própria.
+COALESCENCIA_ATIVA = env_bool("ESCOLA_COALESCENCIA", True)
+COALESCENCIA_ESPERA_MS = float(os.getenv("ESCOLA_COALESCENCIA_ESPERA_MS", "2000"))
+
+# Idempotency-Key em POST /alunos, /turmas e /matriculas: respostas gravadas no banco,
+# expiradas após o TTL (segundos) e limitadas a um número máximo de chaves.
+IDEMPOTENCIA_ATIVA = env_bool("ESCOLA_IDEMPOTENCIA", True)
+IDEMPOTENCIA_TTL = float(os.getenv("ESCOLA_IDEMPOTENCIA_TTL", "86400"))
+IDEMPOTENCIA_MAX_CHAVES = int(os.getenv("ESCOLA_IDEMPOTENCIA_MAX_CHAVES", "10000"))
+
+# Janela (ms) em que as mudanças de ocupação são agrupadas antes de ir para GET /turmas/stream.
+STREAM_JANELA_MS = float(os.getenv("ESCOLA_STREAM_JANELA_MS", "100"))
+
+# Modo de depuração: respostas com X-Query-Count e X-DB-Time (perfilador de SQL).
+DEBUG = env_bool("ESCOLA_DEBUG", False)
+
+# Comandos SQL mais lentos que este limite (ms) vão para o log com o plano de execução (0 desliga).
+LIMITE_CONSULTA_LENTA_MS = float(os.getenv("ESCOLA_CONSULTA_LENTA_MS", "100"))
+
+# Registrar latência por rota, requisições em andamento e uso do pool, expostos em GET /metrics.
+METRICAS_ATIVAS = env_bool("ESCOLA_METRICAS", True)
+
+# Codificar as respostas JSON com orjson (quando instalado) em vez do json padrão.
+JSON_RAPIDO = env_bool("ESCOLA_JSON_RAPIDO", True)
+
+# Comprimir (brotli ou gzip, conforme o Accept-Encoding) respostas a partir deste tamanho.
+COMPRESSAO_ATIVA = env_bool("ESCOLA_COMPRESSAO", True)
+COMPRESSAO_MINIMO_BYTES = int(os.getenv("ESCOLA_COMPRESSAO_MINIMO_BYTES", "1024"))
+
+
+@dataclass(frozen=True)
+class PerfilBanco:
+    """Configuração do engine SQLite: caminho, pool e pragmas aplicados em cada conexão"""
+    caminho: str
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    journal_mode: Optional[str] = None      # None mantém o padrão do SQLite (DELETE)
+    synchronous: Optional[str] = None       # OFF, NORMAL, FULL ou EXTRA
+    busy_timeout_ms: int = 5000
+    cache_size_kib: Optional[int] = None    # Tamanho do cache de páginas por conexão
+    mmap_size: Optional[int] = None         # Bytes lidos via mmap (0 desliga)
+    temp_store: Optional[str] = None        # DEFAULT, FILE ou MEMORY
+    foreign_keys: bool = True               # Validar as chaves estrangeiras (turma_id) no próprio banco
+
+    @property
+    def url(self) -> str:
+        return f"sqlite:///{self.caminho}"
+
+    @property
+    def url_async(self) -> str:
+        return f"sqlite+aiosqlite:///{self.caminho}"
+
+    def pragmas(self) -> list:
+        """Comandos PRAGMA a executar em cada nova conexão"""
+        comandos = [f"PRAGMA busy_timeout = {self.busy_timeout_ms}"]
+        if self.foreign_keys:
+            comandos.append("PRAGMA foreign_keys = ON")
+        if self.journal_mode:
+            comandos.append(f"PRAGMA journal_mode = {self.journal_mode}")
+        if self.synchronous:
+            comandos.append(f"PRAGMA synchronous = {self.synchronous}")
+        if self.cache_size_kib:
+            comandos.append(f"PRAGMA cache_size = -{self.cache_size_kib}")
+        if self.mmap_size is not None:
+            comandos.append(f"PRAGMA mmap_size = {self.mmap_size}")
+        if self.temp_store:
+            comandos.append(f"PRAGMA temp_store = {self.temp_store}")
+        return comandos
+
+
+# Caminho padrão do banco: backend/app.db, independente do diretório atual
+CAMINHO_BANCO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.db")
+
+# Perfis prontos: "padrao" deixa o SQLite como vem (só com foreign_keys ligado); "producao" usa WAL (leitores não
+# bloqueiam o escritor), fsync só nos checkpoints, cache de 64 MiB e mmap de 256 MiB
+PERFIS_BANCO = {
+    "padrao": PerfilBanco(caminho=CAMINHO_BANCO_PADRAO),
+    "producao": PerfilBanco(
+        caminho=CAMINHO_BANCO_PADRAO,
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        busy_timeout_ms=5000,
+        cache_size_kib=64000,
+        mmap_size=268435456,
+        temp_store="MEMORY",
+    ),
+}
+
+
+def carregar_perfil_banco() -> PerfilBanco:
+    """Montar o perfil do banco a partir de ESCOLA_SQLITE_PERFIL e das variáveis específicas"""
+    nome = os.getenv("ESCOLA_SQLITE_PERFIL", "producao")
+    if nome not in PERFIS_BANCO:
+        raise ValueError(f"ESCOLA_SQLITE_PERFIL inválido: {nome} (use {', '.join(PERFIS_BANCO)})")
+    perfil = PERFIS_BANCO[nome]
+
+    # Variáveis de ambiente individuais sobrescrevem o perfil escolhido
+    sobrescritas = {}
+    for campo, variavel, tipo in [
+        ("caminho", "ESCOLA_DB_PATH", str),
+        ("pool_size", "ESCOLA_DB_POOL_SIZE", int),
+        ("max_overflow", "ESCOLA_DB_MAX_OVERFLOW", int),
+        ("pool_timeout", "ESCOLA_DB_POOL_TIMEOUT", float),
+        ("journal_mode", "ESCOLA_SQLITE_JOURNAL_MODE", str),
+        ("synchronous", "ESCOLA_SQLITE_SYNCHRONOUS", str),
+        ("busy_timeout_ms", "ESCOLA_SQLITE_BUSY_TIMEOUT_MS", int),
+        ("cache_size_kib", "ESCOLA_SQLITE_CACHE_SIZE_KIB", int),
+        ("mmap_size", "ESCOLA_SQLITE_MMAP_SIZE", int),
+        ("temp_store", "ESCOLA_SQLITE_TEMP_STORE", str),
+        ("foreign_keys", "ESCOLA_SQLITE_FOREIGN_KEYS", texto_bool),
+    ]:
+        valor = os.getenv(variavel)
+        if valor is not None and valor != "":
+            sobrescritas[campo] = tipo(valor)
+    return replace(perfil, **sobrescritas)
+
+
+# Perfil usado pelo engine da aplicação (database.py)
+PERFIL_BANCO = carregar_perfil_banco()
+
+# Controle de admissão: vagas de execução simultânea de leituras e de escritas (por padrão
+# repartindo as conexões do pool). Sem vaga após a espera máxima (ms), a resposta é 503.
+ADMISSAO_ATIVA = env_bool("ESCOLA_ADMISSAO", True)
+CONEXOES_POOL = PERFIL_BANCO.pool_size + PERFIL_BANCO.max_overflow
+ADMISSAO_ESCRITAS = int(os.getenv("ESCOLA_ADMISSAO_ESCRITAS", str(max(1, CONEXOES_POOL // 4))))
+ADMISSAO_LEITURAS = int(os.getenv("ESCOLA_ADMISSAO_LEITURAS", str(max(1, CONEXOES_POOL - ADMISSAO_ESCRITAS))))
+ADMISSAO_ESPERA_MS = float(os.getenv("ESCOLA_ADMISSAO_ESPERA_MS", "500"))
+
+# Limite de requisições por cliente (IP), em req/s com rajada (balde de tokens); 0 desliga.
+LIMITE_TAXA = float(os.getenv("ESCOLA_LIMITE_TAXA", "0"))
+LIMITE_TAXA_RAJADA = float(os.getenv("ESCOLA_LIMITE_TAXA_RAJADA", str(max(1.0, 2 * LIMITE_TAXA))))
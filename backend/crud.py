@@ -0,0 +1,252 @@
+from typing import Optional
+from sqlalchemy import String, delete, exists, func, literal_column, or_, select, update
+from sqlalchemy.orm import Session, aliased
+from . import models
+from . import config
+from . import busca
+from . import schemas
+
+
+def filtrar_alunos(query, search: Optional[str], turma_id: Optional[int], status: Optional[str]):
+    """Aplicar os filtros da listagem de alunos a uma query"""
+    # Aplicar filtro de busca por nome: índice FTS (prefixo, sem acentos) ou ILIKE
+    if search:
+        termo = busca.termo_fts(search) if busca.FTS_DISPONIVEL else None
+        if termo:
+            query = query.filter(models.Aluno.id.in_(busca.consulta_ids_fts(termo)))
+        else:
+            query = query.filter(models.Aluno.nome.ilike(f"%{search}%"))
+
+    # Aplicar filtro por turma_id
+    if turma_id is not None:
+        query = query.filter(models.Aluno.turma_id == turma_id)
+
+    # Aplicar filtro por status
+    if status:
+        query = query.filter(models.Aluno.status == status)
+
+    return query
+
+
+# Campos que podem ser pedidos em ?fields= na listagem de alunos
+CAMPOS_ALUNO = ("id", "nome", "data_nascimento", "email", "status", "turma_id", "turma_nome")
+
+
+def consulta_alunos(db: Session, campos: Optional[tuple] = None):
+    """Projeção dos alunos com o nome da turma em um único LEFT JOIN (linhas simples, sem objetos ORM).
+
+    Com `campos`, só essas colunas são selecionadas (o id sempre vem, pois
+    ordena e pagina a listagem) e o JOIN com turmas só entra se turma_nome
+    for pedido.
+    """
+    campos = campos or CAMPOS_ALUNO
+    colunas = [models.Aluno.id]
+    for campo in campos:
+        if campo == "turma_nome":
+            colunas.append(models.Turma.nome.label("turma_nome"))
+        elif campo != "id":
+            colunas.append(getattr(models.Aluno, campo))
+    query = db.query(*colunas)
+    if "turma_nome" in campos:
+        query = query.outerjoin(models.Turma, models.Aluno.turma_id == models.Turma.id)
+    return query
+
+
+def atualizar_aluno_parcial(db: Session, aluno_id: int, campos: dict):
+    """Gravar só os campos informados com um único UPDATE ... RETURNING.
+
+    A linha atualizada volta já com o nome da turma (subconsulta no
+    RETURNING), ou None se o aluno não existir. Email repetido e turma
+    inexistente são barrados pelas restrições do banco (IntegrityError).
+    """
+    # Escrita à mão: o SQLAlchemy tira o nome das tabelas das colunas no RETURNING do SQLite
+    turma_nome = literal_column("(SELECT turmas.nome FROM turmas WHERE turmas.id = alunos.turma_id)", String)
+    return db.execute(
+        update(models.Aluno)
+        .where(models.Aluno.id == aluno_id)
+        .values(**campos)
+        .returning(
+            models.Aluno.id,
+            models.Aluno.nome,
+            models.Aluno.data_nascimento,
+            models.Aluno.email,
+            models.Aluno.status,
+            models.Aluno.turma_id,
+            turma_nome.label("turma_nome")
+        )
+        .execution_options(synchronize_session=False)
+    ).first()
+
+
+def contar_alunos(db: Session, search: Optional[str], turma_id: Optional[int], status: Optional[str]) -> int:
+    """Contar os alunos que atendem aos filtros (sem JOIN com turmas)"""
+    query = filtrar_alunos(db.query(func.count(models.Aluno.id)), search, turma_id, status)
+    return query.scalar()
+
+
+def excluir_alunos(db: Session, search: Optional[str], turma_id: Optional[int], status: Optional[str]) -> list:
+    """Excluir os alunos que atendem aos filtros com um único DELETE.
+
+    Retorna o turma_id de cada aluno excluído (RETURNING), que dá a
+    contagem e as turmas com a ocupação alterada. Os triggers do contador,
+    da busca e das estatísticas acompanham cada linha na mesma transação.
+    """
+    query = filtrar_alunos(delete(models.Aluno), search, turma_id, status)
+    return db.execute(
+        query.returning(models.Aluno.turma_id).execution_options(synchronize_session=False)
+    ).scalars().all()
+
+
+def alterar_status_alunos(db: Session, search: Optional[str], turma_id: Optional[int], status: Optional[str], novo_status: str) -> int:
+    """Trocar o status dos alunos filtrados com um único UPDATE (quem já está no novo status fica de fora)"""
+    query = filtrar_alunos(update(models.Aluno), search, turma_id, status)
+    resultado = db.execute(
+        query.where(models.Aluno.status != novo_status)
+        .values(status=novo_status)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
+
+
+def contar_mudancas_status(db: Session, search: Optional[str], turma_id: Optional[int], status: Optional[str], novo_status: str) -> int:
+    """Contar os alunos que alterar_status_alunos mudaria"""
+    query = filtrar_alunos(db.query(func.count(models.Aluno.id)), search, turma_id, status)
+    return query.filter(models.Aluno.status != novo_status).scalar()
+
+
+def buscar_aluno(db: Session, aluno_id: int) -> Optional[dict]:
+    """Buscar um aluno já serializado, com o nome da turma, em uma única consulta"""
+    row = consulta_alunos(db).filter(models.Aluno.id == aluno_id).first()
+    return schemas.aluno_para_dict(row) if row else None
+
+
+# Campos que podem ser pedidos em ?fields= na listagem de turmas
+CAMPOS_TURMA = ("id", "nome", "capacidade", "alunos_matriculados", "vagas_disponíveis")
+
+
+def consulta_turmas(db: Session, campos: Optional[tuple] = None):
+    """Turmas com a ocupação em uma única consulta (contador ou GROUP BY agregado).
+
+    Com `campos`, só as colunas necessárias são selecionadas; a ocupação
+    (e o GROUP BY, sem o contador) só entra se for pedida.
+    """
+    campos = campos or CAMPOS_TURMA
+    colunas = [models.Turma.id]
+    if "nome" in campos:
+        colunas.append(models.Turma.nome)
+    if "capacidade" in campos or "vagas_disponíveis" in campos:
+        colunas.append(models.Turma.capacidade)
+    if "alunos_matriculados" not in campos and "vagas_disponíveis" not in campos:
+        return db.query(*colunas)
+
+    if config.USAR_CONTADOR_MATRICULAS:
+        return db.query(*colunas, models.Turma.alunos_matriculados)
+    return db.query(
+        *colunas,
+        func.count(models.Aluno.id).label("alunos_matriculados")
+    ).outerjoin(models.Aluno, models.Aluno.turma_id == models.Turma.id).group_by(models.Turma.id)
+
+
+def buscar_turma(db: Session, turma_id: int):
+    """Buscar uma turma com a ocupação atual"""
+    return consulta_turmas(db).filter(models.Turma.id == turma_id).first()
+
+
+def matricular(db: Session, aluno_id: int, turma_id: int) -> bool:
+    """Matricular o aluno com um único UPDATE condicional à vaga na turma.
+
+    A verificação da capacidade e a escrita acontecem no mesmo comando, sob o
+    bloqueio de escrita do SQLite, então requisições concorrentes não
+    conseguem ultrapassar a capacidade. Retorna False se nada foi alterado
+    (turma cheia, aluno já matriculado nela ou inexistente).
+    """
+    if config.USAR_CONTADOR_MATRICULAS:
+        ocupacao = models.Turma.alunos_matriculados
+    else:
+        outros = aliased(models.Aluno)
+        ocupacao = select(func.count(outros.id)).where(outros.turma_id == turma_id).scalar_subquery()
+
+    tem_vaga = exists().where(models.Turma.id == turma_id, ocupacao < models.Turma.capacidade)
+    resultado = db.execute(
+        update(models.Aluno)
+        .where(
+            models.Aluno.id == aluno_id,
+            or_(models.Aluno.turma_id.is_(None), models.Aluno.turma_id != turma_id),
+            tem_vaga
+        )
+        .values(turma_id=turma_id, status="ativo")
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount == 1
+
+
+class OcupacaoAlterada(Exception):
+    """A ocupação de alguma turma mudou entre o planejamento e a gravação do lote"""
+
+
+def matricular_lote(db: Session, pares: list, atomico: bool) -> tuple:
+    """Matricular vários (aluno_id, turma_id) em uma única transação.
+
+    Alunos e turmas são resolvidos com uma consulta IN cada e a capacidade é
+    controlada em memória por turma para todo o lote. Depois das escritas, a
+    ocupação das turmas que receberam alunos é comparada uma vez com a
+    planejada (ainda sob o bloqueio de escrita); se outra requisição ocupou
+    vagas no meio tempo, levanta OcupacaoAlterada para que o lote seja
+    replanejado. Turmas já acima da capacidade (PUT, PATCH e importação não a
+    conferem) só recusam os itens destinados a elas. No modo atômico nada é
+    gravado se algum item falhar. Retorna (resultados por item, turmas).
+    A transação fica aberta: o commit é do chamador.
+    """
+    aluno_ids = {aluno_id for aluno_id, _ in pares}
+    turma_ids = {turma_id for _, turma_id in pares}
+    alunos = {
+        row.id: row for row in
+        db.query(models.Aluno.id, models.Aluno.nome, models.Aluno.turma_id).filter(models.Aluno.id.in_(aluno_ids))
+    }
+    turmas = {row.id: row for row in consulta_turmas(db).filter(models.Turma.id.in_(turma_ids))}
+    ocupacao = {turma_id: row.alunos_matriculados for turma_id, row in turmas.items()}
+
+    resultados = []
+    mudancas = []
+    aceitos = set()
+    for indice, (aluno_id, turma_id) in enumerate(pares):
+        aluno = alunos.get(aluno_id)
+        turma = turmas.get(turma_id)
+        erro = None
+        if not aluno:
+            erro = "Aluno não encontrado"
+        elif not turma:
+            erro = "Turma não encontrada"
+        elif aluno_id in aceitos:
+            erro = "Aluno aparece mais de uma vez no lote"
+        elif aluno.turma_id == turma_id:
+            erro = f"Aluno '{aluno.nome}' já está matriculado na turma '{turma.nome}'"
+        elif ocupacao[turma_id] >= turma.capacidade:
+            erro = f"Turma '{turma.nome}' já atingiu sua capacidade máxima ({turma.capacidade} alunos)"
+
+        resultado = {"indice": indice, "aluno_id": aluno_id, "turma_id": turma_id}
+        if erro:
+            resultados.append({**resultado, "status": "erro", "message": erro})
+            continue
+
+        # Reservar a vaga no destino e liberar a da turma de origem (se fizer parte do lote)
+        aceitos.add(aluno_id)
+        ocupacao[turma_id] += 1
+        if aluno.turma_id in ocupacao:
+            ocupacao[aluno.turma_id] -= 1
+        mudancas.append({"id": aluno_id, "turma_id": turma_id, "status": "ativo"})
+        resultados.append({**resultado, "status": "matriculado"})
+
+    falhou = any(resultado["status"] == "erro" for resultado in resultados)
+    if mudancas and not (atomico and falhou):
+        # UPDATE em lote por chave primária (executemany); os triggers ajustam os contadores
+        db.execute(update(models.Aluno), mudancas)
+
+        # Conferir uma única vez se as turmas de destino ficaram com a ocupação planejada
+        destinos = {mudanca["turma_id"] for mudanca in mudancas}
+        atualizadas = consulta_turmas(db).filter(models.Turma.id.in_(turma_ids)).all()
+        if any(turma.id in destinos and turma.alunos_matriculados > ocupacao[turma.id] for turma in atualizadas):
+            raise OcupacaoAlterada()
+        turmas = {row.id: row for row in atualizadas}
+
+    return resultados, [turmas[turma_id] for turma_id in sorted(turmas)]
@@ -1,18 +1,67 @@
-from sqlalchemy import create_engine
+import random
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from . import config
 
-# Configuração do banco de dados SQLite na pasta backend
-SQLALCHEMY_DATABASE_URL = "sqlite:///./backend/app.db"
+# Aplicar os pragmas do perfil em cada nova conexão do engine
+def registrar_pragmas(engine_sync, perfil: config.PerfilBanco):
+    @event.listens_for(engine_sync, "connect")
+    def aplicar_pragmas(conexao_dbapi, registro_conexao):
+        cursor = conexao_dbapi.cursor()
+        try:
+            for pragma in perfil.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+# Parâmetros de conexão e pool comuns aos engines síncrono e assíncrono
+def parametros_engine(perfil: config.PerfilBanco) -> dict:
+    return {
+        "connect_args": {"check_same_thread": False, "timeout": perfil.busy_timeout_ms / 1000},
+        "pool_size": perfil.pool_size,
+        "max_overflow": perfil.max_overflow,
+        "pool_timeout": perfil.pool_timeout
+    }
+
+# Criar o engine a partir de um perfil (caminho, pool e pragmas por conexão)
+def criar_engine(perfil: config.PerfilBanco):
+    novo_engine = create_engine(perfil.url, **parametros_engine(perfil))
+    registrar_pragmas(novo_engine, perfil)
+    return novo_engine
+
+# Criar o engine assíncrono (aiosqlite) com o mesmo perfil do engine síncrono
+def criar_engine_async(perfil: config.PerfilBanco):
+    try:
+        import aiosqlite  # noqa: F401
+        from sqlalchemy.ext.asyncio import create_async_engine
+    except ImportError as e:
+        raise RuntimeError(
+            'O modo assíncrono requer aiosqlite e greenlet (pip install "sqlalchemy[asyncio]" aiosqlite)'
+        ) from e
+
+    novo_engine = create_async_engine(perfil.url_async, **parametros_engine(perfil))
+    registrar_pragmas(novo_engine.sync_engine, perfil)
+    return novo_engine
+
+# Configuração do banco de dados SQLite (ver PerfilBanco em config.py)
+SQLALCHEMY_DATABASE_URL = config.PERFIL_BANCO.url
 
 # Configuração do engine com parâmetros para SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+engine = criar_engine(config.PERFIL_BANCO)
 
 # Configuração da sessão do banco
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine e sessão assíncronos, criados apenas no modo assíncrono (ESCOLA_MODO_ASYNC=1)
+async_engine = None
+AsyncSessionLocal = None
+if config.MODO_ASYNC:
+    async_engine = criar_engine_async(config.PERFIL_BANCO)
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
 # Base para os modelos
 Base = declarative_base()
 
@@ -27,3 +76,52 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Função para obter sessão assíncrona do banco
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Retentativas quando o SQLite está ocupado por outra escrita ("database is locked")
+TENTATIVAS_BANCO_OCUPADO = 5
+ESPERA_INICIAL_BANCO_OCUPADO = 0.02
+
+def banco_ocupado(erro: OperationalError) -> bool:
+    """Indica se o erro é de bloqueio do SQLite (vale a pena tentar de novo)"""
+    mensagem = str(getattr(erro, "orig", erro)).lower()
+    return "database is locked" in mensagem or "database is busy" in mensagem
+
+# Chave em Session.info com a tentativa atual quando o endpoint roda no modo assíncrono
+TENTATIVA_ASYNC = "tentativa_banco_ocupado"
+
+class BancoOcupado(Exception):
+    """Banco ocupado no modo assíncrono: o endpoint deve esperar `espera` segundos e ser refeito"""
+
+    def __init__(self, espera: float, proxima_tentativa: int):
+        super().__init__(espera, proxima_tentativa)
+        self.espera = espera
+        self.proxima_tentativa = proxima_tentativa
+
+def violacao_chave_estrangeira(erro) -> bool:
+    """Indica se o IntegrityError veio de uma chave estrangeira (ex.: turma_id de turma inexistente)"""
+    return "FOREIGN KEY" in str(getattr(erro, "orig", erro))
+
+def executar_com_retentativa(db, operacao, tentativas: int = TENTATIVAS_BANCO_OCUPADO):
+    """Executar uma unidade de trabalho, refazendo-a com backoff se o banco estiver ocupado.
+
+    No modo assíncrono a sessão vem de AsyncSession.run_sync, que roda no
+    event loop: em vez de dormir, levanta BancoOcupado e o gêmeo assíncrono
+    do endpoint (rotas_async) espera com asyncio.sleep e o executa de novo.
+    """
+    tentativa_async = db.info.get(TENTATIVA_ASYNC)
+    for tentativa in range(tentativa_async or 1, tentativas + 1):
+        try:
+            return operacao()
+        except OperationalError as e:
+            db.rollback()
+            if not banco_ocupado(e) or tentativa == tentativas:
+                raise
+            espera = ESPERA_INICIAL_BANCO_OCUPADO * (2 ** (tentativa - 1)) * random.uniform(0.5, 1.5)
+            if tentativa_async is not None:
+                raise BancoOcupado(espera, tentativa + 1)
+            time.sleep(espera)
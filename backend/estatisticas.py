@@ -0,0 +1,169 @@
+"""Estatísticas por turma (ativos/inativos, idades e ocupação) para GET /estatisticas.
+
+A tabela estatisticas_turmas guarda quantos alunos há por (turma, status,
+ano de nascimento). Ela é mantida por triggers na mesma transação das
+escritas em alunos, como o contador de ocupacao.py, então cadastros,
+edições, exclusões, importações e matrículas a atualizam sem código extra
+nos endpoints. A leitura percorre só essa tabela e turmas: o custo cresce
+com o número de turmas, não de alunos. Alunos sem turma ficam em turma_id 0.
+
+As idades são por ano de nascimento (a idade completada no ano corrente):
+a idade exata muda todo dia e não pode ser mantida de forma incremental.
+
+Reconstrução em uma passada (ex.: depois de cargas feitas sem os triggers):
+    python -m backend.estatisticas
+"""
+import time
+from datetime import date
+from sqlalchemy import Integer, cast, func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from . import config
+from . import models
+
+# Chave do rollup de um aluno (NEW ou OLD): turma (0 = sem turma), status e ano de nascimento
+CHAVE_NEW = "COALESCE(NEW.turma_id, 0), NEW.status, CAST(substr(NEW.data_nascimento, 1, 4) AS INTEGER)"
+CHAVE_OLD = "COALESCE(OLD.turma_id, 0), OLD.status, CAST(substr(OLD.data_nascimento, 1, 4) AS INTEGER)"
+
+SOMAR_NEW = f"""
+    INSERT INTO estatisticas_turmas (turma_id, status, ano_nascimento, total) VALUES ({CHAVE_NEW}, 1)
+    ON CONFLICT (turma_id, status, ano_nascimento) DO UPDATE SET total = total + 1;
+"""
+SUBTRAIR_OLD = f"""
+    UPDATE estatisticas_turmas SET total = total - 1
+    WHERE (turma_id, status, ano_nascimento) = ({CHAVE_OLD});
+"""
+
+# Triggers que mantêm estatisticas_turmas na mesma transação da escrita em alunos
+TRIGGERS_ESTATISTICAS = {
+    "trg_alunos_estatisticas_insert": f"""
+        CREATE TRIGGER trg_alunos_estatisticas_insert AFTER INSERT ON alunos
+        BEGIN
+            {SOMAR_NEW}
+        END
+    """,
+    "trg_alunos_estatisticas_delete": f"""
+        CREATE TRIGGER trg_alunos_estatisticas_delete AFTER DELETE ON alunos
+        BEGIN
+            {SUBTRAIR_OLD}
+        END
+    """,
+    "trg_alunos_estatisticas_update": f"""
+        CREATE TRIGGER trg_alunos_estatisticas_update AFTER UPDATE OF turma_id, status, data_nascimento ON alunos
+        WHEN OLD.turma_id IS NOT NEW.turma_id
+            OR OLD.status IS NOT NEW.status
+            OR OLD.data_nascimento IS NOT NEW.data_nascimento
+        BEGIN
+            {SUBTRAIR_OLD}
+            {SOMAR_NEW}
+        END
+    """,
+}
+
+
+def recalcular_estatisticas(conn):
+    """Recalcular estatisticas_turmas a partir da tabela alunos em uma única passada"""
+    conn.execute(text("DELETE FROM estatisticas_turmas"))
+    conn.execute(text(
+        "INSERT INTO estatisticas_turmas (turma_id, status, ano_nascimento, total) "
+        "SELECT COALESCE(turma_id, 0), status, CAST(substr(data_nascimento, 1, 4) AS INTEGER), COUNT(*) "
+        "FROM alunos GROUP BY 1, 2, 3"
+    ))
+
+
+def configurar_estatisticas(engine: Engine, ativo: bool):
+    """Instalar (e ressincronizar) ou remover os triggers do rollup de estatísticas"""
+    # A tabela estatisticas_turmas é criada pelo create_all ou pela migração 3 (migracoes.py)
+    with engine.begin() as conn:
+        existentes = {
+            linha[0] for linha in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))
+        }
+
+        if ativo:
+            faltantes = [nome for nome in TRIGGERS_ESTATISTICAS if nome not in existentes]
+            if faltantes:
+                # Recriar tudo e recalcular, pois o rollup pode estar desatualizado
+                for nome in TRIGGERS_ESTATISTICAS:
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
+                    conn.execute(text(TRIGGERS_ESTATISTICAS[nome]))
+                recalcular_estatisticas(conn)
+        else:
+            for nome in TRIGGERS_ESTATISTICAS:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
+
+
+def consulta_rollup(db: Session):
+    """Linhas (turma_id, status, ano_nascimento, total): da tabela de rollup ou de um GROUP BY sobre alunos"""
+    if config.USAR_ESTATISTICAS:
+        rollup = models.EstatisticaTurma
+        return db.query(rollup.turma_id, rollup.status, rollup.ano_nascimento, rollup.total).filter(rollup.total > 0)
+
+    ano = cast(func.substr(models.Aluno.data_nascimento, 1, 4), Integer)
+    turma_id = func.coalesce(models.Aluno.turma_id, 0)
+    return db.query(
+        turma_id.label("turma_id"),
+        models.Aluno.status,
+        ano.label("ano_nascimento"),
+        func.count().label("total")
+    ).group_by(turma_id, models.Aluno.status, ano)
+
+
+def grupo_vazio() -> dict:
+    return {"total": 0, "por_status": {"ativo": 0, "inativo": 0}, "idades": {}}
+
+
+def acumular(grupo: dict, status: str, idade: int, total: int):
+    grupo["total"] += total
+    grupo["por_status"][status] = grupo["por_status"].get(status, 0) + total
+    chave = str(idade)
+    grupo["idades"][chave] = grupo["idades"].get(chave, 0) + total
+
+
+def ordenar_idades(grupo: dict) -> dict:
+    grupo["idades"] = {chave: grupo["idades"][chave] for chave in sorted(grupo["idades"], key=int)}
+    return grupo
+
+
+def calcular_estatisticas(db: Session) -> dict:
+    """Estatísticas gerais, por turma e dos alunos sem turma (duas consultas, O(turmas))"""
+    ano_atual = date.today().year
+    turmas = db.query(models.Turma.id, models.Turma.nome, models.Turma.capacidade).order_by(models.Turma.id).all()
+    grupos = {turma.id: grupo_vazio() for turma in turmas}
+    sem_turma = grupo_vazio()
+    geral = grupo_vazio()
+
+    for linha in consulta_rollup(db):
+        idade = ano_atual - linha.ano_nascimento
+        acumular(geral, linha.status, idade, linha.total)
+        acumular(grupos.get(linha.turma_id, sem_turma), linha.status, idade, linha.total)
+
+    return {
+        **ordenar_idades(geral),
+        "turmas": [
+            {
+                "turma_id": turma.id,
+                "nome": turma.nome,
+                "capacidade": turma.capacidade,
+                "taxa_ocupacao": round(grupos[turma.id]["total"] / turma.capacidade, 4),
+                **ordenar_idades(grupos[turma.id])
+            }
+            for turma in turmas
+        ],
+        "sem_turma": ordenar_idades(sem_turma)
+    }
+
+
+def main():
+    from . import database, migracoes
+
+    models.Base.metadata.create_all(bind=database.engine)
+    migracoes.executar_migracoes(database.engine)
+    inicio = time.perf_counter()
+    with database.engine.begin() as conn:
+        recalcular_estatisticas(conn)
+        linhas, alunos = conn.execute(text("SELECT COUNT(*), COALESCE(SUM(total), 0) FROM estatisticas_turmas")).one()
+    print(f"✅ Estatísticas reconstruídas: {alunos} alunos em {linhas} grupos ({time.perf_counter() - inicio:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import csv
+import io
+import logging
+from typing import Iterator, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from . import crud
+from . import models
+from . import schemas
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Linhas buscadas por vez do cursor do banco e enviadas por pedaço da resposta
+LINHAS_POR_PEDACO = 1000
+
+# Colunas exportadas (mesmas chaves da listagem GET /alunos)
+COLUNAS_EXPORTACAO = ("id", "nome", "data_nascimento", "email", "status", "turma_id", "turma_nome")
+
+# Tipo de conteúdo de cada formato suportado
+TIPOS_CONTEUDO = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def linhas_csv(linhas: list, cabecalho: bool) -> bytes:
+    """Serializar um pedaço de alunos em CSV (com o cabeçalho no primeiro pedaço)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    if cabecalho:
+        escritor.writerow(COLUNAS_EXPORTACAO)
+    for aluno in linhas:
+        escritor.writerow([
+            "" if aluno[coluna] is None else aluno[coluna] for coluna in COLUNAS_EXPORTACAO
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+def linhas_ndjson(linhas: list) -> bytes:
+    """Serializar um pedaço de alunos em NDJSON (um objeto por linha)"""
+    return b"".join(schemas.json_bytes(aluno) + b"\n" for aluno in linhas)
+
+
+def gerar_exportacao(
+    formato: str,
+    search: Optional[str],
+    turma_id: Optional[int],
+    status: Optional[str],
+) -> Iterator[bytes]:
+    """Gerar o arquivo de exportação em pedaços, lendo o banco com yield_per.
+
+    A sessão é própria do gerador (a dependência get_db fecha a dela antes do
+    corpo da resposta ser enviado) e as linhas são consumidas do cursor aos
+    poucos, então a memória não cresce com o tamanho da tabela e o primeiro
+    pedaço sai antes de a consulta terminar.
+    """
+    db = SessionLocal()
+    try:
+        query = crud.filtrar_alunos(crud.consulta_alunos(db), search, turma_id, status)
+        query = query.order_by(models.Aluno.id).yield_per(LINHAS_POR_PEDACO)
+
+        if formato == "csv":
+            # Cabeçalho enviado mesmo quando nenhum aluno atende aos filtros
+            yield linhas_csv([], cabecalho=True)
+
+        pedaco = []
+        for row in query:
+            pedaco.append(schemas.aluno_para_dict(row))
+            if len(pedaco) >= LINHAS_POR_PEDACO:
+                yield linhas_csv(pedaco, False) if formato == "csv" else linhas_ndjson(pedaco)
+                pedaco = []
+        if pedaco:
+            yield linhas_csv(pedaco, False) if formato == "csv" else linhas_ndjson(pedaco)
+    except SQLAlchemyError as e:
+        # Os cabeçalhos já foram enviados: só resta registrar e interromper o arquivo
+        logger.error(f"Erro ao exportar alunos: {str(e)}")
+        raise
+    finally:
+        db.close()
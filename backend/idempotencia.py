@@ -0,0 +1,225 @@
+"""Chaves de idempotência (cabeçalho Idempotency-Key) para POST /alunos, /turmas e /matriculas.
+
+A primeira requisição com uma chave reserva a chave na tabela
+chaves_idempotencia, executa o endpoint e grava a resposta (status e
+corpo). Repetições com a mesma chave e o mesmo corpo recebem a resposta
+gravada, com Idempotent-Replayed: true, sem passar pelo endpoint: nenhuma
+consulta de validação nem escrita é refeita. Duplicatas simultâneas no
+mesmo processo esperam a primeira execução; em outro worker recebem 409 com
+Retry-After enquanto ela não termina.
+
+Respostas 5xx não são gravadas (a chave é liberada para uma nova tentativa).
+Reusar uma chave com outro corpo ou rota retorna 422. As chaves expiram após
+ESCOLA_IDEMPOTENCIA_TTL segundos e a tabela é limitada a
+ESCOLA_IDEMPOTENCIA_MAX_CHAVES linhas (as mais antigas saem primeiro).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from . import config
+from . import database
+
+# Rotas (POST) que aceitam Idempotency-Key
+ROTAS_IDEMPOTENTES = {"/alunos", "/turmas", "/matriculas"}
+
+# Tamanho máximo da chave enviada pelo cliente
+TAMANHO_MAXIMO_CHAVE = 255
+
+# Prazo de uma reserva sem resposta gravada (ex.: o worker caiu no meio da requisição)
+PRAZO_EM_ANDAMENTO = 60.0
+
+# A limpeza de chaves expiradas e excedentes roda a cada N respostas gravadas
+LIMPEZA_A_CADA = 100
+
+
+def impressao_requisicao(metodo: str, caminho: str, corpo: bytes) -> str:
+    """Hash que identifica a requisição feita com a chave (rota + corpo)"""
+    return hashlib.sha256(f"{metodo} {caminho}\n".encode() + corpo).hexdigest()
+
+
+def reservar(chave: str, impressao: str):
+    """Reservar a chave (None) ou devolver a linha existente e ainda válida"""
+    agora = time.time()
+    with database.engine.begin() as conn:
+        # Insere a reserva, ou toma o lugar de uma chave já expirada
+        reservada = conn.execute(text(
+            "INSERT INTO chaves_idempotencia (chave, impressao, status_code, content_type, corpo, criada_em, expira_em) "
+            "VALUES (:chave, :impressao, NULL, NULL, NULL, :agora, :expira_em) "
+            "ON CONFLICT (chave) DO UPDATE SET impressao = excluded.impressao, status_code = NULL, "
+            "content_type = NULL, corpo = NULL, criada_em = excluded.criada_em, expira_em = excluded.expira_em "
+            "WHERE chaves_idempotencia.expira_em < :agora"
+        ), {"chave": chave, "impressao": impressao, "agora": agora, "expira_em": agora + PRAZO_EM_ANDAMENTO}).rowcount
+        if reservada:
+            return None
+        return conn.execute(text(
+            "SELECT impressao, status_code, content_type, corpo FROM chaves_idempotencia WHERE chave = :chave"
+        ), {"chave": chave}).first()
+
+
+def gravar(chave: str, status_code: int, content_type: str, corpo: bytes, limpar: bool):
+    """Gravar a resposta da chave reservada (e, de tempos em tempos, limpar a tabela)"""
+    agora = time.time()
+    with database.engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE chaves_idempotencia SET status_code = :status_code, content_type = :content_type, "
+            "corpo = :corpo, expira_em = :expira_em WHERE chave = :chave"
+        ), {
+            "chave": chave, "status_code": status_code, "content_type": content_type,
+            "corpo": corpo, "expira_em": agora + config.IDEMPOTENCIA_TTL,
+        })
+        if limpar:
+            conn.execute(text("DELETE FROM chaves_idempotencia WHERE expira_em < :agora"), {"agora": agora})
+            # Limite de tamanho: remover as chaves mais antigas além do máximo
+            conn.execute(text(
+                "DELETE FROM chaves_idempotencia WHERE chave IN ("
+                "SELECT chave FROM chaves_idempotencia ORDER BY criada_em DESC LIMIT -1 OFFSET :maximo)"
+            ), {"maximo": config.IDEMPOTENCIA_MAX_CHAVES})
+
+
+def liberar(chave: str):
+    """Remover a reserva de uma execução que falhou, permitindo nova tentativa"""
+    with database.engine.begin() as conn:
+        conn.execute(text(
+            "DELETE FROM chaves_idempotencia WHERE chave = :chave AND status_code IS NULL"
+        ), {"chave": chave})
+
+
+async def responder_json(send, status_code: int, conteudo: dict, cabecalhos: list = ()):
+    corpo = json.dumps(conteudo, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(corpo)).encode()),
+            *cabecalhos,
+        ],
+    })
+    await send({"type": "http.response.body", "body": corpo})
+
+
+class IdempotenciaMiddleware:
+    """Middleware ASGI que grava e repete as respostas de POSTs com Idempotency-Key"""
+
+    def __init__(self, app):
+        self.app = app
+        # Execuções em andamento neste processo, para duplicatas simultâneas esperarem
+        self.em_andamento = {}
+        self.gravadas = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in ROTAS_IDEMPOTENTES:
+            await self.app(scope, receive, send)
+            return
+        chave = dict(scope["headers"]).get(b"idempotency-key")
+        if chave is None:
+            await self.app(scope, receive, send)
+            return
+
+        chave = chave.decode("latin-1").strip()
+        if not chave or len(chave) > TAMANHO_MAXIMO_CHAVE:
+            await responder_json(send, 400, {
+                "error": "Bad Request",
+                "message": f"Idempotency-Key deve ter entre 1 e {TAMANHO_MAXIMO_CHAVE} caracteres"
+            })
+            return
+
+        # O corpo entra na impressão da requisição e é entregue de novo ao endpoint
+        partes = []
+        while True:
+            mensagem = await receive()
+            partes.append(mensagem.get("body", b""))
+            if not mensagem.get("more_body", False):
+                break
+        corpo = b"".join(partes)
+        impressao = impressao_requisicao(scope["method"], scope["path"], corpo)
+
+        # Duplicata de uma execução em andamento neste processo: esperar por ela
+        anterior = self.em_andamento.get(chave)
+        while anterior is not None:
+            await asyncio.shield(anterior)
+            anterior = self.em_andamento.get(chave)
+
+        futuro = asyncio.get_running_loop().create_future()
+        self.em_andamento[chave] = futuro
+        try:
+            existente = await run_in_threadpool(reservar, chave, impressao)
+            if existente is not None:
+                await self.repetir(send, existente, impressao)
+                return
+            await self.executar(scope, receive, corpo, send, chave)
+        finally:
+            del self.em_andamento[chave]
+            futuro.set_result(None)
+
+    async def executar(self, scope, receive, corpo: bytes, send, chave: str):
+        """Executar o endpoint, gravar a resposta e só então enviá-la ao cliente"""
+        entregue = False
+
+        async def receber():
+            nonlocal entregue
+            if not entregue:
+                entregue = True
+                return {"type": "http.request", "body": corpo, "more_body": False}
+            return await receive()
+
+        inicio = None
+        partes = []
+
+        async def capturar(mensagem):
+            nonlocal inicio
+            if mensagem["type"] == "http.response.start":
+                inicio = mensagem
+            elif mensagem["type"] == "http.response.body":
+                partes.append(mensagem.get("body", b""))
+
+        try:
+            await self.app(scope, receber, capturar)
+        except BaseException:
+            await run_in_threadpool(liberar, chave)
+            raise
+
+        resposta = b"".join(partes)
+        if inicio is None or inicio["status"] >= 500:
+            await run_in_threadpool(liberar, chave)
+        else:
+            self.gravadas += 1
+            content_type = dict(inicio.get("headers", [])).get(b"content-type", b"application/json").decode("latin-1")
+            await run_in_threadpool(
+                gravar, chave, inicio["status"], content_type, resposta, self.gravadas % LIMPEZA_A_CADA == 0
+            )
+
+        if inicio is not None:
+            await send(inicio)
+            await send({"type": "http.response.body", "body": resposta})
+
+    @staticmethod
+    async def repetir(send, existente, impressao: str):
+        """Responder a uma chave já usada: resposta gravada, conflito ou reuso indevido"""
+        if existente.impressao != impressao:
+            await responder_json(send, 422, {
+                "error": "Unprocessable Entity",
+                "message": "Idempotency-Key já usada com outra requisição"
+            })
+            return
+        if existente.status_code is None:
+            await responder_json(send, 409, {
+                "error": "Conflict",
+                "message": "Requisição com esta Idempotency-Key ainda em processamento"
+            }, [(b"retry-after", b"1")])
+            return
+
+        corpo = existente.corpo or b""
+        await send({
+            "type": "http.response.start",
+            "status": existente.status_code,
+            "headers": [
+                (b"content-type", existente.content_type.encode("latin-1")),
+                (b"content-length", str(len(corpo)).encode()),
+                (b"idempotent-replayed", b"true"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": corpo})
@@ -0,0 +1,130 @@
+import csv
+import json
+from typing import AsyncIterator, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import database
+from . import models
+
+# Tamanho padrão e máximo de cada lote (uma transação por lote)
+TAMANHO_LOTE_PADRAO = 500
+TAMANHO_LOTE_MAXIMO = 10000
+
+# Colunas aceitas na importação (mesmos campos de AlunoCreate)
+CAMPOS_ALUNO = ("nome", "data_nascimento", "email", "status", "turma_id")
+
+
+def detectar_formato(content_type: Optional[str], formato: Optional[str]) -> Optional[str]:
+    """Escolher csv ou ndjson pelo parâmetro explícito ou pelo Content-Type"""
+    if formato:
+        return formato.lower() if formato.lower() in ("csv", "ndjson") else None
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type or "json-seq" in content_type:
+        return "ndjson"
+    return None
+
+
+async def ler_linhas(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Quebrar o corpo da requisição em linhas sem carregá-lo inteiro na memória"""
+    resto = b""
+    async for pedaco in stream:
+        resto += pedaco
+        *linhas, resto = resto.split(b"\n")
+        for linha in linhas:
+            yield linha.decode("utf-8-sig").rstrip("\r")
+    if resto:
+        yield resto.decode("utf-8-sig").rstrip("\r")
+
+
+async def ler_registros(stream: AsyncIterator[bytes], formato: str) -> AsyncIterator[tuple]:
+    """Gerar (número da linha, dados ou mensagem de erro) para cada registro do arquivo"""
+    cabecalho = None
+    numero = 0
+    async for linha in ler_linhas(stream):
+        numero += 1
+        if not linha.strip():
+            continue
+
+        if formato == "ndjson":
+            try:
+                dados = json.loads(linha)
+            except ValueError:
+                yield numero, "JSON inválido"
+                continue
+            if not isinstance(dados, dict):
+                yield numero, "Cada linha deve ser um objeto JSON"
+                continue
+            yield numero, dados
+            continue
+
+        # CSV: a primeira linha não vazia é o cabeçalho
+        valores = next(csv.reader([linha]))
+        if cabecalho is None:
+            cabecalho = [coluna.strip() for coluna in valores]
+            continue
+        if len(valores) != len(cabecalho):
+            yield numero, f"Esperadas {len(cabecalho)} colunas, encontradas {len(valores)}"
+            continue
+        # Campos vazios do CSV equivalem a campos não informados
+        yield numero, {coluna: valor for coluna, valor in zip(cabecalho, valores) if valor != ""}
+
+
+def importar_lote(db: Session, lote: list) -> tuple:
+    """Inserir um lote de (linha, AlunoCreate) validados; retorna (inseridos, erros por linha).
+
+    Emails e turmas do lote são verificados com uma consulta IN cada, e as
+    linhas aceitas são gravadas com um único executemany e um commit.
+    """
+    erros = []
+
+    # Verificar emails já existentes e turmas inexistentes com uma consulta cada
+    emails = {aluno.email for _, aluno in lote if aluno.email}
+    turma_ids = {aluno.turma_id for _, aluno in lote if aluno.turma_id is not None}
+    emails_existentes = set()
+    if emails:
+        emails_existentes = {
+            email for (email,) in db.query(models.Aluno.email).filter(models.Aluno.email.in_(emails))
+        }
+    turmas_existentes = set()
+    if turma_ids:
+        turmas_existentes = {
+            turma_id for (turma_id,) in db.query(models.Turma.id).filter(models.Turma.id.in_(turma_ids))
+        }
+
+    linhas_validas = []
+    for numero, aluno in lote:
+        if aluno.email and aluno.email in emails_existentes:
+            erros.append({"linha": numero, "message": "Email inválido ou já existente"})
+            continue
+        if aluno.turma_id is not None and aluno.turma_id not in turmas_existentes:
+            erros.append({"linha": numero, "message": "Turma não encontrada"})
+            continue
+        if aluno.email:
+            emails_existentes.add(aluno.email)  # Duplicado dentro do próprio lote
+        linhas_validas.append((numero, {campo: getattr(aluno, campo) for campo in CAMPOS_ALUNO}))
+
+    if not linhas_validas:
+        return 0, erros
+
+    try:
+        db.execute(insert(models.Aluno), [dados for _, dados in linhas_validas])
+        db.commit()
+        return len(linhas_validas), erros
+    except IntegrityError:
+        # Conflito concorrente (ex.: email inserido ou turma removida por outra requisição): isolar linha a linha
+        db.rollback()
+
+    inseridos = 0
+    for numero, dados in linhas_validas:
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.Aluno), dados)
+            inseridos += 1
+        except IntegrityError as e:
+            mensagem = "Turma não encontrada" if database.violacao_chave_estrangeira(e) else "Email inválido ou já existente"
+            erros.append({"linha": numero, "message": mensagem})
+    db.commit()
+    return inseridos, erros
@@ -0,0 +1,233 @@
+"""Métricas de latência por rota no formato texto do Prometheus (GET /metrics).
+
+O middleware ASGI registra, por rota (template, ex.: /alunos/{id}), método
+e status, um histograma de latência, além de requisições em andamento e
+erros. Do lado do banco, mede quanto tempo cada sessão espera para obter
+uma conexão do pool e quanto tempo fica com ela.
+
+Os contadores não usam trava no caminho quente: cada thread escreve no seu
+próprio shard (o event loop num, cada thread do threadpool noutro) e a
+coleta soma os shards na hora do scrape.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from sqlalchemy import event
+from . import cache
+
+# Limites (em segundos) dos buckets dos histogramas
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Rótulo das requisições que não casaram com nenhuma rota (evita um rótulo por URL)
+ROTA_DESCONHECIDA = "desconhecida"
+
+
+class Histograma:
+    """Contagens por bucket, soma e total de observações"""
+    __slots__ = ("buckets", "soma", "total")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_LATENCIA) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.buckets[bisect_left(BUCKETS_LATENCIA, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class Shard:
+    """Métricas escritas por uma única thread"""
+
+    def __init__(self):
+        self.latencias = defaultdict(Histograma)      # (rota, método, status) -> Histograma
+        self.erros = defaultdict(int)                  # (rota, método, status) -> total
+        self.em_andamento = defaultdict(int)           # método -> requisições em andamento
+        self.esperas_conexao = defaultdict(Histograma)  # engine -> espera para obter a conexão
+        self.conexoes = defaultdict(Histograma)        # engine -> tempo com a conexão
+        self.conexoes_em_uso = defaultdict(int)        # engine -> conexões emprestadas
+
+
+class Metricas:
+    """Registro de métricas com um shard por thread, somados na coleta"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._trava = threading.Lock()  # Só para registrar shards novos
+
+    def shard(self) -> Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = Shard()
+            with self._trava:
+                self._shards.append(shard)
+        return shard
+
+    def somar(self, atributo: str) -> dict:
+        """Somar um atributo de todos os shards"""
+        with self._trava:
+            shards = list(self._shards)
+        total = {}
+        for shard in shards:
+            for chave, valor in list(getattr(shard, atributo).items()):
+                if isinstance(valor, Histograma):
+                    acumulado = total.setdefault(chave, Histograma())
+                    acumulado.buckets = [a + b for a, b in zip(acumulado.buckets, valor.buckets)]
+                    acumulado.soma += valor.soma
+                    acumulado.total += valor.total
+                else:
+                    total[chave] = total.get(chave, 0) + valor
+        return total
+
+
+metricas = Metricas()
+
+
+def rotulos(**valores) -> str:
+    """Formatar rótulos Prometheus escapando aspas, barras e quebras de linha"""
+    partes = []
+    for nome, valor in valores.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{nome}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def linhas_histograma(nome: str, histograma: Histograma, **valores) -> list:
+    """Linhas _bucket (cumulativas), _sum e _count de um histograma"""
+    linhas = []
+    acumulado = 0
+    for limite, quantidade in zip((*BUCKETS_LATENCIA, "+Inf"), histograma.buckets):
+        acumulado += quantidade
+        linhas.append(f"{nome}_bucket{rotulos(**valores, le=limite)} {acumulado}")
+    linhas.append(f"{nome}_sum{rotulos(**valores)} {histograma.soma}")
+    linhas.append(f"{nome}_count{rotulos(**valores)} {histograma.total}")
+    return linhas
+
+
+def exportar_prometheus(registro: Metricas = metricas) -> str:
+    """Gerar o texto de exposição do Prometheus com todas as métricas"""
+    linhas = [
+        "# HELP escola_http_requisicao_segundos Latência das requisições HTTP por rota, método e status",
+        "# TYPE escola_http_requisicao_segundos histogram",
+    ]
+    for (rota, metodo, status), histograma in sorted(registro.somar("latencias").items()):
+        linhas += linhas_histograma("escola_http_requisicao_segundos", histograma, rota=rota, metodo=metodo, status=status)
+
+    linhas += [
+        "# HELP escola_http_erros_total Requisições que terminaram em erro do servidor (5xx ou exceção)",
+        "# TYPE escola_http_erros_total counter",
+    ]
+    for (rota, metodo, status), total in sorted(registro.somar("erros").items()):
+        linhas.append(f"escola_http_erros_total{rotulos(rota=rota, metodo=metodo, status=status)} {total}")
+
+    linhas += [
+        "# HELP escola_http_requisicoes_em_andamento Requisições HTTP sendo atendidas agora",
+        "# TYPE escola_http_requisicoes_em_andamento gauge",
+    ]
+    for metodo, total in sorted(registro.somar("em_andamento").items()):
+        linhas.append(f"escola_http_requisicoes_em_andamento{rotulos(metodo=metodo)} {total}")
+
+    linhas += [
+        "# HELP escola_db_conexao_espera_segundos Espera para obter uma conexão do pool (inclui abrir conexões novas e timeouts)",
+        "# TYPE escola_db_conexao_espera_segundos histogram",
+    ]
+    for engine, histograma in sorted(registro.somar("esperas_conexao").items()):
+        linhas += linhas_histograma("escola_db_conexao_espera_segundos", histograma, engine=engine)
+
+    linhas += [
+        "# HELP escola_db_conexao_emprestada_segundos Tempo entre o checkout e a devolução de cada conexão do pool",
+        "# TYPE escola_db_conexao_emprestada_segundos histogram",
+    ]
+    for engine, histograma in sorted(registro.somar("conexoes").items()):
+        linhas += linhas_histograma("escola_db_conexao_emprestada_segundos", histograma, engine=engine)
+
+    linhas += [
+        "# HELP escola_db_conexoes_em_uso Conexões do pool emprestadas a sessões agora",
+        "# TYPE escola_db_conexoes_em_uso gauge",
+    ]
+    for engine, total in sorted(registro.somar("conexoes_em_uso").items()):
+        linhas.append(f"escola_db_conexoes_em_uso{rotulos(engine=engine)} {total}")
+
+    return "\n".join(linhas) + "\n"
+
+
+def instrumentar_engine(engine_sync, nome: str, registro: Metricas = metricas):
+    """Medir a espera por uma conexão do pool e o tempo que ela fica emprestada (checkout até checkin)"""
+
+    # Não há evento antes do checkout: medir a chamada que toda Connection faz ao pool
+    obter_conexao = engine_sync.raw_connection
+
+    def obter_conexao_medindo():
+        inicio = time.perf_counter()
+        try:
+            return obter_conexao()
+        finally:
+            registro.shard().esperas_conexao[nome].observar(time.perf_counter() - inicio)
+
+    engine_sync.raw_connection = obter_conexao_medindo
+
+    @event.listens_for(engine_sync, "checkout")
+    def ao_emprestar(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["metricas_checkout"] = time.perf_counter()
+        registro.shard().conexoes_em_uso[nome] += 1
+
+    @event.listens_for(engine_sync, "checkin")
+    def ao_devolver(dbapi_connection, connection_record):
+        inicio = connection_record.info.pop("metricas_checkout", None)
+        if inicio is None:
+            return
+        shard = registro.shard()
+        shard.conexoes[nome].observar(time.perf_counter() - inicio)
+        shard.conexoes_em_uso[nome] -= 1
+
+
+class MetricasMiddleware:
+    """Middleware ASGI que mede a latência de cada requisição HTTP"""
+
+    def __init__(self, app, registro: Metricas = metricas):
+        self.app = app
+        self.registro = registro
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        status_resposta = 500
+        inicio = time.perf_counter()
+
+        async def enviar(mensagem):
+            nonlocal status_resposta
+            if mensagem["type"] == "http.response.start":
+                status_resposta = mensagem["status"]
+            await send(mensagem)
+
+        # O middleware roda no event loop: o shard é sempre o da thread do loop
+        shard = self.registro.shard()
+        shard.em_andamento[metodo] += 1
+        try:
+            await self.app(scope, receive, enviar)
+        except Exception:
+            status_resposta = 500
+            raise
+        finally:
+            shard.em_andamento[metodo] -= 1
+            chave = (self.rota(scope, status_resposta), metodo, status_resposta)
+            shard.latencias[chave].observar(time.perf_counter() - inicio)
+            if status_resposta >= 500:
+                shard.erros[chave] += 1
+
+    @staticmethod
+    def rota(scope, status_resposta: int) -> str:
+        """Template da rota atendida (preenchido pelo roteador do Starlette)"""
+        rota = scope.get("route")
+        if rota is not None:
+            return getattr(rota, "path", ROTA_DESCONHECIDA)
+        # Respostas servidas por middleware (ex.: acerto do cache) não passam pelo roteador
+        if status_resposta != 404 and scope["path"] in cache.ROTAS_CACHEAVEIS:
+            return scope["path"]
+        return ROTA_DESCONHECIDA
@@ -0,0 +1,163 @@
+"""Migrações versionadas do banco SQLite.
+
+Cada migração é aplicada uma única vez e registrada em schema_migracoes.
+Bancos novos já nascem no esquema atual (create_all), então as migrações
+precisam ser idempotentes: elas apenas completam bancos antigos.
+
+Uso (atualiza o app.db no lugar e mostra os planos de consulta):
+    python -m backend.migracoes
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Consultas dos caminhos quentes usadas no relatório de planos
+CONSULTAS_QUENTES = {
+    "capacidade em /matriculas": "SELECT COUNT(*) FROM alunos WHERE turma_id = 1",
+    "listagem por turma e status": "SELECT id FROM alunos WHERE turma_id = 1 AND status = 'ativo' ORDER BY id LIMIT 100",
+    "listagem por status": "SELECT id FROM alunos WHERE status = 'ativo' ORDER BY id LIMIT 100",
+    "nome duplicado em POST /turmas": "SELECT id FROM turmas WHERE nome = '6º Ano A'",
+    "ocupação agregada em GET /turmas": (
+        "SELECT turmas.id, COUNT(alunos.id) FROM turmas "
+        "LEFT JOIN alunos ON alunos.turma_id = turmas.id GROUP BY turmas.id"
+    ),
+}
+
+
+def colunas(conn, tabela: str) -> list:
+    """Listar as colunas de uma tabela"""
+    return [linha[1] for linha in conn.execute(text(f"PRAGMA table_info({tabela})"))]
+
+
+def migracao_001_contador_matriculas(conn):
+    """Adicionar turmas.alunos_matriculados (os triggers ficam em ocupacao.py)"""
+    if "alunos_matriculados" not in colunas(conn, "turmas"):
+        conn.execute(text(
+            "ALTER TABLE turmas ADD COLUMN alunos_matriculados INTEGER NOT NULL DEFAULT 0"
+        ))
+        conn.execute(text(
+            "UPDATE turmas SET alunos_matriculados = "
+            "(SELECT COUNT(*) FROM alunos WHERE alunos.turma_id = turmas.id)"
+        ))
+
+
+def migracao_002_indices_filtros(conn):
+    """Índices secundários de turma_id/status em alunos e nome único em turmas"""
+    duplicados = conn.execute(text(
+        "SELECT nome FROM turmas GROUP BY nome HAVING COUNT(*) > 1"
+    )).scalars().all()
+    if duplicados:
+        raise RuntimeError(
+            f"Não é possível criar o índice único em turmas.nome: nomes duplicados {duplicados}"
+        )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_alunos_turma_status ON alunos (turma_id, status)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_alunos_status ON alunos (status)"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_turmas_nome ON turmas (nome)"))
+    conn.execute(text("ANALYZE"))
+
+
+def migracao_003_estatisticas_turmas(conn):
+    """Tabela de rollup de GET /estatisticas (os triggers e o cálculo ficam em estatisticas.py)"""
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS estatisticas_turmas ("
+        "turma_id INTEGER NOT NULL, "
+        "status VARCHAR(20) NOT NULL, "
+        "ano_nascimento INTEGER NOT NULL, "
+        "total INTEGER NOT NULL DEFAULT '0', "
+        "PRIMARY KEY (turma_id, status, ano_nascimento))"
+    ))
+
+
+def migracao_004_chaves_idempotencia(conn):
+    """Tabela das respostas gravadas por Idempotency-Key (idempotencia.py)"""
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS chaves_idempotencia ("
+        "chave VARCHAR(255) NOT NULL PRIMARY KEY, "
+        "impressao VARCHAR(64) NOT NULL, "
+        "status_code INTEGER, "
+        "content_type VARCHAR(100), "
+        "corpo BLOB, "
+        "criada_em FLOAT NOT NULL, "
+        "expira_em FLOAT NOT NULL)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chaves_idempotencia_expira_em ON chaves_idempotencia (expira_em)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chaves_idempotencia_criada_em ON chaves_idempotencia (criada_em)"))
+
+
+# Lista ordenada de migrações: (versão, descrição, função)
+MIGRACOES = [
+    (1, "contador de matrículas em turmas", migracao_001_contador_matriculas),
+    (2, "índices em alunos(turma_id, status), alunos(status) e turmas(nome) único", migracao_002_indices_filtros),
+    (3, "tabela de rollup estatisticas_turmas", migracao_003_estatisticas_turmas),
+    (4, "tabela chaves_idempotencia", migracao_004_chaves_idempotencia),
+]
+
+
+def versao_atual(conn) -> int:
+    """Versão mais recente aplicada ao banco"""
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migracoes ("
+        "versao INTEGER PRIMARY KEY, descricao TEXT NOT NULL, aplicada_em TEXT NOT NULL)"
+    ))
+    return conn.execute(text("SELECT COALESCE(MAX(versao), 0) FROM schema_migracoes")).scalar()
+
+
+def executar_migracoes(engine: Engine) -> list:
+    """Aplicar as migrações pendentes, cada uma na sua transação; retorna as versões aplicadas"""
+    aplicadas = []
+    with engine.begin() as conn:
+        atual = versao_atual(conn)
+
+    for versao, descricao, migracao in MIGRACOES:
+        if versao <= atual:
+            continue
+        with engine.begin() as conn:
+            migracao(conn)
+            conn.execute(
+                text("INSERT INTO schema_migracoes (versao, descricao, aplicada_em) VALUES (:v, :d, :em)"),
+                {"v": versao, "d": descricao, "em": datetime.now().isoformat(timespec="seconds")}
+            )
+        logger.info(f"Migração {versao} aplicada: {descricao}")
+        aplicadas.append(versao)
+    return aplicadas
+
+
+def planos_consultas(engine: Engine) -> dict:
+    """EXPLAIN QUERY PLAN de cada consulta quente"""
+    planos = {}
+    with engine.connect() as conn:
+        for nome, sql in CONSULTAS_QUENTES.items():
+            linhas = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+            planos[nome] = [linha[-1] for linha in linhas]
+    return planos
+
+
+def main():
+    from . import database, models
+
+    models.Base.metadata.create_all(bind=database.engine)
+    antes = planos_consultas(database.engine)
+    aplicadas = executar_migracoes(database.engine)
+    depois = planos_consultas(database.engine)
+
+    if not aplicadas:
+        print("Banco já está na versão mais recente.")
+    for versao, descricao, _ in MIGRACOES:
+        if versao in aplicadas:
+            print(f"✅ Migração {versao}: {descricao}")
+
+    print("\n📊 Planos de consulta:")
+    for nome in CONSULTAS_QUENTES:
+        marcador = "melhorou" if antes[nome] != depois[nome] else "inalterado"
+        print(f"  • {nome} ({marcador})")
+        if antes[nome] != depois[nome]:
+            print(f"      antes:  {' | '.join(antes[nome])}")
+        print(f"      {'depois: ' if antes[nome] != depois[nome] else ''}{' | '.join(depois[nome])}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
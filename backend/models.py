@@ -1,14 +1,20 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from .database import Base
 
 
 class Turma(Base):
     __tablename__ = 'turmas'
+    __table_args__ = (
+        # Nome único (verificação de duplicidade em POST /turmas)
+        Index('ux_turmas_nome', 'nome', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(100), nullable=False)
     capacidade = Column(Integer, nullable=False)
+    # Contador desnormalizado mantido por triggers (ver ocupacao.py)
+    alunos_matriculados = Column(Integer, nullable=False, default=0, server_default='0')
     
     # Relacionamento bidirecional com Aluno
     alunos = relationship("Aluno", back_populates="turma")
@@ -16,6 +22,11 @@ class Turma(Base):
 
 class Aluno(Base):
     __tablename__ = 'alunos'
+    __table_args__ = (
+        # Filtros quentes: capacidade em /matriculas, ocupação e listagens filtradas
+        Index('ix_alunos_turma_status', 'turma_id', 'status'),
+        Index('ix_alunos_status', 'status'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(100), nullable=False)
@@ -27,3 +38,33 @@ class Aluno(Base):
     # Relacionamento bidirecional com Turma
     turma = relationship("Turma", back_populates="alunos")
 
+
+class ChaveIdempotencia(Base):
+    """Resposta gravada de um POST com Idempotency-Key (ver idempotencia.py)"""
+    __tablename__ = 'chaves_idempotencia'
+    __table_args__ = (
+        # Limpeza das chaves expiradas e das mais antigas além do limite
+        Index('ix_chaves_idempotencia_expira_em', 'expira_em'),
+        Index('ix_chaves_idempotencia_criada_em', 'criada_em'),
+    )
+
+    chave = Column(String(255), primary_key=True)
+    impressao = Column(String(64), nullable=False)
+    # Nulos enquanto a primeira execução está em andamento
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String(100), nullable=True)
+    corpo = Column(LargeBinary, nullable=True)
+    criada_em = Column(Float, nullable=False)
+    expira_em = Column(Float, nullable=False)
+
+
+class EstatisticaTurma(Base):
+    """Rollup de alunos por turma, status e ano de nascimento, mantido por triggers (ver estatisticas.py)"""
+    __tablename__ = 'estatisticas_turmas'
+
+    # turma_id 0 agrupa os alunos sem turma
+    turma_id = Column(Integer, primary_key=True, autoincrement=False)
+    status = Column(String(20), primary_key=True)
+    ano_nascimento = Column(Integer, primary_key=True, autoincrement=False)
+    total = Column(Integer, nullable=False, default=0, server_default='0')
+
@@ -0,0 +1,57 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Triggers que mantêm turmas.alunos_matriculados na mesma transação da escrita em alunos
+TRIGGERS_CONTADOR = {
+    "trg_alunos_contador_insert": """
+        CREATE TRIGGER trg_alunos_contador_insert AFTER INSERT ON alunos
+        WHEN NEW.turma_id IS NOT NULL
+        BEGIN
+            UPDATE turmas SET alunos_matriculados = alunos_matriculados + 1 WHERE id = NEW.turma_id;
+        END
+    """,
+    "trg_alunos_contador_delete": """
+        CREATE TRIGGER trg_alunos_contador_delete AFTER DELETE ON alunos
+        WHEN OLD.turma_id IS NOT NULL
+        BEGIN
+            UPDATE turmas SET alunos_matriculados = alunos_matriculados - 1 WHERE id = OLD.turma_id;
+        END
+    """,
+    "trg_alunos_contador_update": """
+        CREATE TRIGGER trg_alunos_contador_update AFTER UPDATE OF turma_id ON alunos
+        WHEN OLD.turma_id IS NOT NEW.turma_id
+        BEGIN
+            UPDATE turmas SET alunos_matriculados = alunos_matriculados - 1 WHERE id = OLD.turma_id;
+            UPDATE turmas SET alunos_matriculados = alunos_matriculados + 1 WHERE id = NEW.turma_id;
+        END
+    """,
+}
+
+
+def recalcular_contador(conn):
+    """Recalcular turmas.alunos_matriculados a partir da tabela alunos"""
+    conn.execute(text(
+        "UPDATE turmas SET alunos_matriculados = "
+        "(SELECT COUNT(*) FROM alunos WHERE alunos.turma_id = turmas.id)"
+    ))
+
+
+def configurar_contador(engine: Engine, ativo: bool):
+    """Instalar (e ressincronizar) ou remover os triggers do contador de matrículas"""
+    # A coluna turmas.alunos_matriculados é criada pela migração 1 (migracoes.py)
+    with engine.begin() as conn:
+        existentes = {
+            linha[0] for linha in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))
+        }
+
+        if ativo:
+            faltantes = [nome for nome in TRIGGERS_CONTADOR if nome not in existentes]
+            if faltantes:
+                # Recriar tudo e recalcular, pois o contador pode estar desatualizado
+                for nome in TRIGGERS_CONTADOR:
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
+                    conn.execute(text(TRIGGERS_CONTADOR[nome]))
+                recalcular_contador(conn)
+        else:
+            for nome in TRIGGERS_CONTADOR:
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {nome}"))
@@ -0,0 +1,145 @@
+"""Perfilador de SQL: consultas e tempo de banco por requisição, log de consultas lentas.
+
+Eventos do engine contam cada comando e o tempo gasto no cursor. A contagem
+é guardada em uma ContextVar aberta pelo middleware em cada requisição; o
+contexto é copiado para o threadpool e para o run_sync do modo assíncrono,
+então os comandos do endpoint caem na contagem da requisição certa.
+
+Com ESCOLA_DEBUG=1 as respostas levam X-Query-Count e X-DB-Time (ms).
+Comandos acima de ESCOLA_CONSULTA_LENTA_MS são registrados no log com o
+EXPLAIN QUERY PLAN.
+
+Orçamento de consultas em testes:
+    with perfilador.orcamento_consultas(2):
+        client.get("/alunos")
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+class ContagemConsultas:
+    """Comandos SQL executados e tempo de banco acumulado"""
+
+    def __init__(self):
+        self.total = 0
+        self.tempo = 0.0
+        self.comandos = []
+
+
+# Contagem da requisição atual (None fora de uma requisição)
+contagem_atual: ContextVar[Optional[ContagemConsultas]] = ContextVar("contagem_consultas", default=None)
+
+# Orçamentos abertos com orcamento_consultas (contam todos os comandos do engine)
+_orcamentos = []
+_trava_orcamentos = threading.Lock()
+
+
+class OrcamentoConsultasExcedido(AssertionError):
+    """O bloco executou mais comandos SQL que o orçamento declarado"""
+
+
+def plano_consulta(conn, statement: str, parameters) -> list:
+    """EXPLAIN QUERY PLAN de um comando, executado na mesma conexão"""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [linha[-1] for linha in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def instrumentar_engine(engine_sync, limite_lento_ms: float = config.LIMITE_CONSULTA_LENTA_MS):
+    """Registrar os eventos que medem cada comando executado no engine"""
+
+    @event.listens_for(engine_sync, "before_cursor_execute")
+    def antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("perfilador_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine_sync, "after_cursor_execute")
+    def depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info["perfilador_inicio"].pop()
+
+        contagem = contagem_atual.get()
+        if contagem is not None:
+            contagem.total += 1
+            contagem.tempo += duracao
+        if _orcamentos:
+            with _trava_orcamentos:
+                for orcamento in _orcamentos:
+                    orcamento.total += 1
+                    orcamento.tempo += duracao
+                    orcamento.comandos.append(statement)
+
+        if 0 < limite_lento_ms <= duracao * 1000:
+            plano = []
+            # DDL e executemany não têm um plano único para mostrar
+            if not executemany and not (context is not None and context.isddl):
+                try:
+                    plano = plano_consulta(conn, statement, parameters)
+                except Exception as e:
+                    plano = [f"EXPLAIN indisponível: {str(e)}"]
+            logger.warning(
+                f"Consulta lenta ({duracao * 1000:.1f} ms): {statement} | parâmetros: {parameters} "
+                f"| plano: {' | '.join(plano)}"
+            )
+
+
+class PerfiladorMiddleware:
+    """Middleware ASGI que abre a contagem de consultas de cada requisição"""
+
+    def __init__(self, app, cabecalhos: bool = config.DEBUG):
+        self.app = app
+        self.cabecalhos = cabecalhos
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        contagem = ContagemConsultas()
+        token = contagem_atual.set(contagem)
+
+        async def enviar(mensagem):
+            if self.cabecalhos and mensagem["type"] == "http.response.start":
+                # Consultas feitas até o início da resposta (o corpo já foi gerado, exceto em streaming)
+                mensagem["headers"] = [
+                    *mensagem.get("headers", []),
+                    (b"x-query-count", str(contagem.total).encode()),
+                    (b"x-db-time", f"{contagem.tempo * 1000:.2f}".encode()),
+                ]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            contagem_atual.reset(token)
+
+
+@contextmanager
+def orcamento_consultas(maximo: int):
+    """Falhar (AssertionError) se o bloco executar mais que `maximo` comandos SQL.
+
+    Conta todos os comandos dos engines instrumentados enquanto o bloco roda,
+    inclusive os feitos pela aplicação em outra thread (ex.: TestClient).
+    """
+    orcamento = ContagemConsultas()
+    with _trava_orcamentos:
+        _orcamentos.append(orcamento)
+    try:
+        yield orcamento
+    finally:
+        with _trava_orcamentos:
+            _orcamentos.remove(orcamento)
+    if orcamento.total > maximo:
+        comandos = "\n".join(f"  {numero}. {comando}" for numero, comando in enumerate(orcamento.comandos, 1))
+        raise OrcamentoConsultasExcedido(
+            f"Esperado no máximo {maximo} comandos SQL, executados {orcamento.total}:\n{comandos}"
+        )
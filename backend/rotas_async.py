@@ -0,0 +1,51 @@
+"""Versões assíncronas dos endpoints (ESCOLA_MODO_ASYNC=1).
+
+Cada endpoint síncrono decorado com assincrona_se_ativo ganha, no modo
+assíncrono, um gêmeo `async def` que recebe uma AsyncSession (aiosqlite)
+e executa a mesma lógica com AsyncSession.run_sync. A E/S do banco passa a
+ser aguardada no event loop em vez de ocupar uma thread do threadpool, e
+as regras de negócio continuam escritas uma única vez. As esperas entre
+retentativas com o banco ocupado (database.executar_com_retentativa)
+também são aguardadas com asyncio.sleep.
+"""
+import asyncio
+import inspect
+from fastapi import Depends
+from . import config
+from . import database
+
+
+def versao_async(handler):
+    """Criar o gêmeo assíncrono de um endpoint síncrono que recebe `db: Session`"""
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    assinatura = inspect.signature(handler)
+    parametros = [
+        parametro.replace(default=Depends(database.get_async_db), annotation=AsyncSession)
+        if parametro.name == "db" else parametro
+        for parametro in assinatura.parameters.values()
+    ]
+
+    async def endpoint_async(*args, **kwargs):
+        db = kwargs.pop("db")
+        db.info[database.TENTATIVA_ASYNC] = 1
+        while True:
+            try:
+                return await db.run_sync(lambda sessao: handler(*args, db=sessao, **kwargs))
+            except database.BancoOcupado as ocupado:
+                # Backoff do banco ocupado sem bloquear o event loop; a transação já foi desfeita
+                db.info[database.TENTATIVA_ASYNC] = ocupado.proxima_tentativa
+                await asyncio.sleep(ocupado.espera)
+
+    endpoint_async.__name__ = handler.__name__
+    endpoint_async.__qualname__ = handler.__qualname__
+    endpoint_async.__doc__ = handler.__doc__
+    endpoint_async.__signature__ = assinatura.replace(parameters=parametros)
+    return endpoint_async
+
+
+def assincrona_se_ativo(handler):
+    """Decorador: usa a versão assíncrona do endpoint quando o modo assíncrono está ligado"""
+    if config.MODO_ASYNC:
+        return versao_async(handler)
+    return handler
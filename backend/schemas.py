@@ -0,0 +1,174 @@
+"""Schemas de resposta e serializadores compartilhados pelos endpoints.
+
+As linhas das projeções de crud.py viram dicionários com tipos JSON nativos
+em aluno_para_dict/turma_para_dict, e os schemas Pydantic abaixo descrevem
+esse formato no OpenAPI. As listagens devolvem resposta_json(...) pronta:
+o FastAPI entrega a Response sem passar o conteúdo pelo jsonable_encoder
+nem validar o response_model, que serve apenas de documentação.
+
+Com o orjson instalado (pip install orjson) e ESCOLA_JSON_RAPIDO ligado,
+RespostaJSONRapida é a classe de resposta padrão da aplicação.
+"""
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from . import config
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional: sem ela, usa o json da biblioteca padrão
+    orjson = None
+
+
+class AlunoSchema(BaseModel):
+    id: int
+    nome: str
+    data_nascimento: date
+    email: Optional[str] = None
+    status: str
+    turma_id: Optional[int] = None
+    turma_nome: Optional[str] = None
+
+
+class TurmaSchema(BaseModel):
+    id: int
+    nome: str
+    capacidade: int
+    alunos_matriculados: int
+    vagas_disponíveis: int
+
+
+# Itens das listagens: com ?fields= só os campos pedidos vêm na resposta, os demais são omitidos
+class AlunoCampos(BaseModel):
+    id: Optional[int] = None
+    nome: Optional[str] = None
+    data_nascimento: Optional[date] = None
+    email: Optional[str] = None
+    status: Optional[str] = None
+    turma_id: Optional[int] = None
+    turma_nome: Optional[str] = None
+
+
+class TurmaCampos(BaseModel):
+    id: Optional[int] = None
+    nome: Optional[str] = None
+    capacidade: Optional[int] = None
+    alunos_matriculados: Optional[int] = None
+    vagas_disponíveis: Optional[int] = None
+
+
+class FiltrosAlunos(BaseModel):
+    search: Optional[str] = None
+    turma_id: Optional[int] = None
+    status: Optional[str] = None
+
+
+class ListaAlunos(BaseModel):
+    total: Optional[int] = None
+    limite: int
+    proximo_cursor: Optional[str] = None
+    filtros_aplicados: FiltrosAlunos
+    alunos: List[AlunoCampos]
+
+
+class AlunoSalvo(BaseModel):
+    message: str
+    aluno: AlunoSchema
+
+
+class ListaTurmas(BaseModel):
+    total: int
+    turmas: List[TurmaCampos]
+
+
+class TurmaSalva(BaseModel):
+    message: str
+    turma: TurmaSchema
+
+
+class GrupoEstatisticas(BaseModel):
+    total: int
+    por_status: Dict[str, int]
+    idades: Dict[str, int]
+
+
+class EstatisticasTurma(GrupoEstatisticas):
+    turma_id: int
+    nome: str
+    capacidade: int
+    taxa_ocupacao: float
+
+
+class Estatisticas(GrupoEstatisticas):
+    turmas: List[EstatisticasTurma]
+    sem_turma: GrupoEstatisticas
+
+
+def aluno_para_dict(row) -> dict:
+    """Converter uma linha da projeção de alunos para o formato JSON da API"""
+    return {
+        "id": row.id,
+        "nome": row.nome,
+        "data_nascimento": row.data_nascimento.isoformat() if row.data_nascimento else None,
+        "email": row.email,
+        "status": row.status,
+        "turma_id": row.turma_id,
+        "turma_nome": row.turma_nome
+    }
+
+
+def turma_para_dict(row) -> dict:
+    """Converter uma linha da consulta de turmas para o formato JSON da API"""
+    return {
+        "id": row.id,
+        "nome": row.nome,
+        "capacidade": row.capacidade,
+        "alunos_matriculados": row.alunos_matriculados,
+        "vagas_disponíveis": row.capacidade - row.alunos_matriculados
+    }
+
+
+def aluno_campos_para_dict(row, campos: tuple) -> dict:
+    """Serializar só os campos pedidos em ?fields= de uma linha da projeção de alunos"""
+    dados = {}
+    for campo in campos:
+        valor = getattr(row, campo)
+        dados[campo] = valor.isoformat() if campo == "data_nascimento" and valor else valor
+    return dados
+
+
+def turma_campos_para_dict(row, campos: tuple) -> dict:
+    """Serializar só os campos pedidos em ?fields= de uma linha da consulta de turmas"""
+    dados = {}
+    for campo in campos:
+        if campo == "vagas_disponíveis":
+            dados[campo] = row.capacidade - row.alunos_matriculados
+        else:
+            dados[campo] = getattr(row, campo)
+    return dados
+
+
+class RespostaJSONRapida(JSONResponse):
+    """JSONResponse codificada com orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+# Classe de resposta padrão da aplicação
+JSON_RAPIDO_ATIVO = config.JSON_RAPIDO and orjson is not None
+ClasseResposta = RespostaJSONRapida if JSON_RAPIDO_ATIVO else JSONResponse
+
+
+def resposta_json(conteudo: dict, status_code: int = 200) -> JSONResponse:
+    """Resposta já serializada para conteúdo montado pelos serializadores (só tipos JSON nativos)"""
+    return ClasseResposta(conteudo, status_code=status_code)
+
+
+def json_bytes(conteudo: Any) -> bytes:
+    """Codificar um valor JSON nativo com a mesma biblioteca das respostas"""
+    if JSON_RAPIDO_ATIVO:
+        return orjson.dumps(conteudo)
+    return json.dumps(conteudo, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
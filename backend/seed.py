@@ -1,18 +1,85 @@
+"""Popular o banco: exemplo fixo (padrão) ou gerador sintético para planejamento de capacidade.
+
+Uso:
+	python -m backend.seed
+	python -m backend.seed sintetico --turmas 2000 --alunos-por-turma 500 --semente 42 \
+		--proporcao-sem-email 0.2 --proporcao-inativos 0.3
+"""
+import argparse
+import random
+import time
+from datetime import date
+from sqlalchemy import func, insert, text
+from . import busca
+from . import config
 from . import database
+from . import estatisticas
+from . import migracoes
 from . import models
-from datetime import date
+from . import ocupacao
 
+# Linhas por INSERT em lote e por transação no modo sintético
+LINHAS_POR_LOTE = 50000
 
-def seed():
-	# Garantir que as tabelas existam
+PRIMEIROS_NOMES = [
+	"Ana", "Bruno", "Carlos", "Diana", "Eduardo", "Fernanda", "Gabriel", "Helena", "Igor", "Júlia",
+	"Kaique", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Tiago", "Vitória",
+]
+SOBRENOMES = [
+	"Silva", "Costa", "Santos", "Oliveira", "Lima", "Rocha", "Torres", "Martins", "Pereira", "Andrade",
+	"Ferreira", "Mendes", "Vieira", "Cardoso", "Ribeiro", "Araújo", "Gonçalves", "Conceição", "Simões", "Brandão",
+]
+
+
+def preparar_esquema():
+	"""Garantir tabelas e migrações e tirar os triggers da frente da carga"""
 	models.Base.metadata.create_all(bind=database.engine)
-	
+	migracoes.executar_migracoes(database.engine)
+	# Sem triggers, a limpeza e os INSERTs não atualizam contador e índice FTS linha a linha
+	ocupacao.configurar_contador(database.engine, False)
+	busca.configurar_busca(database.engine, False)
+	estatisticas.configurar_estatisticas(database.engine, False)
+
+
+def restaurar_derivados():
+	"""Reinstalar os triggers, recalculando o contador e as estatísticas e reconstruindo o índice FTS"""
+	ocupacao.configurar_contador(database.engine, config.USAR_CONTADOR_MATRICULAS)
+	busca.configurar_busca(database.engine, config.USAR_BUSCA_FTS)
+	estatisticas.configurar_estatisticas(database.engine, config.USAR_ESTATISTICAS)
+
+
+def limpar_dados():
+	with database.engine.begin() as conn:
+		conn.execute(text("DELETE FROM alunos"))
+		conn.execute(text("DELETE FROM turmas"))
+
+
+def imprimir_distribuicao(limite: int = 10):
+	"""Ocupação das primeiras turmas com um único GROUP BY"""
+	db = database.SessionLocal()
+	try:
+		linhas = (
+			db.query(models.Turma.nome, models.Turma.capacidade, func.count(models.Aluno.id))
+			.outerjoin(models.Aluno, models.Aluno.turma_id == models.Turma.id)
+			.group_by(models.Turma.id)
+			.order_by(models.Turma.id)
+			.limit(limite)
+			.all()
+		)
+	finally:
+		db.close()
+	print("\n📊 Distribuição por turma:")
+	for nome, capacidade, total in linhas:
+		print(f"  • {nome}: {total} alunos (capacidade: {capacidade})")
+
+
+def seed():
+	"""Inserir o conjunto fixo de 5 turmas e 15 alunos de exemplo"""
+	preparar_esquema()
+	limpar_dados()
+
 	db = database.SessionLocal()
 	try:
-		# Limpar dados existentes
-		db.query(models.Aluno).delete()
-		db.query(models.Turma).delete()
-		
 		# Inserir 5 turmas de exemplo
 		turmas = [
 			models.Turma(nome='6º Ano A', capacidade=25),
@@ -23,59 +90,155 @@ def seed():
 		]
 		db.add_all(turmas)
 		db.flush()  # Para obter os IDs das turmas
-		
+
 		# Inserir 15 alunos de exemplo
 		alunos = [
 			# 6º Ano A
 			models.Aluno(nome='Ana Silva', data_nascimento=date(2010, 3, 15), email='ana.silva@email.com', status='ativo', turma_id=turmas[0].id),
 			models.Aluno(nome='Bruno Costa', data_nascimento=date(2010, 7, 22), email='bruno.costa@email.com', status='ativo', turma_id=turmas[0].id),
 			models.Aluno(nome='Carlos Santos', data_nascimento=date(2010, 11, 8), email='carlos.santos@email.com', status='inativo', turma_id=turmas[0].id),
-			
+
 			# 7º Ano A
 			models.Aluno(nome='Diana Oliveira', data_nascimento=date(2009, 1, 30), email='diana.oliveira@email.com', status='ativo', turma_id=turmas[1].id),
 			models.Aluno(nome='Eduardo Lima', data_nascimento=date(2009, 9, 12), email='eduardo.lima@email.com', status='ativo', turma_id=turmas[1].id),
 			models.Aluno(nome='Fernanda Rocha', data_nascimento=date(2009, 5, 18), email='fernanda.rocha@email.com', status='ativo', turma_id=turmas[1].id),
-			
+
 			# 8º Ano A
 			models.Aluno(nome='Gabriel Torres', data_nascimento=date(2008, 12, 3), email='gabriel.torres@email.com', status='ativo', turma_id=turmas[2].id),
 			models.Aluno(nome='Helena Martins', data_nascimento=date(2008, 4, 25), email='helena.martins@email.com', status='inativo', turma_id=turmas[2].id),
 			models.Aluno(nome='Igor Pereira', data_nascimento=date(2008, 8, 14), email='igor.pereira@email.com', status='ativo', turma_id=turmas[2].id),
 			models.Aluno(nome='Júlia Andrade', data_nascimento=date(2008, 6, 7), status='ativo', turma_id=turmas[2].id),  # sem email
-			
+
 			# 9º Ano A
 			models.Aluno(nome='Kaique Ferreira', data_nascimento=date(2007, 2, 20), email='kaique.ferreira@email.com', status='ativo', turma_id=turmas[3].id),
 			models.Aluno(nome='Larissa Mendes', data_nascimento=date(2007, 10, 11), email='larissa.mendes@email.com', status='ativo', turma_id=turmas[3].id),
 			models.Aluno(nome='Marcos Vieira', data_nascimento=date(2007, 7, 29), status='inativo', turma_id=turmas[3].id),  # sem email
-			
+
 			# 1º Ano Médio
 			models.Aluno(nome='Natália Cardoso', data_nascimento=date(2006, 3, 16), email='natalia.cardoso@email.com', status='ativo', turma_id=turmas[4].id),
 			models.Aluno(nome='Otávio Ribeiro', data_nascimento=date(2006, 11, 2), email='otavio.ribeiro@email.com', status='ativo', turma_id=turmas[4].id),
 		]
 		db.add_all(alunos)
-		
+
 		# Salvar no banco
 		db.commit()
 		print("✅ Dados inseridos com sucesso no banco app.db!")
 		print(f"📚 Turmas criadas: {len(turmas)}")
 		print(f"👨‍🎓 Alunos criados: {len(alunos)}")
-		
-		# Mostrar estatísticas por turma
-		print("\n📊 Distribuição por turma:")
-		for turma in turmas:
-			count = db.query(models.Aluno).filter(models.Aluno.turma_id == turma.id).count()
-			print(f"  • {turma.nome}: {count} alunos (capacidade: {turma.capacidade})")
-		
 	except Exception as e:
 		print(f"❌ Erro ao inserir dados: {e}")
 		db.rollback()
 	finally:
 		db.close()
 
+	restaurar_derivados()
+	imprimir_distribuicao()
 
-if __name__ == '__main__':
-	seed()
 
+def gerar_alunos(turmas: int, alunos_por_turma: int, proporcao_sem_email: float, proporcao_inativos: float, semente: int):
+	"""Gerar tuplas (nome, data_nascimento, email, status, turma_id) em lotes, de forma determinística pela semente"""
+	aleatorio = random.Random(semente)
+	nascimento_minimo = date(2006, 1, 1).toordinal()
+	dias_nascimento = date(2018, 12, 31).toordinal() - nascimento_minimo
+	# Datas já no formato ISO gravado pelo tipo Date do SQLAlchemy no SQLite
+	datas = [date.fromordinal(nascimento_minimo + dia).isoformat() for dia in range(dias_nascimento)]
+	lote = []
+	numero = 0
+	for turma_id in range(1, turmas + 1):
+		# Sorteios da turma inteira de uma vez (mesma sequência para a mesma semente)
+		primeiros = aleatorio.choices(PRIMEIROS_NOMES, k=alunos_por_turma)
+		sobrenomes = aleatorio.choices(SOBRENOMES, k=2 * alunos_por_turma)
+		nascimentos = aleatorio.choices(datas, k=alunos_por_turma)
+		for i in range(alunos_por_turma):
+			numero += 1
+			lote.append((
+				f"{primeiros[i]} {sobrenomes[2 * i]} {sobrenomes[2 * i + 1]}",
+				nascimentos[i],
+				# O número do aluno garante emails únicos
+				None if aleatorio.random() < proporcao_sem_email else f"aluno{numero}@escola.com",
+				"inativo" if aleatorio.random() < proporcao_inativos else "ativo",
+				turma_id,
+			))
+			if len(lote) == LINHAS_POR_LOTE:
+				yield lote
+				lote = []
+	if lote:
+		yield lote
 
-if __name__ == '__main__':
-	seed()
 
+def seed_sintetico(turmas: int, alunos_por_turma: int, capacidade: int, proporcao_sem_email: float, proporcao_inativos: float, semente: int):
+	"""Substituir os dados por turmas e alunos sintéticos com INSERTs em lote e transações por bloco"""
+	inicio = time.perf_counter()
+	preparar_esquema()
+	limpar_dados()
+
+	tabela_alunos = models.Aluno.__table__
+	with database.engine.begin() as conn:
+		conn.execute(insert(models.Turma), [
+			{"id": i, "nome": f"Turma {i:05d}", "capacidade": capacidade, "alunos_matriculados": 0}
+			for i in range(1, turmas + 1)
+		])
+		# Índices secundários são recriados no fim (mais rápido que mantê-los linha a linha)
+		for indice in tabela_alunos.indexes:
+			conn.execute(text(f"DROP INDEX IF EXISTS {indice.name}"))
+
+	# INSERT do Core compilado uma vez; as linhas vão como tuplas, sem processamento por linha
+	colunas = ["nome", "data_nascimento", "email", "status", "turma_id"]
+	sql = str(insert(tabela_alunos).compile(dialect=database.engine.dialect, column_keys=colunas))
+	total = 0
+	with database.engine.connect() as conn:
+		# As turmas dos alunos gerados existem por construção: sem checar a chave estrangeira linha a linha
+		conn.exec_driver_sql("PRAGMA foreign_keys = OFF")
+		conn.commit()
+		try:
+			for lote in gerar_alunos(turmas, alunos_por_turma, proporcao_sem_email, proporcao_inativos, semente):
+				# Um executemany e um commit por lote
+				with conn.begin():
+					conn.exec_driver_sql(sql, lote)
+				total += len(lote)
+				print(f"  {total} alunos inseridos ({time.perf_counter() - inicio:.1f}s)")
+		finally:
+			conn.rollback()
+			conn.exec_driver_sql(f"PRAGMA foreign_keys = {'ON' if config.PERFIL_BANCO.foreign_keys else 'OFF'}")
+			conn.commit()
+
+	with database.engine.begin() as conn:
+		for indice in tabela_alunos.indexes:
+			indice.create(conn, checkfirst=True)
+	restaurar_derivados()
+	with database.engine.begin() as conn:
+		conn.execute(text("ANALYZE"))
+
+	print(f"✅ {turmas} turmas e {total} alunos gerados em {time.perf_counter() - inicio:.1f}s (semente {semente})")
+	imprimir_distribuicao()
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("modo", nargs="?", choices=["exemplo", "sintetico"], default="exemplo")
+	parser.add_argument("--turmas", type=int, default=100)
+	parser.add_argument("--alunos-por-turma", type=int, default=30)
+	parser.add_argument("--capacidade", type=int, help="Capacidade de cada turma (padrão: alunos por turma + 20%%)")
+	parser.add_argument("--proporcao-sem-email", type=float, default=0.1)
+	parser.add_argument("--proporcao-inativos", type=float, default=0.15)
+	parser.add_argument("--semente", type=int, default=42)
+	args = parser.parse_args()
+
+	if args.modo == "exemplo":
+		seed()
+		return
+
+	for nome in ("proporcao_sem_email", "proporcao_inativos"):
+		if not 0 <= getattr(args, nome) <= 1:
+			parser.error(f"--{nome.replace('_', '-')} deve estar entre 0 e 1")
+	capacidade = args.capacidade or max(1, round(args.alunos_por_turma * 1.2))
+	if capacidade < args.alunos_por_turma:
+		parser.error("--capacidade não pode ser menor que --alunos-por-turma")
+	seed_sintetico(
+		args.turmas, args.alunos_por_turma, capacidade,
+		args.proporcao_sem_email, args.proporcao_inativos, args.semente
+	)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,174 @@
+"""Transmissão da ocupação das turmas por Server-Sent Events (GET /turmas/stream).
+
+Os endpoints de escrita chamam notificar() depois do commit com as turmas
+afetadas. As notificações de uma janela curta são agrupadas e geram uma
+única consulta de ocupação; o resultado é difundido em memória para todos
+os clientes conectados, então o custo no banco não cresce com o número de
+telas abertas.
+
+Cada cliente guarda só o estado mais recente de cada turma ainda não
+enviada: um cliente lento recebe as mudanças acumuladas de uma vez quando
+voltar a consumir, e a memória por cliente fica limitada ao número de
+turmas (nada é enfileirado indefinidamente).
+"""
+import asyncio
+import logging
+import threading
+from typing import Iterable, Optional
+from fastapi.concurrency import run_in_threadpool
+from . import config
+from . import crud
+from . import models
+from . import schemas
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Intervalo dos comentários de keep-alive enviados a clientes ociosos
+INTERVALO_KEEPALIVE = 15.0
+
+
+def consultar_ocupacao(turma_ids: Optional[set]) -> dict:
+    """Ocupação atual das turmas informadas (ou de todas) em uma única consulta"""
+    db = SessionLocal()
+    try:
+        query = crud.consulta_turmas(db)
+        if turma_ids is not None:
+            query = query.filter(models.Turma.id.in_(turma_ids))
+        return {row.id: schemas.turma_para_dict(row) for row in query}
+    finally:
+        db.close()
+
+
+def evento_sse(evento: str, dados: dict) -> bytes:
+    """Formatar uma mensagem SSE com o nome do evento e os dados em JSON"""
+    return b"event: " + evento.encode() + b"\ndata: " + schemas.json_bytes(dados) + b"\n\n"
+
+
+class Assinante:
+    """Cliente conectado: mudanças pendentes por turma e um sinal de que há novidades"""
+
+    def __init__(self):
+        self.pendentes = {}
+        self.sinal = asyncio.Event()
+
+    def entregar(self, turmas: dict):
+        # Mudanças ainda não enviadas são sobrescritas pelo estado mais novo
+        self.pendentes.update(turmas)
+        self.sinal.set()
+
+
+class Transmissor:
+    """Difusão em memória da ocupação das turmas para os assinantes do stream"""
+
+    def __init__(self, janela: float):
+        self.janela = janela
+        self.assinantes = set()
+        self.estado = {}
+        self._loop = None
+        self._trava = threading.Lock()
+        self._sujas = set()
+        self._todas_sujas = False
+        self._agendado = False
+        self._carga_inicial = None
+
+    def notificar(self, turma_ids: Optional[Iterable[int]] = None):
+        """Marcar turmas com ocupação alterada (None = todas); seguro para qualquer thread"""
+        loop = self._loop
+        if loop is None or not self.assinantes:
+            return  # Ninguém assistindo: nada a fazer
+        with self._trava:
+            if turma_ids is None:
+                self._todas_sujas = True
+            else:
+                self._sujas.update(turma_id for turma_id in turma_ids if turma_id is not None)
+        try:
+            loop.call_soon_threadsafe(self._agendar)
+        except RuntimeError:
+            pass  # Loop encerrado (desligamento do servidor)
+
+    def _agendar(self):
+        # Agrupar as notificações da janela em uma única publicação
+        if not self._agendado:
+            self._agendado = True
+            self._loop.call_later(self.janela, lambda: asyncio.ensure_future(self._publicar()))
+
+    async def _publicar(self):
+        with self._trava:
+            turma_ids = None if self._todas_sujas else set(self._sujas)
+            self._sujas.clear()
+            self._todas_sujas = False
+        try:
+            if turma_ids == set() or not self.assinantes:
+                return
+            atuais = await run_in_threadpool(consultar_ocupacao, turma_ids)
+            mudancas = {
+                turma_id: turma for turma_id, turma in atuais.items() if self.estado.get(turma_id) != turma
+            }
+            if mudancas:
+                self.estado.update(mudancas)
+                for assinante in list(self.assinantes):
+                    assinante.entregar(mudancas)
+        except Exception as e:
+            logger.error(f"Erro ao publicar ocupação das turmas: {str(e)}")
+        finally:
+            self._agendado = False
+            # Notificações que chegaram durante a consulta geram nova publicação
+            if self._sujas or self._todas_sujas:
+                self._agendar()
+
+    async def assinar(self) -> Assinante:
+        """Registrar um cliente; o primeiro carrega o estado de todas as turmas"""
+        self._loop = asyncio.get_running_loop()
+        primeiro = not self.assinantes
+        assinante = Assinante()
+        self.assinantes.add(assinante)
+        if primeiro or self._carga_inicial is not None:
+            # Clientes que chegam durante a carga esperam a mesma consulta
+            if self._carga_inicial is None:
+                self._carga_inicial = asyncio.ensure_future(run_in_threadpool(consultar_ocupacao, None))
+            carga = self._carga_inicial
+            try:
+                carregado = await asyncio.shield(carga)
+            except BaseException:
+                self.cancelar(assinante)
+                raise
+            if self._carga_inicial is carga:
+                self._carga_inicial = None
+                # Publicações feitas durante a carga são mais novas que ela
+                self.estado = {**carregado, **self.estado}
+        return assinante
+
+    def cancelar(self, assinante: Assinante):
+        self.assinantes.discard(assinante)
+        if not self.assinantes:
+            # Sem clientes as notificações são ignoradas, então o estado deixaria de ser confiável
+            self.estado = {}
+
+    async def eventos(self):
+        """Gerador do corpo SSE de um cliente: snapshot inicial e depois as mudanças agrupadas"""
+        assinante = await self.assinar()
+        try:
+            turmas = [self.estado[turma_id] for turma_id in sorted(self.estado)]
+            yield evento_sse("snapshot", {"turmas": turmas})
+            while True:
+                try:
+                    await asyncio.wait_for(assinante.sinal.wait(), INTERVALO_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                assinante.sinal.clear()
+                pendentes, assinante.pendentes = assinante.pendentes, {}
+                if pendentes:
+                    turmas = [pendentes[turma_id] for turma_id in sorted(pendentes)]
+                    yield evento_sse("ocupacao", {"turmas": turmas})
+        finally:
+            self.cancelar(assinante)
+
+
+transmissor = Transmissor(config.STREAM_JANELA_MS / 1000)
+
+
+def notificar(turma_ids: Optional[Iterable[int]] = None):
+    """Avisar o stream de que a ocupação destas turmas (ou de todas, com None) mudou"""
+    transmissor.notificar(turma_ids)
@@ -0,0 +1,88 @@
+"""Benchmark da busca por nome: ILIKE '%termo%' contra o índice FTS5.
+
+Uso:
+    python -m benchmarks.busca_nome --tamanhos 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend import busca, crud, models
+
+PRIMEIROS_NOMES = [
+    "Ana", "Bruno", "Carlos", "Diana", "Eduardo", "Fernanda", "Gabriel", "Helena", "Igor", "Júlia",
+    "Kaique", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Tiago", "Vitória",
+]
+SOBRENOMES = [
+    "Silva", "Costa", "Santos", "Oliveira", "Lima", "Rocha", "Torres", "Martins", "Pereira", "Andrade",
+    "Ferreira", "Mendes", "Vieira", "Cardoso", "Ribeiro", "Araújo", "Gonçalves", "Conceição", "Simões", "Brandão",
+]
+TERMOS = ["jul", "natalia", "silva", "ana costa", "conceição"]
+
+
+def criar_banco(caminho: str, quantidade: int, semente: int = 42):
+    """Criar um banco com a quantidade pedida de alunos e o índice FTS"""
+    engine = create_engine(f"sqlite:///{caminho}")
+    models.Base.metadata.create_all(bind=engine)
+    aleatorio = random.Random(semente)
+    conexao = engine.raw_connection()
+    try:
+        cursor = conexao.cursor()
+        cursor.execute("INSERT INTO turmas (nome, capacidade, alunos_matriculados) VALUES ('Turma', 1000000, 0)")
+        lote = []
+        for i in range(1, quantidade + 1):
+            nome = f"{aleatorio.choice(PRIMEIROS_NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+            lote.append((nome, date(2010, 1, 1).isoformat(), "ativo", 1))
+            if len(lote) == 50000 or i == quantidade:
+                cursor.executemany(
+                    "INSERT INTO alunos (nome, data_nascimento, status, turma_id) VALUES (?, ?, ?, ?)", lote
+                )
+                lote = []
+        conexao.commit()
+    finally:
+        conexao.close()
+    busca.configurar_busca(engine, True)
+    return engine
+
+
+def medir(Session, termo: str, usar_fts: bool, repeticoes: int) -> float:
+    """Mediana (ms) da página de 100 alunos + contagem filtrada pelo termo"""
+    busca.FTS_DISPONIVEL = usar_fts
+    tempos = []
+    db = Session()
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            crud.contar_alunos(db, termo, None, None)
+            crud.filtrar_alunos(crud.consulta_alunos(db), termo, None, None).order_by(models.Aluno.id).limit(100).all()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        db.close()
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'alunos':>10} {'termo':>12} {'ILIKE (ms)':>12} {'FTS5 (ms)':>12} {'ganho':>8}")
+    for quantidade in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            engine = criar_banco(os.path.join(pasta, "busca.db"), quantidade)
+            Session = sessionmaker(bind=engine)
+            for termo in TERMOS:
+                ilike = medir(Session, termo, False, args.repeticoes)
+                fts = medir(Session, termo, True, args.repeticoes)
+                print(f"{quantidade:>10} {termo:>12} {ilike:>12.2f} {fts:>12.2f} {ilike / fts:>7.1f}x")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
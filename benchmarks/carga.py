@@ -0,0 +1,128 @@
+"""Utilitários de carga HTTP compartilhados pelos benchmarks.
+
+- preparar_banco: cria um banco SQLite com turmas e alunos sintéticos
+- servidor: sobe a API com uvicorn em um subprocesso (com variáveis de ambiente)
+- disparar: mantém N requisições simultâneas por um tempo e mede a latência
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date
+import httpx
+from sqlalchemy import create_engine, insert
+from backend import models
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def preparar_banco(caminho: str, turmas: int = 20, alunos_por_turma: int = 500, semente: int = 42):
+    """Criar o banco com turmas e alunos sintéticos (INSERTs em lote)"""
+    aleatorio = random.Random(semente)
+    engine = create_engine(f"sqlite:///{caminho}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Turma), [
+            {"nome": f"Turma {i}", "capacidade": alunos_por_turma * 2, "alunos_matriculados": 0}
+            for i in range(1, turmas + 1)
+        ])
+        conn.execute(insert(models.Aluno), [
+            {
+                "nome": f"Aluno {i}",
+                "data_nascimento": date(2008 + i % 8, 1 + i % 12, 1 + i % 28),
+                "email": f"aluno{i}@escola.com" if aleatorio.random() > 0.2 else None,
+                "status": "ativo" if aleatorio.random() > 0.3 else "inativo",
+                "turma_id": 1 + i % turmas
+            }
+            for i in range(1, turmas * alunos_por_turma + 1)
+        ])
+    engine.dispose()
+
+
+def porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def servidor(ambiente: dict, porta: int = None):
+    """Subir `uvicorn backend.app:app` com o ambiente informado e aguardar o /health"""
+    porta = porta or porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(porta), "--log-level", "warning"],
+        cwd=RAIZ_PROJETO,
+        env={**os.environ, **ambiente},
+    )
+    url = f"http://127.0.0.1:{porta}"
+    try:
+        limite = time.time() + 30
+        while True:
+            try:
+                if httpx.get(f"{url}/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.time() > limite or processo.poll() is not None:
+                raise RuntimeError("O servidor não respondeu ao /health")
+            time.sleep(0.2)
+        yield url
+    finally:
+        processo.terminate()
+        processo.wait(timeout=10)
+
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil p (0-100) pelo método do vizinho mais próximo"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+async def disparar(url: str, requisicoes: list, concorrencia: int, duracao: float, transporte=None) -> dict:
+    """Manter `concorrencia` requisições em voo por `duracao` segundos.
+
+    `requisicoes` é uma lista de (método, caminho, corpo JSON ou None), usada
+    em rodízio. Retorna vazão (req/s), latências p50/p95/p99 em ms e erros.
+    """
+    latencias = []
+    erros = 0
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=30, transport=transporte) as cliente:
+        fim = time.perf_counter() + duracao
+
+        async def trabalhador(indice: int):
+            nonlocal erros
+            i = indice
+            while time.perf_counter() < fim:
+                metodo, caminho, corpo = requisicoes[i % len(requisicoes)]
+                if callable(corpo):
+                    corpo = corpo(i)
+                i += concorrencia
+                inicio = time.perf_counter()
+                try:
+                    resposta = await cliente.request(metodo, caminho, json=corpo)
+                    if resposta.status_code >= 500:
+                        erros += 1
+                except httpx.HTTPError:
+                    erros += 1
+                latencias.append((time.perf_counter() - inicio) * 1000)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador(i) for i in range(concorrencia)))
+        decorrido = time.perf_counter() - inicio
+
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "req_s": len(latencias) / decorrido,
+        "p50_ms": percentil(latencias, 50),
+        "p95_ms": percentil(latencias, 95),
+        "p99_ms": percentil(latencias, 99),
+    }
@@ -0,0 +1,47 @@
+"""Comparação de carga entre o caminho síncrono (threadpool) e o assíncrono (aiosqlite).
+
+Sobe a API duas vezes sobre o mesmo banco sintético, uma com
+ESCOLA_MODO_ASYNC=0 e outra com ESCOLA_MODO_ASYNC=1, e mede req/s e p99
+com a mesma concorrência.
+
+Uso:
+    python -m benchmarks.carga_async --concorrencia 200 --duracao 10
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from benchmarks import carga
+
+REQUISICOES = [
+    ("GET", "/alunos?limit=50", None),
+    ("GET", "/turmas", None),
+    ("GET", "/alunos?turma_id=3&status=ativo&limit=50", None),
+    ("GET", "/alunos?search=aluno%2012&limit=20", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concorrencia", type=int, default=200)
+    parser.add_argument("--duracao", type=float, default=10)
+    parser.add_argument("--alunos-por-turma", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "carga.db")
+        carga.preparar_banco(caminho, alunos_por_turma=args.alunos_por_turma)
+
+        print(f"{'modo':>6} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+        for modo, valor in [("sync", "0"), ("async", "1")]:
+            ambiente = {"ESCOLA_DB_PATH": caminho, "ESCOLA_MODO_ASYNC": valor}
+            with carga.servidor(ambiente) as url:
+                resultado = asyncio.run(carga.disparar(url, REQUISICOES, args.concorrencia, args.duracao))
+            print(
+                f"{modo:>6} {resultado['req_s']:>8.0f} {resultado['p50_ms']:>9.1f} "
+                f"{resultado['p95_ms']:>9.1f} {resultado['p99_ms']:>9.1f} {resultado['erros']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Teste de estresse de matrículas concorrentes.
+
+Várias threads disputam as vagas das turmas ao mesmo tempo; ao final o
+script confere, com COUNT(*) em alunos, que nenhuma turma passou da
+capacidade e que o contador alunos_matriculados bate com a contagem.
+Termina com código 1 se alguma turma foi superlotada.
+
+Uso:
+    python -m benchmarks.matriculas_concorrentes --threads 16 --turmas 1 --capacidade 30 --alunos 500
+    python -m benchmarks.matriculas_concorrentes --turmas 50 --capacidade 20 --alunos 2000
+    python -m benchmarks.matriculas_concorrentes --ingenuo   # fluxo antigo ler/comparar/gravar
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+from backend import crud, database, models, ocupacao
+
+
+def preparar_banco(engine, turmas: int, capacidade: int, alunos: int):
+    """Criar as turmas vazias e os alunos sem turma"""
+    models.Base.metadata.create_all(bind=engine)
+    ocupacao.configurar_contador(engine, True)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Turma), [
+            {"nome": f"Turma {i}", "capacidade": capacidade, "alunos_matriculados": 0} for i in range(1, turmas + 1)
+        ])
+        conn.execute(insert(models.Aluno), [
+            {"nome": f"Aluno {i}", "data_nascimento": date(2010, 1, 1), "status": "inativo"} for i in range(1, alunos + 1)
+        ])
+
+
+def matricular_ingenuo(db, aluno_id: int, turma_id: int) -> bool:
+    """Fluxo antigo: contar, comparar e gravar em passos separados (sujeito a corrida)"""
+    turma = db.get(models.Turma, turma_id)
+    ocupados = db.query(models.Aluno).filter(models.Aluno.turma_id == turma_id).count()
+    if ocupados >= turma.capacidade:
+        return False
+    time.sleep(0.0005)  # Janela entre a leitura e a escrita, como em uma requisição real
+    aluno = db.get(models.Aluno, aluno_id)
+    aluno.turma_id = turma_id
+    aluno.status = "ativo"
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--turmas", type=int, default=1)
+    parser.add_argument("--capacidade", type=int, default=30)
+    parser.add_argument("--alunos", type=int, default=500)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--ingenuo", action="store_true", help="usar o fluxo antigo, sem UPDATE condicional")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(pasta, 'estresse.db')}",
+            connect_args={"check_same_thread": False, "timeout": 1},
+            pool_size=args.threads
+        )
+        preparar_banco(engine, args.turmas, args.capacidade, args.alunos)
+        Session = sessionmaker(bind=engine)
+
+        aleatorio = random.Random(args.semente)
+        pedidos = [(aluno_id, aleatorio.randint(1, args.turmas)) for aluno_id in range(1, args.alunos + 1)]
+        proximo = iter(pedidos)
+        trava_fila = threading.Lock()
+        resultados = {"aceitas": 0, "recusadas": 0, "erros": 0}
+        trava_resultados = threading.Lock()
+        largada = threading.Barrier(args.threads)
+
+        def trabalhador():
+            db = Session()
+            largada.wait()
+            try:
+                while True:
+                    with trava_fila:
+                        pedido = next(proximo, None)
+                    if pedido is None:
+                        return
+
+                    def operacao():
+                        if args.ingenuo:
+                            aceita = matricular_ingenuo(db, *pedido)
+                        else:
+                            aceita = crud.matricular(db, *pedido)
+                        db.commit()
+                        return aceita
+
+                    try:
+                        chave = "aceitas" if database.executar_com_retentativa(db, operacao) else "recusadas"
+                    except Exception:
+                        db.rollback()
+                        chave = "erros"
+                    with trava_resultados:
+                        resultados[chave] += 1
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=trabalhador) for _ in range(args.threads)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+
+        with Session() as db:
+            ocupacao_real = dict(
+                db.query(models.Aluno.turma_id, func.count(models.Aluno.id))
+                .filter(models.Aluno.turma_id.isnot(None))
+                .group_by(models.Aluno.turma_id)
+            )
+            turmas = db.query(models.Turma.id, models.Turma.capacidade, models.Turma.alunos_matriculados).all()
+        engine.dispose()
+
+    superlotadas = [t.id for t in turmas if ocupacao_real.get(t.id, 0) > t.capacidade]
+    divergentes = [t.id for t in turmas if ocupacao_real.get(t.id, 0) != t.alunos_matriculados]
+
+    print(f"modo: {'ingênuo' if args.ingenuo else 'UPDATE condicional'}")
+    print(f"pedidos: {len(pedidos)} em {duracao:.2f}s ({len(pedidos) / duracao:.0f} matrículas/s, {args.threads} threads)")
+    print(f"aceitas: {resultados['aceitas']}  recusadas: {resultados['recusadas']}  erros: {resultados['erros']}")
+    print(f"vagas totais: {args.turmas * args.capacidade}  ocupadas: {sum(ocupacao_real.values())}")
+    print(f"turmas superlotadas: {superlotadas or 'nenhuma'}")
+    print(f"contadores divergentes: {divergentes or 'nenhum'}")
+    sys.exit(1 if superlotadas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark de vazão do SQLite com e sem o perfil de produção.
+
+Para cada perfil, cria um banco temporário e mede com várias threads:
+- escrita: INSERTs de um aluno com commit individual (como POST /alunos)
+- leitura: páginas de 100 alunos com o nome da turma (como GET /alunos)
+- misto: leituras enquanto uma thread escreve (mede "database is locked")
+
+Uso:
+    python -m benchmarks.perfil_sqlite --threads 8 --operacoes 2000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from datetime import date
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from backend import config, crud, database, models
+
+
+def executar_em_threads(threads: int, operacoes: int, funcao) -> tuple:
+    """Dividir as operações entre as threads; retorna (operações/s, erros)"""
+    erros = [0]
+    trava = threading.Lock()
+    por_thread = operacoes // threads
+
+    def trabalhador(indice):
+        for i in range(por_thread):
+            try:
+                funcao(indice * por_thread + i)
+            except OperationalError:
+                with trava:
+                    erros[0] += 1
+
+    lista = [threading.Thread(target=trabalhador, args=(indice,)) for indice in range(threads)]
+    inicio = time.perf_counter()
+    for thread in lista:
+        thread.start()
+    for thread in lista:
+        thread.join()
+    return por_thread * threads / (time.perf_counter() - inicio), erros[0]
+
+
+def medir_perfil(nome: str, perfil: config.PerfilBanco, threads: int, operacoes: int) -> dict:
+    engine = database.criar_engine(replace(perfil, pool_size=threads, max_overflow=threads))
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Turma), [{"nome": f"Turma {i}", "capacidade": 100000} for i in range(1, 11)])
+
+    def escrever(i):
+        with Session() as db:
+            db.execute(insert(models.Aluno), {
+                "nome": f"Aluno {i}", "data_nascimento": date(2010, 1, 1),
+                "email": f"aluno{i}@{nome}.com", "status": "ativo", "turma_id": 1 + i % 10
+            })
+            db.commit()
+
+    def ler(i):
+        with Session() as db:
+            crud.filtrar_alunos(crud.consulta_alunos(db), None, 1 + i % 10, "ativo") \
+                .order_by(models.Aluno.id).limit(100).all()
+
+    escrita, erros_escrita = executar_em_threads(threads, operacoes, escrever)
+    leitura, erros_leitura = executar_em_threads(threads, operacoes, ler)
+
+    # Carga mista: uma thread escrevendo continuamente enquanto as outras leem
+    parar = threading.Event()
+
+    def escritor():
+        i = operacoes
+        while not parar.is_set():
+            try:
+                escrever(i)
+            except OperationalError:
+                pass
+            i += 1
+
+    thread_escritor = threading.Thread(target=escritor)
+    thread_escritor.start()
+    misto, erros_misto = executar_em_threads(max(threads - 1, 1), operacoes, ler)
+    parar.set()
+    thread_escritor.join()
+    engine.dispose()
+    return {
+        "escrita": escrita, "leitura": leitura, "misto": misto,
+        "erros": erros_escrita + erros_leitura + erros_misto
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--operacoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'perfil':>10} {'escritas/s':>12} {'leituras/s':>12} {'leituras/s c/ escrita':>22} {'erros':>6}")
+    for nome, perfil in config.PERFIS_BANCO.items():
+        with tempfile.TemporaryDirectory() as pasta:
+            resultado = medir_perfil(nome, replace(perfil, caminho=os.path.join(pasta, f"{nome}.db")), args.threads, args.operacoes)
+        print(
+            f"{nome:>10} {resultado['escrita']:>12.0f} {resultado['leitura']:>12.0f} "
+            f"{resultado['misto']:>22.0f} {resultado['erros']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Micro-benchmark da serialização de uma listagem de alunos (padrão: 10 mil linhas).
+
+Compara, para o mesmo resultado da projeção de alunos:
+  - legado: jsonable_encoder + JSONResponse (caminho de um dict sem response_model)
+  - response_model: validação + dump_json do Pydantic (schemas.ListaAlunos)
+  - schemas + json: serializadores de schemas.py direto no JSONResponse
+  - schemas + orjson: serializadores de schemas.py direto no RespostaJSONRapida
+
+Uso:
+    python -m benchmarks.serializacao --linhas 10000
+"""
+import argparse
+import statistics
+import time
+from datetime import date
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend import crud, models, schemas
+
+
+def carregar_linhas(quantidade: int) -> list:
+    """Linhas reais da projeção de alunos (com turma_nome) em um banco em memória"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Turma), [{"nome": f"Turma {i}", "capacidade": quantidade} for i in range(10)])
+        conn.execute(insert(models.Aluno), [
+            {
+                "nome": f"Aluno Número {i}",
+                "data_nascimento": date(2010, 1, 1 + i % 28),
+                "email": f"aluno{i}@escola.com" if i % 3 else None,
+                "status": "ativo" if i % 2 else "inativo",
+                "turma_id": (i % 10) + 1 if i % 4 else None,
+            }
+            for i in range(quantidade)
+        ])
+    db = sessionmaker(bind=engine)()
+    try:
+        return crud.consulta_alunos(db).order_by(models.Aluno.id).all()
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def envelope(alunos: list) -> dict:
+    """Mesmo envelope devolvido por GET /alunos"""
+    return {
+        "total": len(alunos),
+        "limite": len(alunos),
+        "proximo_cursor": None,
+        "filtros_aplicados": {"search": None, "turma_id": None, "status": None},
+        "alunos": alunos,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=10_000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    linhas = carregar_linhas(args.linhas)
+    lista_alunos = TypeAdapter(schemas.ListaAlunos)
+
+    def legado():
+        # Dicts com a data como objeto date, como os endpoints montavam antes
+        alunos = [
+            {"id": r.id, "nome": r.nome, "data_nascimento": r.data_nascimento, "email": r.email,
+             "status": r.status, "turma_id": r.turma_id, "turma_nome": r.turma_nome}
+            for r in linhas
+        ]
+        return JSONResponse(jsonable_encoder(envelope(alunos))).body
+
+    def response_model():
+        conteudo = envelope([schemas.aluno_para_dict(r) for r in linhas])
+        return lista_alunos.dump_json(lista_alunos.validate_python(conteudo))
+
+    def schemas_json():
+        return JSONResponse(envelope([schemas.aluno_para_dict(r) for r in linhas])).body
+
+    def schemas_orjson():
+        return schemas.RespostaJSONRapida(envelope([schemas.aluno_para_dict(r) for r in linhas])).body
+
+    estrategias = {
+        "legado": legado,
+        "response_model": response_model,
+        "schemas + json": schemas_json,
+    }
+    if schemas.orjson is not None:
+        estrategias["schemas + orjson"] = schemas_orjson
+    else:
+        print("orjson não instalado: estratégia 'schemas + orjson' ignorada (pip install orjson)")
+
+    base = None
+    print(f"{'estratégia':>18} {'mediana (ms)':>14} {'µs/linha':>10} {'bytes':>10} {'ganho':>8}")
+    for nome, funcao in estrategias.items():
+        tempos = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            corpo = funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        mediana = statistics.median(tempos)
+        base = base or mediana
+        print(f"{nome:>18} {mediana:>14.2f} {mediana * 1000 / args.linhas:>10.2f} {len(corpo):>10} {base / mediana:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Suíte de carga reprodutível da API, com resultados em JSON para comparar commits.
+
+Cria um banco sintético do tamanho pedido e dispara cada cenário com a
+mesma concorrência e duração, contra a API em processo (httpx.ASGITransport)
+ou em um uvicorn local. Cenários:
+  - GET /alunos com todas as combinações de search, turma_id e status
+  - GET /turmas
+  - POST /matriculas (alunos trocando de turma)
+  - POST /alunos (emails únicos por execução)
+As leituras rodam antes das escritas, todas sobre o mesmo banco.
+Com o cache de respostas ligado (padrão) as leituras repetidas são acertos
+do cache; use --env ESCOLA_CACHE=0 para medir o caminho até o banco.
+
+Uso:
+    python -m benchmarks.suite --alunos-por-turma 500 --concorrencia 50 --duracao 5
+    python -m benchmarks.suite --servidor uvicorn --env ESCOLA_CACHE=0 --saida base.json
+    python -m benchmarks.suite --comparar base.json
+"""
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import uuid
+from datetime import datetime
+from urllib.parse import urlencode
+import httpx
+from benchmarks import carga
+
+PASTA_RESULTADOS = os.path.join(carga.RAIZ_PROJETO, "benchmarks", "resultados")
+
+
+def cenarios(turmas: int, alunos: int, execucao: str) -> dict:
+    """Cenários de carga: nome -> lista de (método, caminho, corpo) usada em rodízio"""
+    resultado = {}
+
+    # Todas as combinações dos filtros da listagem (presente/ausente)
+    filtros = {"search": "aluno 12", "turma_id": 3, "status": "ativo"}
+    for usados in itertools.product([False, True], repeat=len(filtros)):
+        parametros = {nome: valor for (nome, valor), usar in zip(filtros.items(), usados) if usar}
+        nome = "GET /alunos" + (" [" + ",".join(parametros) + "]" if parametros else "")
+        resultado[nome] = [("GET", f"/alunos?{urlencode({**parametros, 'limit': 50})}", None)]
+
+    resultado["GET /turmas"] = [("GET", "/turmas", None)]
+
+    # Cada requisição move um aluno para a turma seguinte (capacidade sobra no banco sintético)
+    resultado["POST /matriculas"] = [(
+        "POST", "/matriculas",
+        lambda i: {"aluno_id": 1 + (i * 7919) % alunos, "turma_id": 1 + (i + 1) % turmas}
+    )]
+
+    resultado["POST /alunos"] = [(
+        "POST", "/alunos",
+        lambda i: {
+            "nome": f"Aluno Carga {i}",
+            "data_nascimento": "2010-05-20",
+            "email": f"carga-{execucao}-{i}@escola.com",
+            "status": "ativo",
+            "turma_id": 1 + i % turmas,
+        }
+    )]
+    return resultado
+
+
+def commit_atual() -> str:
+    """Hash curto do commit em que a suíte rodou (ou 'desconhecido')"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=carga.RAIZ_PROJETO,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def executar(args, ambiente: dict, selecionados: dict) -> dict:
+    """Rodar os cenários selecionados contra o servidor escolhido"""
+    resultados = {}
+    if args.servidor == "uvicorn":
+        with carga.servidor(ambiente) as url:
+            for nome, requisicoes in selecionados.items():
+                resultados[nome] = asyncio.run(carga.disparar(url, requisicoes, args.concorrencia, args.duracao))
+                imprimir_linha(nome, resultados[nome])
+        return resultados
+
+    # Em processo: a configuração é lida na importação da aplicação
+    os.environ.update(ambiente)
+    app = importlib.import_module("backend.app").app
+    for nome, requisicoes in selecionados.items():
+        transporte = httpx.ASGITransport(app=app)
+        resultados[nome] = asyncio.run(
+            carga.disparar("http://api", requisicoes, args.concorrencia, args.duracao, transporte=transporte)
+        )
+        imprimir_linha(nome, resultados[nome])
+    return resultados
+
+
+def imprimir_linha(nome: str, resultado: dict):
+    print(
+        f"{nome:>38} {resultado['req_s']:>8.0f} {resultado['p50_ms']:>9.1f} "
+        f"{resultado['p95_ms']:>9.1f} {resultado['p99_ms']:>9.1f} {resultado['erros']:>6}"
+    )
+
+
+def comparar(base: dict, atual: dict):
+    """Imprimir a variação de req/s e p99 de cada cenário em relação a uma execução anterior"""
+    print(f"\nComparação com {base['commit']} ({base['data']}):")
+    print(f"{'cenário':>38} {'req/s':>16} {'p99 (ms)':>20}")
+    for nome, resultado in atual["resultados"].items():
+        anterior = base["resultados"].get(nome)
+        if not anterior:
+            print(f"{nome:>38} {'(novo)':>16}")
+            continue
+        variacao_req = (resultado["req_s"] / anterior["req_s"] - 1) * 100 if anterior["req_s"] else 0.0
+        variacao_p99 = (resultado["p99_ms"] / anterior["p99_ms"] - 1) * 100 if anterior["p99_ms"] else 0.0
+        print(
+            f"{nome:>38} {anterior['req_s']:>6.0f} → {resultado['req_s']:<6.0f}{variacao_req:>+3.0f}% "
+            f"{anterior['p99_ms']:>7.1f} → {resultado['p99_ms']:<7.1f}{variacao_p99:>+4.0f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turmas", type=int, default=20)
+    parser.add_argument("--alunos-por-turma", type=int, default=500)
+    parser.add_argument("--concorrencia", type=int, default=50)
+    parser.add_argument("--duracao", type=float, default=5, help="Segundos por cenário")
+    parser.add_argument("--servidor", choices=["processo", "uvicorn"], default="processo")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--cenario", action="append", default=[], help="Rodar só cenários que contenham o texto (repetível)")
+    parser.add_argument("--env", action="append", default=[], metavar="NOME=VALOR", help="Variável de ambiente da API (repetível)")
+    parser.add_argument("--saida", help="Arquivo JSON de resultados (padrão: benchmarks/resultados/<data>-<commit>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    extras = dict(item.split("=", 1) for item in args.env)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "suite.db")
+        carga.preparar_banco(caminho, args.turmas, args.alunos_por_turma, args.semente)
+        ambiente = {"ESCOLA_DB_PATH": caminho, **extras}
+
+        todos = cenarios(args.turmas, args.turmas * args.alunos_por_turma, uuid.uuid4().hex[:8])
+        selecionados = {
+            nome: requisicoes for nome, requisicoes in todos.items()
+            if not args.cenario or any(filtro in nome for filtro in args.cenario)
+        }
+
+        print(f"{'cenário':>38} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+        resultados = executar(args, ambiente, selecionados)
+
+    execucao = {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "parametros": {
+            "turmas": args.turmas,
+            "alunos_por_turma": args.alunos_por_turma,
+            "concorrencia": args.concorrencia,
+            "duracao": args.duracao,
+            "servidor": args.servidor,
+            "semente": args.semente,
+        },
+        "ambiente": extras,
+        "resultados": resultados,
+    }
+
+    saida = args.saida
+    if not saida:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        saida = os.path.join(PASTA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{execucao['commit']}.json")
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(execucao, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados salvos em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(json.load(arquivo), execucao)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,31 @@
 // Funções JS para consumir a API e manipular o DOM
-async function listarAlunos(){
+const API = 'http://localhost:8000';
+
+// Cursor da próxima página de alunos (null = não há mais páginas)
+let proximoCursor = null;
+
+async function listarAlunos(continuar = false){
+    const out = document.getElementById('lista-alunos');
+    const btnMais = document.getElementById('btn-mais');
     try{
-        const res = await fetch('http://localhost:8000/alunos');
-        const alunos = await res.json();
-        const out = document.getElementById('lista-alunos');
-        out.innerHTML = alunos.map(a=>`<div class="aluno"><strong>${a.nome}</strong> — ${a.status||'inativo'}</div>`).join('');
-    }catch(e){ document.getElementById('lista-alunos').textContent='Erro ao conectar API' }
+        // Só os campos exibidos e sem o COUNT do total, que a página não mostra
+        const params = new URLSearchParams({ fields: 'id,nome,status', incluir_total: 'false' });
+        if(continuar && proximoCursor) params.set('cursor', proximoCursor);
+        const res = await fetch(`${API}/alunos?${params}`);
+        const dados = await res.json();
+        const html = dados.alunos.map(a=>`<div class="aluno"><strong>${a.nome}</strong> — ${a.status||'inativo'}</div>`).join('');
+        if(continuar) out.insertAdjacentHTML('beforeend', html);
+        else out.innerHTML = html;
+        proximoCursor = dados.proximo_cursor;
+        btnMais.hidden = !proximoCursor;
+    }catch(e){
+        out.textContent='Erro ao conectar API';
+        btnMais.hidden = true;
+    }
 }
 
 document.getElementById('btn-novo').addEventListener('click', ()=> alert('Use o endpoint /alunos para criar (demo).'))
-document.getElementById('btn-export').addEventListener('click', ()=> window.location.href='http://localhost:8000/alunos/export?format=csv')
+document.getElementById('btn-export').addEventListener('click', ()=> window.location.href=`${API}/alunos/export?format=csv`)
+document.getElementById('btn-mais').addEventListener('click', ()=> listarAlunos(true))
 
 listarAlunos()
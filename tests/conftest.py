@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+import pytest
+
+# Banco temporário e sem as camadas que respondem sem ir ao banco (cache, coalescência),
+# definidos antes de importar o backend, que lê a configuração na importação
+_pasta = tempfile.mkdtemp(prefix="escola-testes-")
+os.environ["ESCOLA_DB_PATH"] = os.path.join(_pasta, "app.db")
+os.environ["ESCOLA_CACHE"] = "0"
+os.environ["ESCOLA_COALESCENCIA"] = "0"
+# Testes concorrentes: esperar pela vaga de execução em vez de receber 503
+os.environ["ESCOLA_ADMISSAO_ESPERA_MS"] = "30000"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from backend import database, seed  # noqa: E402
+from backend.app import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def semear():
+    """Substituir os dados por `turmas` turmas com `alunos_por_turma` alunos cada"""
+    def _semear(turmas: int, alunos_por_turma: int):
+        # Conexões novas, como o seed de linha de comando (outro processo): no SQLite 3.40 uma
+        # conexão que já fez UPDATE em alunos pode falhar o próximo DELETE ("no such table")
+        # depois que outra conexão muda o esquema, como o seed faz com triggers e índices
+        database.engine.dispose()
+        seed.seed_sintetico(
+            turmas=turmas, alunos_por_turma=alunos_por_turma, capacidade=alunos_por_turma * 2,
+            proporcao_sem_email=0.1, proporcao_inativos=0.2, semente=42
+        )
+    return _semear
+
+
+@pytest.fixture
+def ocupacao_real():
+    """Ocupação de cada turma: (contador alunos_matriculados, COUNT(*) de alunos)"""
+    def _ocupacao_real() -> dict:
+        with database.engine.connect() as conn:
+            linhas = conn.execute(text(
+                "SELECT t.id, t.alunos_matriculados, "
+                "(SELECT COUNT(*) FROM alunos a WHERE a.turma_id = t.id) FROM turmas t"
+            ))
+            return {turma_id: (contador, total) for turma_id, contador, total in linhas}
+    return _ocupacao_real
@@ -0,0 +1,117 @@
+from sqlalchemy import text
+
+from backend import database, perfilador
+
+
+def consultas_listagem(client) -> tuple:
+    with perfilador.orcamento_consultas(1000) as orcamento:
+        resposta = client.get("/alunos", params={"limit": 1000})
+    assert resposta.status_code == 200
+    return orcamento.total, len(resposta.json()["alunos"])
+
+
+def test_listagem_alunos_numero_de_consultas_constante(client, semear):
+    semear(turmas=5, alunos_por_turma=10)
+    consultas_poucos, linhas_poucos = consultas_listagem(client)
+
+    semear(turmas=5, alunos_por_turma=100)
+    consultas_muitos, linhas_muitos = consultas_listagem(client)
+
+    assert (linhas_poucos, linhas_muitos) == (50, 500)
+    assert consultas_muitos == consultas_poucos
+
+
+def aluno_novo(**campos) -> dict:
+    return {"nome": "Aluno de Teste", "data_nascimento": "2010-05-20", "status": "ativo", **campos}
+
+
+def test_turma_inexistente_no_cadastro_e_edicao(client, semear):
+    semear(turmas=2, alunos_por_turma=3)
+    aluno_id = client.get("/alunos", params={"limit": 1}).json()["alunos"][0]["id"]
+
+    for turma_id in (0, 999):
+        resposta = client.post("/alunos", json=aluno_novo(turma_id=turma_id))
+        assert resposta.status_code == 404
+        assert resposta.json()["detail"]["message"] == "Turma não encontrada"
+
+        resposta = client.put(f"/alunos/{aluno_id}", json=aluno_novo(turma_id=turma_id))
+        assert (resposta.status_code, resposta.json()["detail"]) == (400, "Turma não encontrada")
+
+        resposta = client.patch(f"/alunos/{aluno_id}", json={"turma_id": turma_id})
+        assert (resposta.status_code, resposta.json()["detail"]) == (400, "Turma não encontrada")
+
+    assert client.get("/alunos", params={"limit": 1}).json()["total"] == 6
+
+
+def test_importacao_turma_inexistente(client, semear):
+    semear(turmas=2, alunos_por_turma=3)
+    arquivo = (
+        "nome,data_nascimento,email,status,turma_id\n"
+        "Aluno Sem Turma,2010-05-20,,ativo,0\n"
+        "Aluno Valido,2010-05-20,valido@escola.com,ativo,1\n"
+    )
+    resposta = client.post("/alunos/bulk", content=arquivo, headers={"Content-Type": "text/csv"})
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert corpo["inseridos"] == 1
+    assert corpo["erros"] == [{"linha": 2, "message": "Turma não encontrada"}]
+
+
+def test_listagem_com_fields_traz_so_os_campos_pedidos(client, semear):
+    semear(turmas=2, alunos_por_turma=5)
+    alunos = client.get("/alunos", params={"fields": "id,nome", "incluir_total": "false"}).json()["alunos"]
+    assert alunos and all(set(aluno) == {"id", "nome"} for aluno in alunos)
+
+
+def rollup_e_recalculo():
+    """Linhas de estatisticas_turmas (sem grupos zerados) e o mesmo agrupamento recalculado de alunos"""
+    with database.engine.connect() as conn:
+        rollup = set(conn.execute(text(
+            "SELECT turma_id, status, ano_nascimento, total FROM estatisticas_turmas WHERE total > 0"
+        )))
+        recalculo = set(conn.execute(text(
+            "SELECT COALESCE(turma_id, 0), status, CAST(substr(data_nascimento, 1, 4) AS INTEGER), COUNT(*) "
+            "FROM alunos GROUP BY 1, 2, 3"
+        )))
+    return rollup, recalculo
+
+
+def test_exclusao_em_massa_exige_filtro(client, semear):
+    semear(turmas=2, alunos_por_turma=5)
+    resposta = client.delete("/alunos")
+    assert resposta.status_code == 400
+    assert client.get("/alunos", params={"limit": 1}).json()["total"] == 10
+
+
+def test_dry_run_nao_altera_nada(client, semear, ocupacao_real):
+    semear(turmas=2, alunos_por_turma=5)
+    antes = client.get("/alunos", params={"limit": 1000}).json()["alunos"]
+    ativos_turma_1 = client.get("/alunos", params={"turma_id": 1, "status": "ativo", "limit": 1}).json()["total"]
+
+    exclusao = client.delete("/alunos", params={"turma_id": 1, "dry_run": "true"}).json()
+    assert (exclusao["dry_run"], exclusao["excluidos"]) == (True, 5)
+
+    status = client.post("/alunos/status", params={"turma_id": 1, "dry_run": "true"}, json={"status": "inativo"}).json()
+    assert (status["dry_run"], status["alterados"]) == (True, ativos_turma_1)
+
+    assert client.get("/alunos", params={"limit": 1000}).json()["alunos"] == antes
+    assert ocupacao_real()[1] == (5, 5)
+
+
+def test_exclusao_e_troca_de_status_em_massa_mantem_derivados(client, semear, ocupacao_real):
+    semear(turmas=3, alunos_por_turma=10)
+
+    status = client.post("/alunos/status", params={"turma_id": 2}, json={"status": "inativo"}).json()
+    repetido = client.post("/alunos/status", params={"turma_id": 2}, json={"status": "inativo"}).json()
+    assert status["alterados"] > 0 and repetido["alterados"] == 0
+
+    inativos = client.get("/alunos", params={"status": "inativo", "limit": 1}).json()["total"]
+    exclusao = client.delete("/alunos", params={"status": "inativo"}).json()
+    assert exclusao["excluidos"] == inativos >= 10
+
+    assert client.get("/alunos", params={"status": "inativo", "limit": 1}).json()["total"] == 0
+    assert ocupacao_real()[2] == (0, 0)
+    assert all(contador == total for contador, total in ocupacao_real().values())
+    rollup, recalculo = rollup_e_recalculo()
+    assert rollup == recalculo
+    assert client.get("/estatisticas").json()["total"] == 30 - inativos
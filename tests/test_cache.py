@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import cache
+from backend.app import app
+
+LISTAGENS = ("/alunos", "/turmas", "/estatisticas")
+
+
+@pytest.fixture
+def cliente_cache(client, semear):
+    """Cliente com o middleware de cache na frente da aplicação (desligado na configuração dos testes)"""
+    semear(turmas=3, alunos_por_turma=4)
+    cache.cache_respostas.limpar()
+    return TestClient(cache.CacheMiddleware(app))
+
+
+def estado_cache(cliente, rota: str) -> str:
+    resposta = cliente.get(rota)
+    assert resposta.status_code == 200
+    return resposta.headers["x-cache"]
+
+
+def aquecer(cliente):
+    for rota in LISTAGENS:
+        cliente.get(rota)
+        assert estado_cache(cliente, rota) == "HIT"
+
+
+def aluno_novo(**campos) -> dict:
+    return {"nome": "Aluno do Cache", "data_nascimento": "2010-05-20", "status": "ativo", **campos}
+
+
+def primeiro_aluno(cliente, turma_id: int) -> dict:
+    return cliente.get("/alunos", params={"turma_id": turma_id, "limit": 1}).json()["alunos"][0]
+
+
+ESCRITAS = {
+    "POST /alunos": lambda c: c.post("/alunos", json=aluno_novo(turma_id=1)),
+    "PUT /alunos/{id}": lambda c: c.put(f"/alunos/{primeiro_aluno(c, 1)['id']}", json=aluno_novo(turma_id=2)),
+    "PATCH /alunos/{id}": lambda c: c.patch(f"/alunos/{primeiro_aluno(c, 1)['id']}", json={"turma_id": 2}),
+    "DELETE /alunos/{id}": lambda c: c.delete(f"/alunos/{primeiro_aluno(c, 1)['id']}"),
+    "DELETE /alunos": lambda c: c.delete("/alunos", params={"turma_id": 1, "status": "ativo"}),
+    "POST /matriculas": lambda c: c.post("/matriculas", json={"aluno_id": primeiro_aluno(c, 1)["id"], "turma_id": 2}),
+    "POST /matriculas/batch": lambda c: c.post("/matriculas/batch", json={
+        "modo": "parcial", "matriculas": [{"aluno_id": primeiro_aluno(c, 1)["id"], "turma_id": 2}]
+    }),
+}
+
+
+@pytest.mark.parametrize("escrita", ESCRITAS)
+def test_escritas_em_alunos_invalidam_as_listagens(cliente_cache, escrita):
+    turmas_antes = cliente_cache.get("/turmas").json()
+    aquecer(cliente_cache)
+
+    resposta = ESCRITAS[escrita](cliente_cache)
+    assert resposta.status_code in (200, 201)
+
+    for rota in LISTAGENS:
+        assert estado_cache(cliente_cache, rota) == "MISS", rota
+    assert cliente_cache.get("/turmas").json() != turmas_antes
+
+
+def test_escrita_sem_mudar_turma_mantem_cache_de_turmas(cliente_cache):
+    aquecer(cliente_cache)
+    aluno_id = primeiro_aluno(cliente_cache, 1)["id"]
+    assert cliente_cache.patch(f"/alunos/{aluno_id}", json={"nome": "Nome Alterado"}).status_code == 200
+
+    assert estado_cache(cliente_cache, "/alunos") == "MISS"
+    assert estado_cache(cliente_cache, "/estatisticas") == "MISS"
+    assert estado_cache(cliente_cache, "/turmas") == "HIT"
+
+
+def test_if_none_match_so_casa_enquanto_a_geracao_nao_muda(cliente_cache):
+    primeira = cliente_cache.get("/turmas")
+    etag = primeira.headers["etag"]
+
+    nao_modificada = cliente_cache.get("/turmas", headers={"If-None-Match": etag})
+    assert nao_modificada.status_code == 304
+    assert nao_modificada.content == b""
+
+    aluno_id = primeiro_aluno(cliente_cache, 1)["id"]
+    assert cliente_cache.post("/matriculas", json={"aluno_id": aluno_id, "turma_id": 2}).status_code == 200
+
+    modificada = cliente_cache.get("/turmas", headers={"If-None-Match": etag})
+    assert modificada.status_code == 200
+    assert modificada.headers["x-cache"] == "MISS"
+    assert modificada.headers["etag"] != etag
+    assert cliente_cache.get("/turmas", headers={"If-None-Match": modificada.headers["etag"]}).status_code == 304
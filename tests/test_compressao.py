@@ -0,0 +1,46 @@
+import pytest
+
+from backend import compressao
+
+
+@pytest.mark.parametrize("accept_encoding, esperado", [
+    ("", ""),
+    ("identity", ""),
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("*", "gzip"),
+    ("gzip;q=0", ""),
+    ("gzip;q=0, *", ""),
+    ("gzip;q=0,*;q=0.5", ""),
+    ("br;q=0, gzip;q=0, *", ""),
+    ("*;q=0", ""),
+    ("gzip;q=0.5, *;q=0", "gzip"),
+    ("GZIP;Q=1", "gzip"),
+    ("gzip;q=abc", ""),
+])
+def test_escolher_codificacao_gzip(monkeypatch, accept_encoding, esperado):
+    monkeypatch.setattr(compressao, "brotli", None)
+    assert compressao.escolher_codificacao(accept_encoding) == esperado
+
+
+@pytest.mark.parametrize("accept_encoding, esperado", [
+    ("br, gzip", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0, *", "gzip"),
+    ("*", "gzip"),
+])
+def test_escolher_codificacao_brotli(monkeypatch, accept_encoding, esperado):
+    monkeypatch.setattr(compressao, "brotli", object())
+    assert compressao.escolher_codificacao(accept_encoding) == esperado
+
+
+def test_listagem_comprimida_so_quando_aceita(client, semear):
+    semear(turmas=2, alunos_por_turma=50)
+    comprimida = client.get("/alunos", headers={"Accept-Encoding": "gzip"})
+    assert comprimida.headers["content-encoding"] == "gzip"
+    assert comprimida.json()["total"] == 100
+
+    recusada = client.get("/alunos", headers={"Accept-Encoding": "gzip;q=0, *"})
+    assert "content-encoding" not in recusada.headers
+    assert recusada.json()["total"] == 100
+
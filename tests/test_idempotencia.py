@@ -0,0 +1,78 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import perfilador
+
+
+def aluno_novo(email: str) -> dict:
+    return {"nome": "Aluno Idempotente", "data_nascimento": "2010-05-20", "email": email, "status": "ativo"}
+
+
+def total_alunos(client) -> int:
+    return client.get("/alunos", params={"limit": 1}).json()["total"]
+
+
+def test_repeticao_devolve_resposta_gravada_sem_novo_insert(client, semear):
+    semear(turmas=2, alunos_por_turma=3)
+    chave = {"Idempotency-Key": str(uuid.uuid4())}
+    corpo = aluno_novo("repetido@escola.com")
+
+    primeira = client.post("/alunos", json=corpo, headers=chave)
+    assert primeira.status_code == 201
+    assert "idempotent-replayed" not in primeira.headers
+
+    with perfilador.orcamento_consultas(10) as orcamento:
+        repetida = client.post("/alunos", json=corpo, headers=chave)
+    assert repetida.status_code == 201
+    assert repetida.headers["idempotent-replayed"] == "true"
+    assert repetida.json() == primeira.json()
+    assert not any(comando.startswith("INSERT INTO alunos") for comando in orcamento.comandos)
+    assert total_alunos(client) == 7
+
+
+def test_repeticao_de_erro_devolve_o_mesmo_status(client, semear):
+    semear(turmas=2, alunos_por_turma=3)
+    chave = {"Idempotency-Key": str(uuid.uuid4())}
+    corpo = {"nome": "x" * 3000, "capacidade": 10}
+
+    primeira = client.post("/turmas", json=corpo, headers=chave)
+    repetida = client.post("/turmas", json=corpo, headers=chave)
+    assert primeira.status_code == repetida.status_code == 422
+    assert repetida.headers["idempotent-replayed"] == "true"
+    assert repetida.json() == primeira.json()
+
+
+def test_chave_reusada_com_outro_corpo_ou_rota_e_recusada(client, semear):
+    semear(turmas=2, alunos_por_turma=3)
+    chave = {"Idempotency-Key": str(uuid.uuid4())}
+    assert client.post("/alunos", json=aluno_novo("original@escola.com"), headers=chave).status_code == 201
+
+    outro_corpo = client.post("/alunos", json=aluno_novo("outro@escola.com"), headers=chave)
+    assert outro_corpo.status_code == 422
+    assert outro_corpo.json()["message"] == "Idempotency-Key já usada com outra requisição"
+
+    outra_rota = client.post("/turmas", json={"nome": "Turma Reuso", "capacidade": 10}, headers=chave)
+    assert outra_rota.status_code == 422
+    assert total_alunos(client) == 7
+    assert all(turma["nome"] != "Turma Reuso" for turma in client.get("/turmas").json()["turmas"])
+
+
+def test_duplicatas_simultaneas_executam_o_endpoint_uma_vez(client, semear):
+    semear(turmas=2, alunos_por_turma=3)
+    chave = {"Idempotency-Key": str(uuid.uuid4())}
+    corpo = aluno_novo("simultaneo@escola.com")
+    requisicoes = 8
+    largada = threading.Barrier(requisicoes)
+
+    def criar(_):
+        largada.wait()
+        return client.post("/alunos", json=corpo, headers=chave)
+
+    with ThreadPoolExecutor(max_workers=requisicoes) as executor:
+        respostas = list(executor.map(criar, range(requisicoes)))
+
+    assert [resposta.status_code for resposta in respostas] == [201] * requisicoes
+    assert sum("idempotent-replayed" not in resposta.headers for resposta in respostas) == 1
+    assert len({resposta.json()["aluno"]["id"] for resposta in respostas}) == 1
+    assert total_alunos(client) == 7
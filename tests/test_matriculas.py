@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CAPACIDADE = 3
+REQUISICOES = 24
+
+
+def test_matriculas_concorrentes_nao_passam_da_capacidade(client, semear, ocupacao_real):
+    semear(turmas=4, alunos_por_turma=10)
+    turma_id = client.post("/turmas", json={"nome": "Turma Concorrida", "capacidade": CAPACIDADE}).json()["turma"]["id"]
+    alunos = [aluno["id"] for aluno in client.get("/alunos", params={"limit": REQUISICOES}).json()["alunos"]]
+
+    # Todas as threads disparam juntas para disputar as mesmas vagas
+    largada = threading.Barrier(REQUISICOES)
+
+    def matricular(aluno_id):
+        largada.wait()
+        return client.post("/matriculas", json={"aluno_id": aluno_id, "turma_id": turma_id}).status_code
+
+    with ThreadPoolExecutor(max_workers=REQUISICOES) as executor:
+        status = list(executor.map(matricular, alunos))
+
+    assert status.count(200) == CAPACIDADE
+    assert status.count(400) == REQUISICOES - CAPACIDADE
+    contador, total = ocupacao_real()[turma_id]
+    assert contador == total == CAPACIDADE
+    assert all(contador == total for contador, total in ocupacao_real().values())
+
+    turma = next(turma for turma in client.get("/turmas").json()["turmas"] if turma["id"] == turma_id)
+    assert (turma["alunos_matriculados"], turma["vagas_disponíveis"]) == (CAPACIDADE, 0)
+
+
+def turma_de(client, aluno_id: int):
+    return next(aluno for aluno in client.get("/alunos", params={"limit": 1000}).json()["alunos"] if aluno["id"] == aluno_id)["turma_id"]
+
+
+def lote(modo: str, *pares) -> dict:
+    return {"modo": modo, "matriculas": [{"aluno_id": aluno_id, "turma_id": turma_id} for aluno_id, turma_id in pares]}
+
+
+def test_lote_atomico_que_lota_a_turma_nao_grava_nada(client, semear, ocupacao_real):
+    semear(turmas=3, alunos_por_turma=4)
+    turma_id = client.post("/turmas", json={"nome": "Turma Pequena", "capacidade": 2}).json()["turma"]["id"]
+    alunos = [aluno["id"] for aluno in client.get("/alunos", params={"turma_id": 1}).json()["alunos"]][:3]
+    antes = ocupacao_real()
+
+    resposta = client.post("/matriculas/batch", json=lote("atomico", *[(aluno_id, turma_id) for aluno_id in alunos]))
+
+    assert resposta.status_code == 400
+    assert ocupacao_real() == antes
+    assert [turma_de(client, aluno_id) for aluno_id in alunos] == [1, 1, 1]
+
+
+def test_lote_com_trocas_entre_turmas_mantem_o_contador_exato(client, semear, ocupacao_real):
+    semear(turmas=3, alunos_por_turma=4)
+    a = client.get("/alunos", params={"turma_id": 1, "limit": 1}).json()["alunos"][0]["id"]
+    b = client.get("/alunos", params={"turma_id": 2, "limit": 1}).json()["alunos"][0]["id"]
+    c = client.get("/alunos", params={"turma_id": 3, "limit": 1}).json()["alunos"][0]["id"]
+
+    resposta = client.post("/matriculas/batch", json=lote("atomico", (a, 2), (b, 1), (c, 1)))
+
+    assert resposta.status_code == 200
+    assert [turma_de(client, aluno_id) for aluno_id in (a, b, c)] == [2, 1, 1]
+    ocupacao = ocupacao_real()
+    assert (ocupacao[1], ocupacao[2], ocupacao[3]) == ((5, 5), (4, 4), (3, 3))
+    turmas = {turma["id"]: turma["alunos_matriculados"] for turma in resposta.json()["turmas"]}
+    assert turmas == {1: 5, 2: 4}
+
+
+def test_lote_parcial_com_turma_acima_da_capacidade(client, semear, ocupacao_real):
+    semear(turmas=2, alunos_por_turma=4)
+    lotada = client.post("/turmas", json={"nome": "Turma Lotada", "capacidade": 1}).json()["turma"]["id"]
+    alunos = [aluno["id"] for aluno in client.get("/alunos", params={"turma_id": 1}).json()["alunos"]]
+    # PATCH não confere a capacidade: a turma fica com 2 alunos para 1 vaga
+    for aluno_id in alunos[:2]:
+        assert client.patch(f"/alunos/{aluno_id}", json={"turma_id": lotada}).status_code == 200
+
+    resposta = client.post("/matriculas/batch", json=lote("parcial", (alunos[2], 2), (alunos[3], lotada)))
+
+    assert resposta.status_code == 200
+    assert [item["status"] for item in resposta.json()["resultados"]] == ["matriculado", "erro"]
+    assert ocupacao_real()[lotada] == (2, 2)
+    assert all(contador == total for contador, total in ocupacao_real().values())
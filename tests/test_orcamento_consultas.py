@@ -0,0 +1,28 @@
+import pytest
+
+from backend import perfilador
+
+
+@pytest.fixture(autouse=True)
+def dados(semear):
+    semear(turmas=5, alunos_por_turma=20)
+
+
+@pytest.mark.parametrize("rota, maximo", [
+    ("/alunos", 2),
+    ("/alunos?incluir_total=false", 1),
+    ("/alunos?turma_id=1&status=ativo", 2),
+    ("/turmas", 1),
+    ("/estatisticas", 2),
+])
+def test_orcamento_consultas_das_leituras(client, rota, maximo):
+    with perfilador.orcamento_consultas(maximo):
+        resposta = client.get(rota)
+    assert resposta.status_code == 200
+
+
+def test_orcamento_excedido_lista_os_comandos(client):
+    with pytest.raises(perfilador.OrcamentoConsultasExcedido, match="executados 2") as erro:
+        with perfilador.orcamento_consultas(1):
+            client.get("/alunos")
+    assert "FROM alunos" in str(erro.value)